@@ -0,0 +1,12 @@
+"""Benchmark suite of the simulation, persistence and plotting hot paths
+
+Run it from the root of the repository::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --quick --baseline results.json --threshold 1.25
+
+Results are written as JSON (one entry per benchmark and parameters, with the timings of every repeat), compared
+to a baseline when one is given (the run fails if a benchmark got slower than the threshold allows) and summarized
+by the scaling exponent of each benchmark in the number of nodes and of players (log-log least squares fit).
+
+"""
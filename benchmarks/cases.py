@@ -0,0 +1,163 @@
+"""Benchmark cases
+
+Each case is a function taking its parameters and returning the function to time; everything built before
+returning is setup and is not timed. Cases building their game in the timed function do so because playing
+modifies the game.
+
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+from typing import Dict, List, Any, Callable
+
+import networkx as nx
+import numpy as np
+
+from ngt.game import Game
+from ngt.player import Player
+from ngt.rules import Rules
+from ngt.increment import Increment
+from ngt.graph import GraphBackend, convert_graph
+from ngt.functions.betweenness import single_source_shortest_paths
+from ngt.functions.utility import Utility
+from ngt.functions.action_strategy import ActionStrategy, myopic_greedy
+
+Case = namedtuple('Case', ['name', 'params', 'setup'])
+Case.__doc__ = """Benchmark: name, parameters and function returning the function to time from the parameters"""
+
+mixed_strategies = [
+    ActionStrategy.myopic_greedy,
+    ActionStrategy.random_egoist,
+    ActionStrategy.follower,
+    ActionStrategy.random_random,
+]
+
+
+def random_graph(nb_nodes: int, density: float, seed: int = 0) -> nx.Graph:
+    nb_edges = int(density * nb_nodes * (nb_nodes - 1) / 2)
+    return nx.gnm_random_graph(nb_nodes, nb_edges, seed=seed)
+
+
+def mixed_game(nb_nodes: int, nb_players: int, nb_time_steps: int, density: float = 0.1) -> Game:
+    game = Game(graph=random_graph(nb_nodes, density), nb_players=nb_players, nb_time_steps=nb_time_steps)
+    for player_id in range(nb_players):
+        game.add_player(Player(action_strategy=mixed_strategies[player_id % len(mixed_strategies)]))
+    return game
+
+
+def greedy_move(nb_nodes: int, density: float) -> Callable[[], Any]:
+    rules = Rules()
+    history = {0: Increment(graph=random_graph(nb_nodes, density))}
+
+    def run():
+        return myopic_greedy(rules, history, Utility.betweenness_centrality, 0)
+
+    return run
+
+
+def shortest_paths(nb_nodes: int, backend: str) -> Callable[[], Any]:
+    graph = convert_graph(random_graph(nb_nodes, 8 / nb_nodes), GraphBackend[backend])
+    # the neighbour lists of a CSR graph are built on the first search, once for the game
+    single_source_shortest_paths(graph, 0)
+
+    def run():
+        for source in range(10):
+            single_source_shortest_paths(graph, source)
+
+    return run
+
+
+def mixed_play_game(nb_nodes: int, nb_players: int, nb_time_steps: int) -> Callable[[], Any]:
+    def run():
+        random.seed(0)
+        mixed_game(nb_nodes, nb_players, nb_time_steps).play_game()
+
+    return run
+
+
+def save_load(nb_nodes: int, nb_time_steps: int) -> Callable[[], Any]:
+    random.seed(0)
+    game = Game(graph=random_graph(nb_nodes, 0.05), nb_players=nb_nodes, nb_time_steps=nb_time_steps)
+    for _ in range(nb_nodes):
+        game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+    game.play_game()
+    folder = tempfile.mkdtemp()
+    file_name = os.path.join(folder, 'game.ngt')
+
+    def run():
+        game.save(file_name)
+        loaded = Game.load(file_name, lazy=False)
+        for time_step in loaded.history:
+            loaded.history.graph(time_step)
+
+    run.cleanup = lambda: shutil.rmtree(folder)
+    return run
+
+
+def labels_sizes_lboards(nb_nodes: int, nb_time_steps: int) -> Callable[[], Any]:
+    from ngt.plot import get_labels_sizes_lboards
+
+    random.seed(0)
+    game = mixed_game(nb_nodes, 4, nb_time_steps)
+    game.play_game()
+
+    def run():
+        # frames are computed on access
+        labels, sizes, leader_boards = get_labels_sizes_lboards(game)
+        return [(labels[t], sizes[t], leader_boards[t]) for t in game.history]
+
+    return run
+
+
+def layout(nb_nodes: int) -> Callable[[], Any]:
+    from ngt.layout import force_layout
+
+    graph = random_graph(nb_nodes, 4 / nb_nodes)
+    edges = np.array(list(graph.edges()), dtype=int).reshape(-1, 2)
+
+    def run():
+        return force_layout(nb_nodes, edges, iterations=20)
+
+    return run
+
+
+def import_time(module: str) -> Callable[[], Any]:
+    # import in a fresh interpreter, as a worker process would
+    def run():
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True)
+
+    return run
+
+
+def cases(quick: bool = False) -> List[Case]:
+    """Benchmarks of the suite
+
+    Args:
+        quick: Smaller sizes, for a smoke run
+
+    Returns:
+        List of benchmark cases
+    """
+    sizes = [20, 40] if quick else [20, 40, 80]
+    densities = [0.1] if quick else [0.05, 0.15]
+    nb_players = [2, 4] if quick else [2, 4, 8]
+    nb_time_steps = 3 if quick else 5
+
+    suite = []
+    suite += [Case('myopic_greedy', {'nb_nodes': n, 'density': d}, greedy_move) for n in sizes for d in densities]
+    suite += [Case('shortest_paths', {'nb_nodes': n, 'backend': backend.name}, shortest_paths)
+              for n in ([1000, 4000] if quick else [1000, 4000, 16000]) for backend in GraphBackend]
+    suite += [Case('play_game', {'nb_nodes': 30, 'nb_players': p, 'nb_time_steps': nb_time_steps}, mixed_play_game)
+              for p in nb_players]
+    suite += [Case('play_game', {'nb_nodes': n, 'nb_players': 4, 'nb_time_steps': nb_time_steps}, mixed_play_game)
+              for n in sizes if n != 30]
+    suite += [Case('save_load', {'nb_nodes': n, 'nb_time_steps': 20 if quick else 100}, save_load) for n in sizes]
+    suite += [Case('get_labels_sizes_lboards', {'nb_nodes': n, 'nb_time_steps': nb_time_steps},
+                   labels_sizes_lboards) for n in sizes]
+    suite += [Case('import', {'module': module}, import_time) for module in ['ngt.game', 'ngt.plot']]
+    suite += [Case('force_layout', {'nb_nodes': n}, layout) for n in ([250, 1000] if quick else [250, 1000, 4000])]
+    return suite
@@ -0,0 +1,162 @@
+"""Run the benchmark cases, compare them to a baseline and fit their scaling"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple, Any
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.cases import Case, cases
+
+Result = Dict[str, Any]
+
+# parameters along which the scaling of the benchmarks is fitted
+scaling_params = ['nb_nodes', 'nb_players']
+
+
+def result_key(result: Result) -> str:
+    """Key identifying a benchmark and its parameters across runs
+
+    Args:
+        result: Result of a benchmark
+
+    Returns:
+        Key, eg: myopic_greedy[density=0.05,nb_nodes=20]
+    """
+    params = ','.join(f'{name}={value}' for name, value in sorted(result['params'].items()))
+    return f"{result['name']}[{params}]"
+
+
+def run_case(case: Case, repeat: int) -> Result:
+    """Time a benchmark case
+
+    Args:
+        case: Benchmark case
+        repeat: Number of timed runs
+
+    Returns:
+        Result: name, parameters, wall time of each run and their median/min (seconds)
+    """
+    run = case.setup(**case.params)
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        if hasattr(run, 'cleanup'):
+            run.cleanup()
+
+    return {
+        'name': case.name,
+        'params': case.params,
+        'times': times,
+        'median': statistics.median(times),
+        'min': min(times),
+    }
+
+
+def compare(results: List[Result], baseline: List[Result], threshold: float) -> List[Tuple[str, float, bool]]:
+    """Compare results with a baseline
+
+    Args:
+        results: Results of this run
+        baseline: Results of the baseline run
+        threshold: Maximal ratio between the median time of a benchmark and its baseline
+
+    Returns:
+        List of (key, ratio to the baseline, is regression) for the benchmarks present in both runs
+    """
+    baseline = {result_key(result): result for result in baseline}
+    comparison = []
+    for result in results:
+        reference = baseline.get(result_key(result))
+        if reference is not None and reference['median'] > 0:
+            ratio = result['median'] / reference['median']
+            comparison.append((result_key(result), ratio, ratio > threshold))
+    return comparison
+
+
+def fit_scaling(results: List[Result]) -> List[Tuple[str, str, Dict[str, Any], float]]:
+    """Fit time ~ c * param ** exponent for every benchmark varying along a scaling parameter
+
+    Args:
+        results: Results of a run
+
+    Returns:
+        List of (benchmark name, scaling parameter, other parameters, exponent)
+    """
+    fits = []
+    for param in scaling_params:
+        series = defaultdict(list)
+        for result in results:
+            if param in result['params']:
+                others = tuple(sorted((name, value) for name, value in result['params'].items() if name != param))
+                series[result['name'], others].append((result['params'][param], result['median']))
+
+        for (name, others), points in sorted(series.items()):
+            if len({value for value, _ in points}) < 2 or any(median <= 0 for _, median in points):
+                continue
+            x = np.log([value for value, _ in points])
+            y = np.log([median for _, median in points])
+            exponent = np.polyfit(x, y, 1)[0]
+            fits.append((name, param, dict(others), float(exponent)))
+    return fits
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'networkx': nx.__version__,
+        'numpy': np.__version__,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--output', help='path of the JSON file receiving the results')
+    parser.add_argument('--baseline', help='path of the JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='maximal ratio of the median time to the baseline (default: 1.25)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs per benchmark (default: 3)')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes, for a smoke run')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose name contains this string')
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in cases(args.quick):
+        if args.filter in case.name:
+            result = run_case(case, args.repeat)
+            results.append(result)
+            print(f"{result_key(result):70s} {1000 * result['median']:10.2f} ms")
+
+    print()
+    for name, param, others, exponent in fit_scaling(results):
+        print(f'{name} ~ {param}^{exponent:.2f}  {others}')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'environment': environment(), 'results': results}, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            comparison = compare(results, json.load(baseline)['results'], args.threshold)
+        print()
+        for key, ratio, regression in comparison:
+            print(f"{key:70s} x{ratio:6.2f}{'  REGRESSION' if regression else ''}")
+        if any(regression for _, _, regression in comparison):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
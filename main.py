@@ -50,8 +50,8 @@ if __name__ == '__main__':
 
     # Save the game
 
-    folder_name = 'my_game'
-    game.save(folder_name)
+    file_name = 'my_game.ngt'
+    game.save(file_name)
 
     # Procrastinate
 
@@ -59,7 +59,7 @@ if __name__ == '__main__':
 
     # Load the game
 
-    game = Game.load(folder_name)
+    game = Game.load(file_name)
 
     # Plot the last state of the game
 
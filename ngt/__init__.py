@@ -27,9 +27,23 @@ Submodules
     centrality
 """
 
-import ngt
-from ngt import *
+import importlib
 
 VERSION = "0.0.1"
 """The version of this module."""
 
+# submodules are imported on first access (eg: ngt.plot.plot), so that importing ngt or the simulation modules
+# (ngt.game, ngt.player, ngt.functions) doesn't load matplotlib
+submodules = ['archive', 'experiment', 'export', 'functions', 'game', 'graph', 'history', 'increment',
+              'instrumentation', 'layout', 'metrics', 'parallel', 'player', 'plot', 'rules', 'utils']
+
+
+def __getattr__(name):
+    if name in submodules:
+        return importlib.import_module(f'ngt.{name}')
+    raise AttributeError(f"module 'ngt' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(list(globals()) + submodules)
+
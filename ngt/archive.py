@@ -0,0 +1,456 @@
+"""Module hosting the single-file, append-only archive format of saved games
+
+Layout of an archive::
+
+    header   MAGIC (8 bytes), format version (uint32)
+    blocks   kind (1 byte), payload length (uint64), key (int64), pickled payload
+             - b'M' manifest (rules, players, ...), key unused
+             - b'R' round whose graph is stored as a difference with the previous round, key = time step
+             - b'C' round whose graph is stored in full (checkpoint), key = time step
+             - b'I' index (offset of every round, last graph), key unused
+    trailer  offset of the index block (uint64), INDEX_MAGIC (8 bytes)
+
+The index and trailer are written when the archive is closed. Rounds can be appended later: the index is dropped
+and written again on close. An archive whose index is missing (eg: the process was killed while writing) is
+indexed with one sequential pass over the block headers, any incomplete block at the end being ignored. Games can
+therefore stream their rounds to an archive as they are played and resume from it after a crash.
+
+"""
+import mmap
+import os
+import pickle
+import queue
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, List, Tuple, Any, Iterator
+
+MAGIC = b'NGTARCH\x00'
+INDEX_MAGIC = b'NGTINDEX'
+VERSION = 1
+
+HEADER = struct.Struct('<8sI')
+BLOCK = struct.Struct('<cQq')
+TRAILER = struct.Struct('<Q8s')
+
+MANIFEST = b'M'
+ROUND = b'R'
+CHECKPOINT = b'C'
+INDEX = b'I'
+
+Round = Tuple[Any, Any, Any, Dict[str, Any]]
+Block = Tuple[bytes, int, bytes]
+
+
+def is_archive(path: str) -> bool:
+    """Check a path is a game archive (as opposed to a folder of pickles)
+
+    Args:
+        path: Path to check
+
+    Returns:
+        Boolean indicating the path is an archive
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as archive:
+        return archive.read(len(MAGIC)) == MAGIC
+
+
+def encode_round(time_step: int, actions: Any, reactions: Any, graph_data: Any, checkpoint: bool,
+                 extra: Dict[str, Any] = None) -> Block:
+    """Pickle the record of a round
+
+    Args:
+        time_step: Time step of the round
+        actions: Actions of the round
+        reactions: Reactions of the round
+        graph_data: Difference with the previous round's graph, or full graph for checkpoints
+        checkpoint: Boolean indicating graph_data is a full graph
+        extra: Any additional data to store with the round
+
+    Returns:
+        Kind, key and pickled payload of the block
+    """
+    kind = CHECKPOINT if checkpoint else ROUND
+    return kind, time_step, pickle.dumps((actions, reactions, graph_data, extra or {}), pickle.HIGHEST_PROTOCOL)
+
+
+def scan_blocks(archive: Any, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """Iterate over the complete blocks of an archive
+
+    Args:
+        archive: File object opened in binary mode
+        start: Offset of the first block
+        end: Size of the file
+
+    Returns:
+        Iterator over (kind, key, offset of the block, offset of the next block)
+    """
+    offset = start
+    while offset + BLOCK.size <= end:
+        archive.seek(offset)
+        kind, length, key = BLOCK.unpack(archive.read(BLOCK.size))
+        next_offset = offset + BLOCK.size + length
+        if next_offset > end:
+            return
+        yield kind, key, offset, next_offset
+        offset = next_offset
+
+
+class ArchiveReader:
+    """Random access to the blocks of an archive"""
+    def __init__(self, path: str, memory_map: bool = False):
+        """Standard init method, reads the manifest and the index (or rebuilds it)
+
+        Args:
+            path: Path of the archive
+            memory_map: Read the blocks from a memory mapping of the file instead of seeking and reading
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if memory_map else None
+
+        magic, version = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise Exception(f"{path} is not a game archive")
+        if version > VERSION:
+            raise Exception(f"{path} was written by a more recent version (format {version})")
+
+        self.manifest = None
+        self.manifest_offset = None
+        self.offsets = {}  # type: Dict[int, int]
+        self.checkpoint_times = []  # type: List[int]
+        self.last_graph = None
+        # offset where new blocks can be appended (the index and trailer, if any, start there)
+        self.end = HEADER.size
+        self.indexed = self._read_index()
+        if not self.indexed:
+            self._scan()
+
+    def _read_index(self) -> bool:
+        if self.size < HEADER.size + TRAILER.size:
+            return False
+        self.file.seek(self.size - TRAILER.size)
+        index_offset, magic = TRAILER.unpack(self.file.read(TRAILER.size))
+        if magic != INDEX_MAGIC or index_offset >= self.size:
+            return False
+
+        kind, index = self.read_block(index_offset)
+        if kind != INDEX:
+            return False
+        self.manifest_offset = index['manifest_offset']
+        self.manifest = self.read_block(self.manifest_offset)[1]
+        self.offsets = index['offsets']
+        self.checkpoint_times = index['checkpoint_times']
+        self.last_graph = index['last_graph']
+        self.end = index_offset
+        return True
+
+    def _scan(self) -> None:
+        for kind, key, offset, next_offset in scan_blocks(self.file, HEADER.size, self.size):
+            if kind == MANIFEST:
+                self.manifest_offset = offset
+                self.manifest = self.read_block(offset)[1]
+            elif kind in (ROUND, CHECKPOINT):
+                self.offsets[key] = offset
+                if kind == CHECKPOINT:
+                    self.checkpoint_times.append(key)
+            elif kind == INDEX:
+                # index left before a damaged trailer, dropped when appending
+                continue
+            self.end = next_offset
+
+    def read_block(self, offset: int) -> Tuple[bytes, Any]:
+        """Read and unpickle a block
+
+        Args:
+            offset: Offset of the block
+
+        Returns:
+            Kind and payload of the block
+        """
+        if self.buffer is not None:
+            kind, length, _ = BLOCK.unpack_from(self.buffer, offset)
+            start = offset + BLOCK.size
+            return kind, pickle.loads(self.buffer[start:start + length])
+
+        self.file.seek(offset)
+        kind, length, _ = BLOCK.unpack(self.file.read(BLOCK.size))
+        return kind, pickle.loads(self.file.read(length))
+
+    def read_round(self, time_step: int) -> Round:
+        """Read the record of a round
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            Actions, reactions, graph difference (or full graph for checkpoints) and extra data of the round
+        """
+        return self.read_block(self.offsets[time_step])[1]
+
+    def rounds(self) -> Iterator[Tuple[int, bool, Round]]:
+        """Read every round in one sequential pass
+
+        Returns:
+            Iterator over (time step, is checkpoint, record) in time order
+        """
+        for kind, key, offset, _ in scan_blocks(self.file, HEADER.size, self.end):
+            if kind in (ROUND, CHECKPOINT) and self.offsets.get(key) == offset:
+                yield key, kind == CHECKPOINT, self.read_block(offset)[1]
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ArchiveRounds(MutableMapping):
+    """Rounds of an archive, decoded on first access and kept in a bounded cache
+
+    Maps a time step to the record (actions, reactions, graph data, checkpoint) used by ngt.history.History.
+    Rounds set after opening (eg: when playing on after loading a game) are kept in memory.
+    """
+    def __init__(self, reader: ArchiveReader, cache_size: int = 64):
+        """Standard init method
+
+        Args:
+            reader: Reader of the archive, preferably memory mapped
+            cache_size: Maximum number of decoded rounds kept in memory
+        """
+        self.reader = reader
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._added = {}
+
+    def __getitem__(self, time_step: int) -> Tuple[Any, Any, Any, bool]:
+        if time_step in self._added:
+            return self._added[time_step]
+        if time_step in self._cache:
+            self._cache.move_to_end(time_step)
+            return self._cache[time_step]
+
+        kind, (actions, reactions, graph_data, _) = self.reader.read_block(self.reader.offsets[time_step])
+        record = actions, reactions, graph_data, kind == CHECKPOINT
+
+        self._cache[time_step] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def __setitem__(self, time_step: int, record: Tuple[Any, Any, Any, bool]) -> None:
+        self._added[time_step] = record
+
+    def __delitem__(self, time_step: int) -> None:
+        raise Exception("Rounds of an archive can not be deleted")
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.reader.offsets
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self.reader.offsets) + len(self._added)
+
+    def __contains__(self, time_step: Any) -> bool:
+        return time_step in self.reader.offsets or time_step in self._added
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the archive is opened again when unpickled (eg: in another process)
+        return {'path': self.reader.path, 'cache_size': self.cache_size, 'added': self._added}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(ArchiveReader(state['path'], memory_map=True), state['cache_size'])
+        self._added = state['added']
+
+
+class ArchiveWriter:
+    """Append blocks to an archive, the index is written on close"""
+    def __init__(self, path: str, manifest: Any = None, atomic: bool = True):
+        """Standard init method
+
+        Creates the archive when a manifest is given, otherwise opens an existing archive to append rounds. A new
+        archive is written to a temporary file which replaces the destination on close (unless atomic is False),
+        so readers of a previous archive at the same path are not disturbed.
+
+        Args:
+            path: Path of the archive
+            manifest: Rules, players and settings of the game
+            atomic: Write a new archive to a temporary file (set to False to stream to the destination directly)
+        """
+        self.path = path
+        self.temporary_path = None
+        if manifest is not None:
+            if atomic:
+                self.temporary_path = path + '.tmp'
+            self.file = open(self.temporary_path or path, 'wb')
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+            self.offsets = {}
+            self.checkpoint_times = []
+            self.manifest_offset = self.write_block(MANIFEST, 0, pickle.dumps(manifest, pickle.HIGHEST_PROTOCOL))
+        else:
+            with ArchiveReader(path) as reader:
+                end = reader.end
+                self.offsets = reader.offsets
+                self.checkpoint_times = reader.checkpoint_times
+                self.manifest_offset = reader.manifest_offset
+            self.file = open(path, 'r+b')
+            # drop the index (or the incomplete block left by a crash), it is written again on close
+            self.file.truncate(end)
+            self.file.seek(end)
+
+    def write_block(self, kind: bytes, key: int, data: bytes) -> int:
+        """Append a block
+
+        Args:
+            kind: Kind of the block
+            key: Key of the block (time step for rounds)
+            data: Pickled payload
+
+        Returns:
+            Offset of the block
+        """
+        offset = self.file.tell()
+        self.file.write(BLOCK.pack(kind, len(data), key))
+        self.file.write(data)
+        if kind in (ROUND, CHECKPOINT):
+            self.offsets[key] = offset
+            if kind == CHECKPOINT:
+                self.checkpoint_times.append(key)
+        return offset
+
+    def write_round(self, time_step: int, actions: Any, reactions: Any, graph_data: Any, checkpoint: bool,
+                    extra: Dict[str, Any] = None) -> None:
+        """Append the record of a round
+
+        Args:
+            time_step: Time step of the round
+            actions: Actions of the round
+            reactions: Reactions of the round
+            graph_data: Difference with the previous round's graph, or full graph for checkpoints
+            checkpoint: Boolean indicating graph_data is a full graph
+            extra: Any additional data to store with the round
+
+        Returns:
+            None
+        """
+        self.write_block(*encode_round(time_step, actions, reactions, graph_data, checkpoint, extra))
+
+    def flush(self, sync: bool = False) -> None:
+        """Push the written blocks to the operating system (they survive a crash of the process)
+
+        Args:
+            sync: Also wait for the blocks to reach the disk (they survive a crash of the machine)
+
+        Returns:
+            None
+        """
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def close(self, last_graph: Any = None) -> None:
+        """Write the index and the trailer, then close the file
+
+        Args:
+            last_graph: Graph of the last round, readable without decoding the rounds
+
+        Returns:
+            None
+        """
+        index = {
+            'manifest_offset': self.manifest_offset,
+            'offsets': self.offsets,
+            'checkpoint_times': self.checkpoint_times,
+            'last_graph': last_graph,
+        }
+        index_offset = self.write_block(INDEX, 0, pickle.dumps(index, pickle.HIGHEST_PROTOCOL))
+        self.file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+        self.file.close()
+        if self.temporary_path is not None:
+            os.replace(self.temporary_path, self.path)
+
+
+class BackgroundArchiveWriter:
+    """Append rounds to an archive from a separate thread, so that the I/O overlaps the computation
+
+    Rounds are pickled by the calling thread, since the objects they reference can change as soon as the call
+    returns; only the writes happen in the background. Each round is flushed once written.
+    """
+    def __init__(self, writer: ArchiveWriter, max_pending: int = 64, sync: bool = False):
+        """Standard init method
+
+        Args:
+            writer: Writer of the archive
+            max_pending: Maximum number of rounds waiting to be written before write_round blocks
+            sync: Wait for every round to reach the disk
+        """
+        self.writer = writer
+        self.sync = sync
+        self.error = None
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            block = self.queue.get()
+            try:
+                if block is None:
+                    return
+                if self.error is None:
+                    self.writer.write_block(*block)
+                    self.writer.flush(self.sync)
+            except Exception as exception:
+                self.error = exception
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def write_round(self, time_step: int, actions: Any, reactions: Any, graph_data: Any, checkpoint: bool,
+                    extra: Dict[str, Any] = None) -> None:
+        """Queue the record of a round (same arguments as ArchiveWriter.write_round)
+
+        Returns:
+            None
+        """
+        self._raise_error()
+        self.queue.put(encode_round(time_step, actions, reactions, graph_data, checkpoint, extra))
+
+    def flush(self, sync: bool = False) -> None:
+        """Wait for the queued rounds to be written
+
+        Args:
+            sync: Also wait for the blocks to reach the disk
+
+        Returns:
+            None
+        """
+        self.queue.join()
+        self._raise_error()
+        self.writer.flush(sync)
+
+    def close(self, last_graph: Any = None) -> None:
+        """Write the queued rounds, then the index and the trailer
+
+        Args:
+            last_graph: Graph of the last round
+
+        Returns:
+            None
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self._raise_error()
+        self.writer.close(last_graph)
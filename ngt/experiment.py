@@ -0,0 +1,237 @@
+"""Module hosting the runner of Monte Carlo experiments, ie: many independent games
+
+A game factory builds a game (graph, rules, players) from a seed; each game is played in a worker process and
+only a compact summary of it (final graph statistics, utility trajectory of every player) is sent back to the
+parent. The random generators (random and NumPy) are seeded with the seed of the game before the factory is
+called, so a game is reproducible whatever the worker running it and whatever the number of workers.
+
+Example::
+
+    def make_game(seed):
+        game = Game(graph=nx.gnm_random_graph(20, 30, seed=seed), nb_players=3)
+        for _ in range(3):
+            game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        return game
+
+    experiment = Experiment(make_game, range(1000), nb_workers=8)
+    for summary in experiment.run():
+        ...
+    print(experiment.report())
+
+"""
+import random
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Callable, Iterable, Iterator
+
+import networkx as nx
+import numpy as np
+
+from ngt.game import Game
+from ngt.graph import as_networkx
+from ngt.parallel import get_pool, discard_pool
+
+GameSummary = namedtuple('GameSummary', ['seed', 'nb_time_steps', 'nb_nodes', 'nb_edges', 'density',
+                                         'average_clustering', 'utilities', 'duration'])
+GameSummary.__doc__ = """Statistics of a game played by an experiment (utilities: player id -> utility per round)"""
+
+
+def seed_generators(seed: int) -> None:
+    """Seed the random generators used by the games (random and NumPy)
+
+    Args:
+        seed: Seed
+
+    Returns:
+        None
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+
+
+def summarize_game(game: Game, seed: int, duration: float) -> GameSummary:
+    """Compact summary of a game which has been played
+
+    The utility trajectory of a player is its utility at the end of each round, for players associated to a node
+    of the graph.
+
+    Args:
+        game: Game
+        seed: Seed of the game
+        duration: Time taken to build and play the game, in seconds
+
+    Returns:
+        Summary of the game
+    """
+    graph = game.graph
+    nb_nodes, nb_edges = graph.number_of_nodes(), graph.number_of_edges()
+    density = 2 * nb_edges / (nb_nodes * (nb_nodes - 1)) if nb_nodes > 1 else 0.
+
+    utilities = {}
+    for player_id, player in game.players.items():
+        utilities[player_id] = [player.utility_function(game.history.graph(time_step), player_id)
+                                for time_step in game.history
+                                if player_id in game.history.graph(time_step)]
+
+    return GameSummary(seed, game.current_time_step, nb_nodes, nb_edges, density,
+                       nx.average_clustering(as_networkx(graph)), utilities, duration)
+
+
+def run_game(game_factory: Callable[[int], Game], seed: int,
+             summarize: Callable[[Game, int, float], Any] = summarize_game) -> Any:
+    """Build, play and summarize one game
+
+    Args:
+        game_factory: Function building a game from a seed
+        seed: Seed of the game
+        summarize: Function summarizing the game once played, from the game, its seed and its duration
+
+    Returns:
+        Summary of the game
+    """
+    seed_generators(seed)
+    start = time.perf_counter()
+    game = game_factory(seed)
+    game.play_game()
+    return summarize(game, seed, time.perf_counter() - start)
+
+
+class Experiment:
+    """Play independent games over a process pool and collect their summaries
+
+    A game raising an exception, or whose worker dies, is played again up to max_retries times before being
+    recorded as failed. The game factory and the summarize function are sent to the workers, so they have to be
+    picklable (eg: defined at the top level of a module) when nb_workers is greater than 1.
+    """
+    def __init__(self, game_factory: Callable[[int], Game], seeds: Iterable[int], nb_workers: int = 1,
+                 max_retries: int = 2, summarize: Callable[[Game, int, float], Any] = summarize_game):
+        """Standard init method
+
+        Args:
+            game_factory: Function building a game from a seed
+            seeds: Seeds of the games, one game per seed
+            nb_workers: Number of processes playing games (1 means the games are played in this process)
+            max_retries: Number of times a failed game is played again
+            summarize: Function summarizing a game once played, from the game, its seed and its duration
+        """
+        self.game_factory = game_factory
+        self.seeds = list(seeds)
+        self.nb_workers = nb_workers
+        self.max_retries = max_retries
+        self.summarize = summarize
+        self.summaries = {}  # type: Dict[int, Any]
+        self.failures = {}  # type: Dict[int, str]
+        self.attempts = {}  # type: Dict[int, int]
+        self.duration = 0.
+
+    def run(self) -> Iterator[Any]:
+        """Play the games, yielding their summaries as soon as they are available (not in seed order)
+
+        Summaries are also stored in summaries (seed -> summary) and errors of the failed games in failures.
+
+        Returns:
+            Iterator over the summaries
+        """
+        start = time.perf_counter()
+        try:
+            if self.nb_workers > 1:
+                yield from self._run_parallel()
+            else:
+                yield from self._run_serial()
+        finally:
+            self.duration += time.perf_counter() - start
+
+    def run_all(self) -> List[Any]:
+        """Play the games and wait for all of them
+
+        Returns:
+            Summaries, in seed order (failed games excepted)
+        """
+        for _ in self.run():
+            pass
+        return [self.summaries[seed] for seed in self.seeds if seed in self.summaries]
+
+    def _run_serial(self) -> Iterator[Any]:
+        for seed in self.seeds:
+            while True:
+                self.attempts[seed] = self.attempts.get(seed, 0) + 1
+                try:
+                    summary = run_game(self.game_factory, seed, self.summarize)
+                except Exception:
+                    if self._give_up(seed, traceback.format_exc()):
+                        break
+                else:
+                    self.summaries[seed] = summary
+                    yield summary
+                    break
+
+    def _run_parallel(self) -> Iterator[Any]:
+        pool = get_pool(self.nb_workers)
+        queued = list(reversed(self.seeds))
+        running = {}
+
+        # a few games per worker are submitted at a time, so that summaries stream back while the others run
+        while queued or running:
+            while queued and len(running) < 2 * self.nb_workers:
+                seed = queued.pop()
+                self.attempts[seed] = self.attempts.get(seed, 0) + 1
+                running[pool.submit(run_game, self.game_factory, seed, self.summarize)] = seed
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            lost = []
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # a worker died: the pool fails the games it had not finished, the finished ones are kept
+                wait(running)
+                done = list(running)
+            for future in done:
+                seed = running.pop(future)
+                try:
+                    summary = future.result()
+                except BrokenProcessPool:
+                    lost.append(seed)
+                except Exception:
+                    if not self._give_up(seed, traceback.format_exc()):
+                        queued.append(seed)
+                else:
+                    self.summaries[seed] = summary
+                    yield summary
+
+            if lost:
+                # the lost games are played again on a new pool
+                discard_pool(self.nb_workers)
+                pool = get_pool(self.nb_workers)
+                for seed in lost:
+                    if not self._give_up(seed, "Worker process terminated abruptly"):
+                        queued.append(seed)
+
+    def _give_up(self, seed: int, error: str) -> bool:
+        """Record the failure of a game, if it has been played too many times
+
+        Args:
+            seed: Seed of the game
+            error: Description of the error
+
+        Returns:
+            Boolean indicating the game will not be played again
+        """
+        if self.attempts[seed] > self.max_retries:
+            self.failures[seed] = error
+            return True
+        return False
+
+    @property
+    def games_per_second(self) -> float:
+        """Throughput of the experiment: games played (successfully) per second of run"""
+        return len(self.summaries) / self.duration if self.duration > 0 else 0.
+
+    def report(self) -> str:
+        """One line report of the experiment
+
+        Returns:
+            Number of games played and failed, duration and throughput
+        """
+        return (f'{len(self.summaries)} games played, {len(self.failures)} failed, '
+                f'{self.duration:.2f}s ({self.games_per_second:.2f} games/s, {self.nb_workers} workers)')
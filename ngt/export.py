@@ -0,0 +1,164 @@
+"""Module hosting the headless export of game replays to image sequences and animations
+
+Frames are drawn on Agg canvases (no display needed) by GraphRenderer, with the same colors for every frame and
+the same positions, or the positions of each round with layout='force'. The rounds are split in contiguous blocks
+rendered by worker processes, each one updating its artists from round to round, so the export time grows
+linearly with the number of rounds and shrinks with the number of workers.
+
+Example::
+
+    export_frames(game, 'frames', nb_workers=8)
+    export_animation(game, 'replay.gif', fps=10, nb_workers=8)
+
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Tuple, Any
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ngt.layout import Layout
+from ngt.parallel import get_pool, chunks
+from ngt.plot import FrameData, GraphRenderer, get_positions, get_colors
+
+
+def frame_file_name(folder: str, round_number: int, image_format: str = 'png') -> str:
+    """Path of the image of a round
+
+    Args:
+        folder: Folder of the frames
+        round_number: Time step of the round
+        image_format: Format of the images
+
+    Returns:
+        Path of the image
+    """
+    return os.path.join(folder, f'frame_{round_number:06d}.{image_format}')
+
+
+def render_rounds(game: Any, rounds: List[int], folder: str, positions: Any, colors: str,
+                  options: Dict[str, Any]) -> List[str]:
+    """Render consecutive rounds to image files (run in a worker process in parallel mode)
+
+    Args:
+        game: Game
+        rounds: Time steps of the rounds, in display order
+        folder: Folder of the frames
+        positions: Map from node to position, or Layout
+        colors: Color of each node, in node order
+        options: Export options (see export_frames)
+
+    Returns:
+        Paths of the images
+    """
+    figure = Figure(figsize=options['figsize'], dpi=options['dpi'])
+    FigureCanvasAgg(figure)
+    frames = FrameData(game, options['significant_digits'], options['leader_board_size'], options['node_list'])
+    renderer = GraphRenderer(figure.add_subplot(111), game, positions, colors, frames.labels, frames.sizes,
+                             frames.leader_boards if options['leader_board'] else None,
+                             options['node_transparency'], display_labels=options['display_labels'], blit=False)
+
+    file_names = []
+    for round_number in rounds:
+        renderer.render(round_number)
+        file_name = frame_file_name(folder, round_number, options['image_format'])
+        figure.savefig(file_name, format=options['image_format'])
+        file_names.append(file_name)
+    return file_names
+
+
+def export_frames(game: Any, folder: str, nb_workers: int = 1, positions: Any = None, layout: str = 'circle',
+                  colors: str = None, image_format: str = 'png', dpi: int = 100,
+                  figsize: Tuple[float, float] = (8, 8), node_transparency: float = 0.3, display_labels: bool = False,
+                  significant_digits: int = 4, leader_board: bool = False, leader_board_size: int = 3,
+                  node_list: List[int] = None) -> List[str]:
+    """Write one image per round of a game
+
+    Args:
+        game: Game
+        folder: Folder receiving the frames (created if needed)
+        nb_workers: Number of processes rendering frames (1 renders them in this process)
+        positions: Map from node to position, or Layout (see plot.get_positions by default)
+        layout: Layout used when no positions are given ('circle' or 'force')
+        colors: Color of each node, in node order (see plot.get_colors by default)
+        image_format: Format of the images (any format supported by the Agg canvas, eg: png, jpg)
+        dpi: Resolution of the images
+        figsize: Size of the images, in inches
+        node_transparency: Alpha of nodes and edges
+        display_labels: Display the labels of the nodes
+        significant_digits: Digits of the centralities displayed
+        leader_board: Display the leader board
+        leader_board_size: Number of nodes in the leader board
+        node_list: Nodes to label (every node if None)
+
+    Returns:
+        Paths of the images, in round order
+    """
+    os.makedirs(folder, exist_ok=True)
+    positions = positions or get_positions(game, layout)
+    colors = colors or get_colors(game)
+    options = {
+        'image_format': image_format,
+        'dpi': dpi,
+        'figsize': figsize,
+        'node_transparency': node_transparency,
+        'display_labels': display_labels,
+        'significant_digits': significant_digits,
+        'leader_board': leader_board,
+        'leader_board_size': leader_board_size,
+        'node_list': node_list,
+    }
+
+    rounds = sorted(game.history)
+    if nb_workers <= 1:
+        return render_rounds(game, rounds, folder, positions, colors, options)
+
+    # the layout of every round is computed once, here, rather than by every worker from the first round
+    if isinstance(positions, Layout):
+        positions.precompute(rounds)
+
+    # one contiguous block of rounds per worker, so that each one updates its artists from round to round
+    chunk_size = max(1, -(-len(rounds) // nb_workers))
+    futures = [get_pool(nb_workers).submit(render_rounds, game, block, folder, positions, colors, options)
+               for block in chunks(rounds, chunk_size)]
+    return [file_name for future in futures for file_name in future.result()]
+
+
+def export_animation(game: Any, file_name: str, fps: float = 10, nb_workers: int = 1, **kwargs) -> None:
+    """Write the replay of a game as an animation
+
+    GIF files are assembled with Pillow, other formats (eg: mp4) with ffmpeg, which must be installed.
+
+    Args:
+        game: Game
+        file_name: Path of the animation, its extension gives the format
+        fps: Frames (rounds) per second
+        nb_workers: Number of processes rendering frames
+        **kwargs: Options of export_frames
+
+    Returns:
+        None
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        if file_name.lower().endswith('.gif'):
+            from PIL import Image
+
+            file_names = export_frames(game, folder, nb_workers, image_format='png', **kwargs)
+            images = [Image.open(frame) for frame in file_names]
+            images[0].save(file_name, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+            for image in images:
+                image.close()
+        else:
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg is None:
+                raise Exception("ffmpeg is needed to export animations in formats other than GIF")
+            export_frames(game, folder, nb_workers, image_format='png', **kwargs)
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps),
+                            '-i', os.path.join(folder, 'frame_%06d.png'), '-pix_fmt', 'yuv420p', file_name],
+                           check=True)
+    finally:
+        shutil.rmtree(folder)
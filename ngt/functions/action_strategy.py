@@ -4,9 +4,18 @@ Methods related to the concept of player's policy
 import networkx as nx
 import random
 import itertools
-from typing import Tuple, Any
+import functools
+import heapq
+import numpy as np
+from typing import Dict, Tuple, List, Any, Callable
+from networkx import Graph
 from ngt.rules import Rules, ActionSpace
-from ngt.functions.utility import Utility
+from ngt import instrumentation
+from ngt.parallel import get_pool, chunks
+from ngt.functions.utility import Utility, exact_utility, centralities, unwrap_utility
+from ngt.functions.betweenness import DynamicBetweenness, shared_engine
+from ngt.functions.propagation import propagation_state, infection_pressure
+from ngt.functions.cascade import cascade_state
 
 from enum import Enum
 
@@ -15,13 +24,17 @@ from enum import Enum
 Agent's state = history
 """
 
+# margin of the bounds of branch and bound over the rounding errors of the scores
+bound_margin = 1e-9
 
-def inactive(rules: Rules, agent_state: Any, node_id: int = None) -> None:
+
+def inactive(rules: Rules, agent_state: Any, utility: Utility = None, node_id: int = None) -> None:
     """No action
 
     Args:
         rules: Rules of the game
         agent_state: Agent representation of the environment
+        utility: Utility function of the player (unused)
         node_id: Id associated to the player (needed when player is associated to a node in the graph)
 
     Returns:
@@ -30,12 +43,13 @@ def inactive(rules: Rules, agent_state: Any, node_id: int = None) -> None:
     return None
 
 
-def random_random(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
+def random_random(rules: Rules, agent_state: Any, utility: Utility = None, node_id: int = None) -> Any:
     """Randomly pick an action (beware name conflict with random package)
 
     Args:
         rules: Rules of the game
         agent_state: Agent representation of the environment
+        utility: Utility function of the player (unused)
         node_id: Id associated to the player (needed when player is associated to a node in the graph)
 
     Returns:
@@ -48,7 +62,7 @@ def random_random(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
         graph = agent_state[len(agent_state) - 1].graph
 
         # Get list of nodes and pick one randomly (exclude node associated to player first)
-        nodes = graph.nodes()
+        nodes = list(graph.nodes())
 
         if node_id is not None:
             nodes.remove(node_id)
@@ -62,12 +76,18 @@ def random_random(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
             return u, v
 
     elif rules.action_space is ActionSpace.node:
-        pass
+
+        # Immunize a random node
+        graph = agent_state[len(agent_state) - 1].graph
+        return random.choice(list(graph.nodes()))
+
     elif rules.action_space is ActionSpace.boolean:
-        pass
 
+        # Accept the policy or not, at random
+        return random.random() < 0.5
 
-def random_egoist(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
+
+def random_egoist(rules: Rules, agent_state: Any, utility: Utility = None, node_id: int = None) -> Any:
     """Randomly pick an action, with egoistic motivation (eg: edge creation with himself)
 
     It is assumed agents state is equal to the history, don't really know how to cleanly
@@ -77,6 +97,7 @@ def random_egoist(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
     Args:
         rules: Rules of the game
         agent_state: Agent representation of the environment
+        utility: Utility function of the player (unused)
         node_id: Id associated to the player (needed when player is associated to a node in the graph)
 
     Returns:
@@ -89,7 +110,7 @@ def random_egoist(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
         graph = agent_state[len(agent_state) - 1].graph
 
         # Get list of nodes and pick one randomly (exclude node associated to player first)
-        nodes = graph.nodes()
+        nodes = list(graph.nodes())
 
         if node_id is not None:
             nodes.remove(node_id)
@@ -99,12 +120,83 @@ def random_egoist(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
         return node_id, u
 
     elif rules.action_space is ActionSpace.node:
-        pass
+
+        # Immunize its own node
+        return node_id
+
     elif rules.action_space is ActionSpace.boolean:
-        pass
 
+        # Accept the policy, protecting itself
+        return True
 
-def follower(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
+
+def firefighter(rules: Rules, agent_state: Any, utility: Utility = None, node_id: int = None) -> Any:
+    """Immunize the susceptible node with the most infected neighbours, its own node first when it is threatened
+
+    Args:
+        rules: Rules of the game
+        agent_state: Agent representation of the environment
+        utility: Utility function of the player (unused)
+        node_id: Id associated to the player (needed when player is associated to a node in the graph)
+
+    Returns:
+        Node to immunize or None when no susceptible node has an infected neighbour
+    """
+
+    if rules.action_space is ActionSpace.node:
+
+        # Myopic, keep only last graph from history
+        graph = agent_state[len(agent_state) - 1].graph
+        infected, immune = propagation_state(graph)
+        pressure = infection_pressure(graph)
+        pressure[infected | immune] = 0
+
+        if node_id is not None and pressure[node_id] > 0:
+            return node_id
+        node = int(np.argmax(pressure))
+        return node if pressure[node] > 0 else None
+
+
+def prudent(rules: Rules, agent_state: Any, utility: Utility = None, node_id: int = None) -> Any:
+    """Accept the policy when the default of its largest solvent counterparty would make the player's bank default
+
+    Args:
+        rules: Rules of the game
+        agent_state: Agent representation of the environment
+        utility: Utility function of the player (unused)
+        node_id: Id associated to the player (needed when player is associated to a node in the graph)
+
+    Returns:
+        Boolean indicating the policy is accepted
+    """
+
+    if rules.action_space is ActionSpace.boolean:
+
+        # Myopic, keep only last graph from history
+        graph = agent_state[len(agent_state) - 1].graph
+        capital, exposures, defaulted = cascade_state(graph)
+        if defaulted[node_id]:
+            return False
+
+        row = exposures.getrow(node_id)
+        counterparty_defaulted = defaulted[row.indices]
+        largest = row.data[~counterparty_defaulted].max(initial=0.)
+        losses = row.data[counterparty_defaulted].sum()
+        return bool(rules.loss_given_default * (losses + largest) > capital[node_id])
+
+
+def follower(rules: Rules, agent_state: Any, utility: Utility, node_id: int = None) -> Any:
+    """Connect to the node with the highest utility the player is not yet connected to
+
+    Args:
+        rules: Rules of the game
+        agent_state: Agent representation of the environment
+        utility: Utility function used to rank the nodes
+        node_id: Id associated to the player (needed when player is associated to a node in the graph)
+
+    Returns:
+        Edge to create or None
+    """
 
     if rules.action_space is ActionSpace.edge:
 
@@ -112,11 +204,12 @@ def follower(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
         graph = agent_state[len(agent_state) - 1].graph
 
         # Find the best players and order them in decreasing order
-        inverse = [(value, key) for key, value in nx.betweenness_centrality(graph).items()]
-        sorted(inverse, reverse=True)
+        instrumentation.count('utility_calls', len(graph))
+        inverse = [(value, key) for key, value in centralities(utility, graph).items()]
+        inverse = sorted(inverse, reverse=True)
 
         for i in range(len(inverse)):
-            if not graph.has_edge(node_id, inverse[i][1]):
+            if inverse[i][1] != node_id and not graph.has_edge(node_id, inverse[i][1]):
                 return node_id, inverse[i][1]
 
         return None
@@ -127,7 +220,37 @@ def follower(rules: Rules, agent_state: Any, node_id: int = None) -> Any:
         pass
 
 
-def myopic_greedy(rules: Rules, agent_state: Any, utility: Utility, node_id: int = None) -> Any:
+def myopic_greedy(rules: Rules, agent_state: Any, utility: Utility, node_id: int = None,
+                  nb_workers: int = None, chunk_size: int = None, nb_exact_checks: int = None) -> Any:
+    """Toggle the edge maximizing the utility of the player in the last graph
+
+    Candidates are scored serially, or by a pool of processes when more than one worker is requested. Both
+    modes pick the same edge: the first one, in the order of itertools.combinations, reaching the best utility.
+
+    When the utility is an approximation (eg: Utility.approximate_betweenness_centrality), the best candidates
+    are scored again with the exact utility and the move is chosen among them.
+
+    With Utility.betweenness_centrality, serial evaluation and rules.branch_and_bound, candidates are scored in
+    decreasing order of an upper bound of their utility, and the ones whose bound can't beat the best utility
+    found are skipped (see _best_toggle_pruned), the move being the same.
+
+    Memoized utilities (ngt.functions.utility_cache.CachedUtility) score every toggled graph through their cache,
+    the exact checks of an approximate utility included, except the exact betweenness which is scored by a
+    DynamicBetweenness engine.
+
+    Args:
+        rules: Rules of the game
+        agent_state: Agent representation of the environment
+        utility: Utility function of the player
+        node_id: Id associated to the player (needed when player is associated to a node in the graph)
+        nb_workers: Number of processes scoring the candidates (defaults to rules.nb_workers)
+        chunk_size: Number of candidates per task sent to a process (defaults to rules.chunk_size)
+        nb_exact_checks: Number of best candidates scored again when the utility is approximate (defaults to
+            rules.nb_exact_checks, 0 accepts the approximate winner)
+
+    Returns:
+        Edge to toggle or None
+    """
 
     if rules.action_space is ActionSpace.edge:
 
@@ -135,38 +258,60 @@ def myopic_greedy(rules: Rules, agent_state: Any, utility: Utility, node_id: int
         graph = agent_state[len(agent_state) - 1].graph
 
         # if graph is empty, return random egoist
-        if len(graph.edges()) == 0:
-            return random_egoist(rules, agent_state, node_id)
+        if graph.number_of_edges() == 0:
+            return random_egoist(rules, agent_state, utility, node_id)
 
-        # initialize the best current action
-        best_u, best_v, best_bet = 0, 0, utility(graph, node_id)
+        nb_workers = rules.nb_workers if nb_workers is None else nb_workers
+        chunk_size = rules.chunk_size if chunk_size is None else chunk_size
+        nb_exact_checks = rules.nb_exact_checks if nb_exact_checks is None else nb_exact_checks
+        exact = exact_utility(utility)
 
-        # create the list of possible edges
-        edges_combination = list(itertools.combinations(range(len(graph.nodes())), r=2))
+        # possible edges, compiled once by the rules
+        edges_combination = rules.candidate_edges(len(graph.nodes()))
 
-        # iterate through all possible action and keep track of the best choice
-        for i, j in edges_combination:
-            if (i, j) in rules.impossible_actions or (j, i) in rules.impossible_actions:
-                continue
+        if nb_workers is not None and nb_workers > 1 and not chunk_size:
+            chunk_size = max(1, -(-len(edges_combination) // (4 * nb_workers)))
+
+        pruned = (rules.branch_and_bound and (nb_workers is None or nb_workers <= 1)
+                  and unwrap_utility(utility) is Utility.betweenness_centrality)
 
-            if graph.has_edge(i, j) or graph.has_edge(j, i):
-                graph.remove_edge(i, j)
+        # the candidates and utilities counted are the ones actually scored, by this process or by the workers
+        if pruned:
+            engine = shared_engine(graph)
+            instrumentation.count('utility_calls')
+            best = _best_toggle_pruned(engine, node_id, edges_combination, (engine.score(node_id), 0, 0))
 
-                new_bet = utility(graph, node_id)
+        elif exact is not None and nb_exact_checks > 0:
+            # keep the best approximate candidates and let the exact utility decide between them
+            top = _top_toggles(graph, utility, node_id, edges_combination, nb_exact_checks, nb_workers, chunk_size)
 
-                if new_bet > best_bet:
-                    best_u, best_v, best_bet = i, j, new_bet
+            instrumentation.count('utility_calls', len(top) + 1)
+            best = exact(graph, node_id), 0, 0
+            for _, _, i, j in sorted(top, key=lambda candidate: -candidate[1]):
+                new_bet = _toggled_utility(graph, exact, i, j, node_id)
+                if new_bet > best[0]:
+                    best = new_bet, i, j
 
-                graph.add_edge(i, j)
+        else:
+            # initialize the best current action
+            current_bet, toggled_utility = _toggle_evaluator(graph, utility, node_id)
+            best = current_bet, 0, 0
 
+            # iterate through all possible action and keep track of the best choice
+            if nb_workers is None or nb_workers <= 1:
+                best = _best_toggle(toggled_utility, edges_combination, best)
             else:
-                graph.add_edge(i, j)
+                score_chunk = functools.partial(_best_toggle_in_chunk, graph, utility, node_id, current_bet)
+                candidate_chunks = list(chunks(edges_combination, chunk_size))
 
-                new_bet = utility(graph, node_id)
-                if new_bet > best_bet:
-                    best_u, best_v, best_bet = i, j, new_bet
+                # chunks are reduced in order and only replaced by a strictly better one, like in the serial loop
+                for candidates, chunk_best in zip(candidate_chunks, get_pool(nb_workers).map(score_chunk,
+                                                                                            candidate_chunks)):
+                    _count_evaluations(len(candidates))
+                    if chunk_best[0] > best[0]:
+                        best = chunk_best
 
-                graph.remove_edge(i, j)
+        _, best_u, best_v = best
 
         if best_u == best_v:
             return None
@@ -179,8 +324,324 @@ def myopic_greedy(rules: Rules, agent_state: Any, utility: Utility, node_id: int
         pass
 
 
+def batched_myopic_greedy(rules: Rules, agent_state: Any, node_ids: List[int], nb_workers: int = None,
+                          chunk_size: int = None) -> Dict[int, Any]:
+    """Moves of several myopic_greedy players using Utility.betweenness_centrality, evaluated together
+
+    Every candidate toggle is scored once for all the players (the affected sources are repaired once, then the
+    betweenness of each player's node is read off), so k players cost about as much as one. Each player gets the
+    move myopic_greedy would have chosen, ties included.
+
+    With serial evaluation and rules.branch_and_bound, only the candidates whose bound can beat the best
+    betweenness of some player are scored (see _best_toggles_pruned).
+
+    Args:
+        rules: Rules of the game
+        agent_state: Agent representation of the environment shared by the players (history)
+        node_ids: Ids associated to the players
+        nb_workers: Number of processes scoring the candidates (defaults to rules.nb_workers)
+        chunk_size: Number of candidates per task sent to a process (defaults to rules.chunk_size)
+
+    Returns:
+        Map from node id to edge to toggle or None
+    """
+    graph = agent_state[len(agent_state) - 1].graph
+
+    if graph.number_of_edges() == 0:
+        return {node_id: random_egoist(rules, agent_state, Utility.betweenness_centrality, node_id)
+                for node_id in node_ids}
+
+    nb_workers = rules.nb_workers if nb_workers is None else nb_workers
+    chunk_size = rules.chunk_size if chunk_size is None else chunk_size
+
+    edges_combination = rules.candidate_edges(len(graph.nodes()))
+
+    engine = shared_engine(graph)
+    bests = [(engine.score(node_id), 0, 0) for node_id in node_ids]
+    instrumentation.count('utility_calls', len(node_ids))
+
+    if (nb_workers is None or nb_workers <= 1) and rules.branch_and_bound:
+        bests = _best_toggles_pruned(engine, node_ids, edges_combination, bests)
+    elif nb_workers is None or nb_workers <= 1:
+        bests = _best_toggles(engine, node_ids, edges_combination, bests)
+    else:
+        if not chunk_size:
+            chunk_size = max(1, -(-len(edges_combination) // (4 * nb_workers)))
+        score_chunk = functools.partial(_best_toggles_in_chunk, graph, node_ids, [best[0] for best in bests])
+        candidate_chunks = list(chunks(edges_combination, chunk_size))
+
+        # chunks are reduced in order and only replaced by a strictly better one, like in myopic_greedy
+        for candidates, chunk_bests in zip(candidate_chunks, get_pool(nb_workers).map(score_chunk, candidate_chunks)):
+            _count_evaluations(len(candidates), len(node_ids))
+            bests = [chunk_best if chunk_best[0] > best[0] else best for best, chunk_best in zip(bests, chunk_bests)]
+
+    return {node_id: None if best_u == best_v else (best_u, best_v)
+            for node_id, (_, best_u, best_v) in zip(node_ids, bests)}
+
+
+def _best_toggles(engine: DynamicBetweenness, node_ids: List[int], candidates: List[Tuple[int, int]],
+                  bests: List[Tuple[float, int, int]]) -> List[Tuple[float, int, int]]:
+    """Keep track, for each node, of the first candidate strictly improving on its best betweenness
+
+    Args:
+        engine: Betweenness engine of the graph of the round
+        node_ids: Nodes of the players
+        candidates: Edges to try, in order
+        bests: Betweenness to beat and the associated edge, for each node
+
+    Returns:
+        Best betweenness and the associated edge, for each node
+    """
+    bests = list(bests)
+    for i, j in candidates:
+        for k, new_bet in enumerate(engine.toggle_scores(i, j, node_ids)):
+            if new_bet > bests[k][0]:
+                bests[k] = new_bet, i, j
+    _count_evaluations(len(candidates), len(node_ids))
+    return bests
+
+
+def _best_toggles_in_chunk(graph: Graph, node_ids: List[int], current_bets: List[float],
+                           candidates: List[Tuple[int, int]]) -> List[Tuple[float, int, int]]:
+    """Score a chunk of candidates for several nodes in a worker process
+
+    Args:
+        graph: Graph of the round
+        node_ids: Nodes of the players
+        current_bets: Betweenness of each node before any toggle
+        candidates: Edges to try, in order
+
+    Returns:
+        Best betweenness of the chunk and the associated edge, for each node
+    """
+    return _best_toggles(shared_engine(graph), node_ids, candidates, [(bet, 0, 0) for bet in current_bets])
+
+
+def _top_toggles(graph: Graph, utility: Utility, node_id: int, candidates: List[Tuple[int, int]], nb_top: int,
+                 nb_workers: int, chunk_size: int) -> List[Tuple[float, int, int, int]]:
+    """Best candidates, ties broken by candidate order
+
+    Args:
+        graph: Graph of the round
+        utility: Utility function of the player
+        node_id: Id associated to the player
+        candidates: Edges to try, in order
+        nb_top: Number of candidates to keep
+        nb_workers: Number of processes scoring the candidates
+        chunk_size: Number of candidates per task sent to a process
+
+    Returns:
+        List of (utility, minus rank of the candidate, i, j), best first
+    """
+    ranked_candidates = [(-rank, i, j) for rank, (i, j) in enumerate(candidates)]
+
+    if nb_workers is None or nb_workers <= 1:
+        return _top_toggles_in_chunk(graph, utility, node_id, nb_top, ranked_candidates)
+
+    score_chunk = functools.partial(_top_toggles_in_chunk, graph, utility, node_id, nb_top)
+    candidate_chunks = list(chunks(ranked_candidates, chunk_size))
+    chunks_top = list(get_pool(nb_workers).map(score_chunk, candidate_chunks))
+    _count_evaluations(len(ranked_candidates))
+    return heapq.nlargest(nb_top, itertools.chain.from_iterable(chunks_top))
+
+
+def _top_toggles_in_chunk(graph: Graph, utility: Utility, node_id: int, nb_top: int,
+                          ranked_candidates: List[Tuple[int, int, int]]) -> List[Tuple[float, int, int, int]]:
+    """Score a chunk of ranked candidates and keep the best ones (run in a worker process in parallel mode)
+
+    Args:
+        graph: Graph of the round
+        utility: Utility function of the player
+        node_id: Id associated to the player
+        nb_top: Number of candidates to keep
+        ranked_candidates: Edges to try as (minus rank, i, j)
+
+    Returns:
+        List of (utility, minus rank of the candidate, i, j), best first
+    """
+    _, toggled_utility = _toggle_evaluator(graph, utility, node_id)
+    scored = ((toggled_utility(i, j), minus_rank, i, j) for minus_rank, i, j in ranked_candidates)
+    top = heapq.nlargest(nb_top, scored)
+    _count_evaluations(len(ranked_candidates))
+    return top
+
+
+def _toggle_evaluator(graph: Graph, utility: Utility, node_id: int) -> Tuple[float, Callable[[int, int], float]]:
+    """Utility of a node in the graph and function scoring the toggle of an edge
+
+    Args:
+        graph: Graph of the round
+        utility: Utility function of the player
+        node_id: Id associated to the player
+
+    Returns:
+        Current utility and function giving the utility once an edge (i, j) is toggled
+    """
+    instrumentation.count('utility_calls')
+    if unwrap_utility(utility) is Utility.betweenness_centrality:
+        # only the sources affected by a toggle are recomputed
+        engine = shared_engine(graph)
+
+        def toggled_utility(i, j):
+            return engine.toggle_score(i, j, node_id)
+
+        return engine.score(node_id), toggled_utility
+
+    def toggled_utility(i, j):
+        return _toggled_utility(graph, utility, i, j, node_id)
+
+    return utility(graph, node_id), toggled_utility
+
+
+def _best_toggle(toggled_utility: Callable[[int, int], float], candidates: List[Tuple[int, int]],
+                 best: Tuple[float, int, int]) -> Tuple[float, int, int]:
+    """Keep track of the first candidate strictly improving on the best utility
+
+    Args:
+        toggled_utility: Function giving the utility once an edge is toggled
+        candidates: Edges to try, in order
+        best: Utility to beat and the associated edge
+
+    Returns:
+        Best utility and the associated edge
+    """
+    best_bet, best_u, best_v = best
+    for i, j in candidates:
+        new_bet = toggled_utility(i, j)
+        if new_bet > best_bet:
+            best_u, best_v, best_bet = i, j, new_bet
+    _count_evaluations(len(candidates))
+    return best_bet, best_u, best_v
+
+
+def _best_toggle_pruned(engine: DynamicBetweenness, node_id: int, candidates: List[Tuple[int, int]],
+                        best: Tuple[float, int, int]) -> Tuple[float, int, int]:
+    """Same result as _best_toggle with the betweenness, scoring only the candidates whose bound can beat the best
+
+    Candidates are scored in decreasing order of their bound (DynamicBetweenness.toggle_bound), keeping the
+    first one in candidate order among the best, as _best_toggle does. Once the bound of the next candidate is
+    below the best betweenness (by more than the rounding errors of the scores), no remaining candidate can
+    be chosen. Candidates whose bound is exactly the betweenness computed are skipped unless they beat the best.
+
+    Args:
+        engine: Betweenness engine of the graph of the round
+        node_id: Node of the player
+        candidates: Edges to try, in order
+        best: Betweenness to beat and the associated edge
+
+    Returns:
+        Best betweenness and the associated edge
+    """
+    return _best_toggles_pruned(engine, [node_id], candidates, [best])[0]
+
+
+def _best_toggles_pruned(engine: DynamicBetweenness, node_ids: List[int], candidates: List[Tuple[int, int]],
+                         bests: List[Tuple[float, int, int]]) -> List[Tuple[float, int, int]]:
+    """Same result as _best_toggles, pruning the candidates of each node as _best_toggle_pruned does
+
+    Nodes are searched one after the other, and a candidate is scored for every node the first time the search
+    of one of them reaches it, so only the candidates surviving for some node are scored, once.
+
+    Args:
+        engine: Betweenness engine of the graph of the round
+        node_ids: Nodes of the players
+        candidates: Edges to try, in order
+        bests: Betweenness to beat and the associated edge, for each node
+
+    Returns:
+        Best betweenness and the associated edge, for each node
+    """
+    scores = {}  # type: Dict[int, List[float]]
+    results = []
+    for k, (node_id, best) in enumerate(zip(node_ids, bests)):
+        bounds = [engine.toggle_bound(i, j, node_id) for i, j in candidates]
+        order = sorted(range(len(candidates)), key=lambda rank: -bounds[rank][0])
+
+        best_bet, best_rank = best[0], -1
+        for rank in order:
+            bound, exact = bounds[rank]
+            if bound < best_bet - bound_margin:
+                break
+            if exact and bound <= best_bet:
+                continue
+            if rank not in scores:
+                scores[rank] = engine.toggle_scores(*candidates[rank], node_ids)
+            new_bet = scores[rank][k]
+            # the best candidate found so far is only replaced by a better one or by an equal one coming first
+            if new_bet > best_bet or (new_bet == best_bet and 0 <= rank < best_rank):
+                best_bet, best_rank = new_bet, rank
+
+        results.append(best if best_rank < 0 else (best_bet,) + candidates[best_rank])
+
+    _count_evaluations(len(scores), len(node_ids))
+    instrumentation.count('candidates_pruned', len(candidates) - len(scores))
+    return results
+
+
+def _count_evaluations(nb_candidates: int, nb_nodes: int = 1) -> None:
+    """Count candidates scored in this process (nothing is counted in worker processes, without instrumentation)
+
+    Args:
+        nb_candidates: Number of candidates scored
+        nb_nodes: Number of players each candidate is scored for
+
+    Returns:
+        None
+    """
+    instrumentation.count('candidates_evaluated', nb_candidates)
+    instrumentation.count('utility_calls', nb_candidates * nb_nodes)
+
+
+def _best_toggle_in_chunk(graph: Graph, utility: Utility, node_id: int, current_bet: float,
+                          candidates: List[Tuple[int, int]]) -> Tuple[float, int, int]:
+    """Score a chunk of candidates in a worker process (the graph is the worker's private copy)
+
+    Args:
+        graph: Graph of the round
+        utility: Utility function of the player
+        node_id: Id associated to the player
+        current_bet: Utility of the player before any toggle
+        candidates: Edges to try, in order
+
+    Returns:
+        Best utility of the chunk and the associated edge
+    """
+    _, toggled_utility = _toggle_evaluator(graph, utility, node_id)
+    return _best_toggle(toggled_utility, candidates, (current_bet, 0, 0))
+
+
+def _toggled_utility(graph: Graph, utility: Utility, i: int, j: int, node_id: int) -> float:
+    """Utility of a node once the edge (i, j) is toggled, the graph is restored afterwards
+
+    Args:
+        graph: Graph of the round
+        utility: Utility function of the player
+        i: First end of the edge
+        j: Second end of the edge
+        node_id: Id associated to the player
+
+    Returns:
+        Utility of the node in the graph where the edge (i, j) has been added or removed
+    """
+    if graph.has_edge(i, j):
+        graph.remove_edge(i, j)
+        try:
+            return utility(graph, node_id)
+        finally:
+            graph.add_edge(i, j)
+    else:
+        graph.add_edge(i, j)
+        try:
+            return utility(graph, node_id)
+        finally:
+            graph.remove_edge(i, j)
+
+
 class ActionStrategy(Enum):
     inactive = inactive
     random_random = random_random
     random_egoist = random_egoist
+    follower = follower
+    firefighter = firefighter
+    prudent = prudent
     myopic_greedy = myopic_greedy
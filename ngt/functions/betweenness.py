@@ -0,0 +1,492 @@
+"""
+Methods related to the computation of betweenness centrality (Brandes algorithm and its dynamic variant)
+"""
+import math
+import random
+from collections import deque
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+from networkx import Graph
+
+from ngt.graph import adjacency_lists
+
+Distances = Dict[int, int]
+Sigmas = Dict[int, float]
+Dependencies = Dict[int, float]
+Edge = Tuple[int, int]
+
+
+def single_source_shortest_paths(graph: Graph, source: int, toggled: Edge = None) \
+        -> Tuple[List[int], Dict[int, List[int]], Sigmas, Distances]:
+    """Breadth first search from a source counting the shortest paths (first phase of Brandes algorithm)
+
+    Args:
+        graph: Unweighted graph
+        source: Node the search starts from
+        toggled: Edge considered as removed if it belongs to the graph, as added otherwise. The graph itself
+            is not modified.
+
+    Returns:
+        Nodes in non-decreasing distance order, predecessors on shortest paths, number of shortest paths
+        and distance of every node reachable from the source
+    """
+    stack = []
+    predecessors = {source: []}
+    sigma = {source: 1.0}
+    distance = {source: 0}
+    queue = deque([source])
+    adjacency = adjacency_lists(graph)
+
+    if toggled is not None:
+        a, b = toggled
+        if graph.has_edge(a, b):
+            toggled_neighbours = {a: [w for w in graph[a] if w != b], b: [w for w in graph[b] if w != a]}
+        else:
+            toggled_neighbours = {a: list(graph[a]) + [b], b: list(graph[b]) + [a]}
+    else:
+        toggled_neighbours = {}
+
+    while queue:
+        v = queue.popleft()
+        stack.append(v)
+        distance_v = distance[v]
+        sigma_v = sigma[v]
+        for w in toggled_neighbours[v] if v in toggled_neighbours else adjacency[v]:
+            if w not in distance:
+                queue.append(w)
+                distance[w] = distance_v + 1
+                sigma[w] = 0.0
+                predecessors[w] = []
+            if distance[w] == distance_v + 1:
+                sigma[w] += sigma_v
+                predecessors[w].append(v)
+
+    return stack, predecessors, sigma, distance
+
+
+def accumulate_dependencies(stack: List[int], predecessors: Dict[int, List[int]], sigma: Sigmas,
+                            source: int) -> Dependencies:
+    """Back-propagate the dependencies of the source on every node (second phase of Brandes algorithm)
+
+    Args:
+        stack: Nodes in non-decreasing distance order from the source
+        predecessors: Predecessors of each node on the shortest paths from the source
+        sigma: Number of shortest paths from the source to each node
+        source: Source of the search
+
+    Returns:
+        Dependency of the source on every reachable node except itself
+    """
+    delta = dict.fromkeys(stack, 0.0)
+
+    while stack:
+        w = stack.pop()
+        coefficient = (1.0 + delta[w]) / sigma[w]
+        for v in predecessors[w]:
+            delta[v] += sigma[v] * coefficient
+
+    del delta[source]
+    return delta
+
+
+def accumulate_node_dependency(stack: List[int], predecessors: Dict[int, List[int]], sigma: Sigmas,
+                               distance: Distances, node_id: int) -> float:
+    """Back-propagate the dependencies of the source on a single node
+
+    Only the nodes farther from the source than the target node can contribute to its dependency, so the
+    back-propagation stops as soon as the level of the target is reached.
+
+    Args:
+        stack: Nodes in non-decreasing distance order from the source
+        predecessors: Predecessors of each node on the shortest paths from the source
+        sigma: Number of shortest paths from the source to each node
+        distance: Distance from the source to each node
+        node_id: Node whose dependency is computed
+
+    Returns:
+        Dependency of the source on the node
+    """
+    level = distance.get(node_id)
+    if level is None:
+        return 0.0
+
+    delta = {}
+    while stack:
+        w = stack.pop()
+        if distance[w] <= level:
+            break
+        coefficient = (1.0 + delta.get(w, 0.0)) / sigma[w]
+        for v in predecessors[w]:
+            delta[v] = delta.get(v, 0.0) + sigma[v] * coefficient
+
+    return delta.get(node_id, 0.0)
+
+
+def node_betweenness(graph: Graph, node_id: int) -> float:
+    """Betweenness centrality of a single node, without computing the centrality of the other nodes
+
+    Only the sources of the connected component of the node are explored: the shortest paths starting from
+    any other source never reach it. A node with less than two neighbours lies on no shortest path.
+
+    Args:
+        graph: Unweighted graph
+        node_id: Node whose betweenness is computed
+
+    Returns:
+        Normalized betweenness centrality (same value as networkx betweenness_centrality)
+    """
+    if len(graph[node_id]) < 2:
+        return 0.0
+
+    _, _, _, component = single_source_shortest_paths(graph, node_id)
+
+    total = 0.0
+    for source in graph:
+        if source == node_id or source not in component:
+            continue
+        stack, predecessors, sigma, distance = single_source_shortest_paths(graph, source)
+        total += accumulate_node_dependency(stack, predecessors, sigma, distance, node_id)
+
+    return total * rescale_factor(len(graph))
+
+
+def sample_size(nb_nodes: int, epsilon: float, delta: float) -> int:
+    """Number of pivots guaranteeing an additive error below epsilon with probability at least 1 - delta
+
+    Each pivot gives an estimate of the normalized betweenness lying in [0, n / (n - 1)], the size follows from
+    Hoeffding's inequality.
+
+    Args:
+        nb_nodes: Number of nodes in the graph
+        epsilon: Maximum additive error on the normalized betweenness
+        delta: Probability that the error exceeds epsilon
+
+    Returns:
+        Number of pivots to sample
+    """
+    value_range = nb_nodes / (nb_nodes - 1) if nb_nodes > 1 else 1.0
+    return int(math.ceil(value_range ** 2 * math.log(2.0 / delta) / (2.0 * epsilon ** 2)))
+
+
+def sample_pivots(graph: Graph, nb_samples: int, seed: int) -> List[int]:
+    """Sources drawn uniformly without replacement, reproducible given the seed
+
+    Args:
+        graph: Graph whose nodes are sampled
+        nb_samples: Number of pivots
+        seed: Seed of the random generator
+
+    Returns:
+        Sampled sources
+    """
+    return random.Random(seed).sample(list(graph), nb_samples)
+
+
+def approximate_node_betweenness(graph: Graph, node_id: int, nb_samples: int, seed: int = 0) -> float:
+    """Estimate the betweenness centrality of a node from the dependencies of sampled sources (pivots)
+
+    The estimate is unbiased. Falls back to the exact value when there are at least as many samples as nodes.
+
+    Args:
+        graph: Unweighted graph
+        node_id: Node whose betweenness is estimated
+        nb_samples: Number of pivots
+        seed: Seed of the random generator drawing the pivots
+
+    Returns:
+        Estimated normalized betweenness centrality
+    """
+    nb_nodes = len(graph)
+    if nb_samples >= nb_nodes:
+        return node_betweenness(graph, node_id)
+    if len(graph[node_id]) < 2:
+        return 0.0
+
+    _, _, _, component = single_source_shortest_paths(graph, node_id)
+
+    total = 0.0
+    for source in sample_pivots(graph, nb_samples, seed):
+        if source == node_id or source not in component:
+            continue
+        stack, predecessors, sigma, distance = single_source_shortest_paths(graph, source)
+        total += accumulate_node_dependency(stack, predecessors, sigma, distance, node_id)
+
+    return total * nb_nodes / nb_samples * rescale_factor(nb_nodes)
+
+
+def approximate_betweenness(graph: Graph, nb_samples: int, seed: int = 0) -> Dict[int, float]:
+    """Estimate the betweenness centrality of every node from the dependencies of sampled sources (pivots)
+
+    Args:
+        graph: Unweighted graph
+        nb_samples: Number of pivots
+        seed: Seed of the random generator drawing the pivots
+
+    Returns:
+        Estimated normalized betweenness centrality of every node
+    """
+    nb_nodes = len(graph)
+    if nb_samples >= nb_nodes:
+        return betweenness(graph)
+    return _sum_dependencies(graph, sample_pivots(graph, nb_samples, seed),
+                             nb_nodes / nb_samples * rescale_factor(nb_nodes))
+
+
+def betweenness(graph: Graph) -> Dict[int, float]:
+    """Betweenness centrality of every node (same values as networkx betweenness_centrality)
+
+    Unlike the networkx function, it runs on any graph exposing iteration over nodes and neighbours (eg: CSRGraph).
+
+    Args:
+        graph: Unweighted graph
+
+    Returns:
+        Normalized betweenness centrality of every node
+    """
+    return _sum_dependencies(graph, list(graph), rescale_factor(len(graph)))
+
+
+def _sum_dependencies(graph: Graph, sources: List[int], scale: float) -> Dict[int, float]:
+    centrality = dict.fromkeys(graph, 0.0)
+    for source in sources:
+        stack, predecessors, sigma, _ = single_source_shortest_paths(graph, source)
+        for node, dependency in accumulate_dependencies(stack, predecessors, sigma, source).items():
+            centrality[node] += dependency
+
+    return {node: value * scale for node, value in centrality.items()}
+
+
+def rescale_factor(nb_nodes: int) -> float:
+    """Normalization factor of the betweenness of an undirected graph (same convention as networkx)
+
+    Args:
+        nb_nodes: Number of nodes in the graph
+
+    Returns:
+        Factor to apply to the sum of the dependencies
+    """
+    if nb_nodes <= 2:
+        return 1.0
+    return 1.0 / ((nb_nodes - 1) * (nb_nodes - 2))
+
+
+class DynamicBetweenness:
+    """Betweenness centrality of a graph, maintained under single edge toggles
+
+    The engine keeps, for every source, the distances (which encode the shortest-path DAG: the predecessors
+    of a node are its neighbours one level closer to the source), the number of shortest paths and the
+    dependencies of the source on every node. Toggling an edge (u, v) only modifies the DAG of the sources
+    for which u and v are not at the same distance, so only those sources are recomputed when scoring a
+    candidate toggle.
+
+    Candidate toggles are never applied to the graph, which must not be modified while the engine is in use.
+    """
+    def __init__(self, graph: Graph):
+        """Standard init method
+
+        Args:
+            graph: Graph of the current round
+        """
+        self.graph = graph
+        self.sources = list(self.graph.nodes())
+        self.scale = rescale_factor(len(self.sources))
+        self.distances = {}
+        self.sigmas = {}
+        self.dependencies = {}
+        self._matrix = None
+
+        for source in self.sources:
+            self.distances[source], self.sigmas[source], self.dependencies[source] = self._single_source(source)
+
+    def _single_source(self, source: int, toggled: Edge = None) -> Tuple[Distances, Sigmas, Dependencies]:
+        stack, predecessors, sigma, distance = single_source_shortest_paths(self.graph, source, toggled)
+        dependencies = accumulate_dependencies(stack, predecessors, sigma, source)
+        return distance, sigma, dependencies
+
+    def affected_sources(self, u: int, v: int) -> List[int]:
+        """Sources whose shortest-path DAG changes when the edge (u, v) is toggled
+
+        Args:
+            u: First end of the edge
+            v: Second end of the edge
+
+        Returns:
+            List of the affected sources
+        """
+        affected = []
+        if self.graph.has_edge(u, v):
+            # deletion: the edge matters only if it lies on the DAG, ie its ends are on consecutive levels
+            for source in self.sources:
+                distance = self.distances[source]
+                if u in distance and abs(distance[u] - distance[v]) == 1:
+                    affected.append(source)
+        else:
+            # insertion: the edge creates shorter or additional paths unless its ends are on the same level
+            for source in self.sources:
+                distance = self.distances[source]
+                if distance.get(u) != distance.get(v):
+                    affected.append(source)
+        return affected
+
+    def score(self, node_id: int) -> float:
+        """Betweenness centrality of a node in the graph of the round
+
+        Args:
+            node_id: Node whose betweenness is computed
+
+        Returns:
+            Normalized betweenness centrality
+        """
+        return self._sum(node_id, self.dependencies)
+
+    def scores(self) -> Dict[int, float]:
+        """Betweenness centrality of every node in the graph of the round
+
+        Returns:
+            Map from node to its normalized betweenness centrality
+        """
+        return {node_id: self._sum(node_id, self.dependencies) for node_id in self.sources}
+
+    def toggle_score(self, u: int, v: int, node_id: int) -> float:
+        """Betweenness centrality of a node once the edge (u, v) is toggled
+
+        Args:
+            u: First end of the edge
+            v: Second end of the edge
+            node_id: Node whose betweenness is computed
+
+        Returns:
+            Normalized betweenness centrality in the graph where the edge (u, v) has been added or removed
+        """
+        return self._sum(node_id, self.repair(u, v))
+
+    def toggle_scores(self, u: int, v: int, nodes: List[int]) -> List[float]:
+        """Betweenness centrality of several nodes once the edge (u, v) is toggled, repairing the sources once
+
+        Args:
+            u: First end of the edge
+            v: Second end of the edge
+            nodes: Nodes whose betweenness is computed
+
+        Returns:
+            Normalized betweenness centrality of each node (equal to toggle_score for that node)
+        """
+        dependencies = self.repair(u, v)
+        return [self._sum(node_id, dependencies) for node_id in nodes]
+
+    def distance_matrix(self) -> Tuple[Dict[int, int], np.ndarray]:
+        """Distances between every pair of nodes as an array (built on first use)
+
+        Returns:
+            Map from node to its row/column and array of distances (inf between different components)
+        """
+        if self._matrix is None:
+            rows = {node: row for row, node in enumerate(self.sources)}
+            matrix = np.full((len(self.sources), len(self.sources)), np.inf)
+            for source, distance in self.distances.items():
+                matrix[rows[source], [rows[node] for node in distance]] = list(distance.values())
+            self._matrix = rows, matrix
+        return self._matrix
+
+    def toggle_bound(self, u: int, v: int, node_id: int) -> Tuple[float, bool]:
+        """Upper bound of the betweenness centrality of a node once the edge (u, v) is toggled, without toggling it
+
+        A toggle far from the node can't change its betweenness (exactly the current value is computed), and a
+        node left with less than two neighbours has none (exactly 0 is computed). Otherwise, only the pairs
+        (s, t), s being an affected source, whose shortest paths change can increase the dependency of s on the
+        node, each one by at most 1. For an insertion, it needs the node to be on one of the new shortest paths,
+        which go through the new edge.
+
+        Args:
+            u: First end of the edge
+            v: Second end of the edge
+            node_id: Node whose betweenness is bounded
+
+        Returns:
+            Upper bound and boolean indicating the bound is exactly the value toggle_score computes
+        """
+        rows, matrix = self.distance_matrix()
+        x, u, v = rows[node_id], rows[u], rows[v]
+        exists = self.graph.has_edge(self.sources[u], self.sources[v])
+
+        degree = self.graph.degree(node_id) + ((-1 if exists else 1) if x in (u, v) else 0)
+        if degree < 2:
+            return 0.0, True
+        if not np.isfinite(matrix[x, u]) and not np.isfinite(matrix[x, v]):
+            return self.score(node_id), True
+
+        distance_u, distance_v = matrix[:, u], matrix[:, v]
+        u_nearer = (distance_u < distance_v)[:, None]
+        near_distance = np.minimum(distance_u, distance_v)
+        # distances from the end of the edge farthest from each source
+        far = np.where(u_nearer, matrix[v][None, :], matrix[u][None, :])
+        through_edge = near_distance[:, None] + 1 + far
+        # the ends of an existing edge are at most one level apart
+        affected = (distance_u != distance_v) & np.isfinite(near_distance)
+        if exists:
+            changed = (through_edge == matrix) & np.isfinite(far)
+        else:
+            changed = (through_edge <= matrix) & np.isfinite(far)
+            # the node is on a new shortest path from s to t if it is between s and the nearest end, or between
+            # the farthest end and t
+            near_x = np.where(u_nearer[:, 0], matrix[x, u], matrix[x, v])
+            far_x = np.where(u_nearer[:, 0], matrix[v, x], matrix[u, x])
+            before_edge = matrix[:, x] + near_x == near_distance
+            after_edge = far_x[:, None] + matrix[x][None, :] == far
+            changed &= before_edge[:, None] | after_edge
+
+        changed &= affected[:, None]
+        changed[x, :] = False
+        changed[:, x] = False
+        np.fill_diagonal(changed, False)
+        return self.score(node_id) + self.scale * np.count_nonzero(changed), False
+
+    def repair(self, u: int, v: int) -> Dict[int, Dependencies]:
+        """Dependencies of every source once the edge (u, v) is toggled, recomputing only the affected sources
+
+        Args:
+            u: First end of the edge
+            v: Second end of the edge
+
+        Returns:
+            Map from source to its dependencies in the toggled graph
+        """
+        affected = self.affected_sources(u, v)
+        if not affected:
+            return self.dependencies
+
+        dependencies = dict(self.dependencies)
+        for source in affected:
+            dependencies[source] = self._single_source(source, (u, v))[2]
+
+        return dependencies
+
+    def _sum(self, node_id: int, dependencies: Dict[int, Dependencies]) -> float:
+        # sum in the order of the sources so that every candidate is scored the same way
+        total = 0.0
+        for source in self.sources:
+            total += dependencies[source].get(node_id, 0.0)
+        return total * self.scale
+
+
+# adjacency lists of the graph of the last shared engine, and the engine
+_shared_engine = [None, None]  # type: List[Any]
+
+
+def shared_engine(graph: Graph) -> DynamicBetweenness:
+    """Engine of a graph, reused by the strategies and metrics of the process working on the same graph
+
+    The engine is built on a copy of the graph, and reused only for graphs whose adjacency lists are identical
+    (same neighbours in the same order), so that scores are computed exactly as by a new engine.
+
+    Args:
+        graph: Graph of the round
+
+    Returns:
+        Betweenness engine of the graph (must not be modified)
+    """
+    adjacency = [list(graph.neighbors(node)) for node in graph.nodes()]
+    if _shared_engine[1] is None or _shared_engine[0] != adjacency:
+        _shared_engine[:] = adjacency, DynamicBetweenness(graph.copy())
+    return _shared_engine[1]
@@ -0,0 +1,128 @@
+"""
+Default cascades on the graph of a game (action space: booleans, policy acceptance game)
+
+Nodes are banks. Their balance sheets are kept with the graph: graph.graph['capital'] (array indexed by node),
+graph.graph['exposures'] (sparse matrix, entry (i, j) being what bank i loses when bank j defaults, before the
+loss given default) and graph.graph['defaulted'] (boolean array). Like every graph attribute they are replaced,
+never modified in place, so the history records the state of every round. Without balance sheets, every bank has
+a capital of 1 and an exposure of 1 to each of its neighbours.
+
+A round raises the capital of the banks accepting the policy by rules.policy_capital, defaults every solvent bank
+with probability rules.shock_probability (external shocks), then propagates the defaults: a bank whose losses on
+its defaulted counterparties exceed its capital defaults in turn, until no bank does. Each step of the cascade
+is one sparse matrix-vector product with the exposures of the banks that just defaulted, so cascades on
+interbank networks of thousands of banks with dense exposures take milliseconds.
+
+Example::
+
+    set_balance_sheets(graph, capital, exposures)
+    game = Game(graph=graph, action_space=ActionSpace.boolean, shock_probability=0.01)
+"""
+from typing import Tuple, Any
+
+import numpy as np
+from networkx import Graph
+from ngt.rules import Rules
+from ngt.functions.propagation import adjacency_matrix, keep_edge_structure
+
+
+def set_balance_sheets(graph: Graph, capital: Any, exposures: Any = None) -> None:
+    """Set the capital and the exposures of the banks (no bank has defaulted)
+
+    Args:
+        graph: Graph whose nodes are the banks, numbered from 0
+        capital: Capital of each bank
+        exposures: Matrix (dense or scipy.sparse) of the exposure of each bank to each other bank (unit exposures
+            along the edges of the graph if None)
+
+    Returns:
+        None
+    """
+    import scipy.sparse
+
+    keep_edge_structure(graph)
+    graph.graph['capital'] = np.array(capital, dtype=float)
+    graph.graph['exposures'] = adjacency_matrix(graph) if exposures is None else scipy.sparse.csr_matrix(exposures)
+    graph.graph['defaulted'] = np.zeros(graph.number_of_nodes(), dtype=bool)
+
+
+def cascade_state(graph: Graph) -> Tuple[np.ndarray, Any, np.ndarray]:
+    """Balance sheets of the banks
+
+    Args:
+        graph: Graph of a round
+
+    Returns:
+        Capital, exposures (scipy.sparse matrix) and defaulted banks
+    """
+    nb_nodes = graph.number_of_nodes()
+    capital = graph.graph.get('capital', np.ones(nb_nodes))
+    exposures = graph.graph.get('exposures')
+    if exposures is None:
+        exposures = adjacency_matrix(graph)
+    defaulted = graph.graph.get('defaulted', np.zeros(nb_nodes, dtype=bool))
+    return capital, exposures, defaulted
+
+
+def losses(graph: Graph, loss_given_default: float) -> np.ndarray:
+    """Losses of every bank on its defaulted counterparties
+
+    Args:
+        graph: Graph of a round
+        loss_given_default: Share of an exposure lost when the counterparty defaults
+
+    Returns:
+        Array indexed by node
+    """
+    _, exposures, defaulted = cascade_state(graph)
+    return loss_given_default * exposures.dot(defaulted.astype(float))
+
+
+def default_cascade(exposures: Any, capital: np.ndarray, defaulted: np.ndarray,
+                    loss_given_default: float) -> Tuple[np.ndarray, int]:
+    """Propagate defaults until no bank defaults anymore
+
+    Defaults only add losses, so the cascade reaches its fixed point after at most one step per bank.
+
+    Args:
+        exposures: Sparse matrix of the exposure of each bank to each other bank
+        capital: Capital of each bank
+        defaulted: Banks that have defaulted
+        loss_given_default: Share of an exposure lost when the counterparty defaults
+
+    Returns:
+        Defaulted banks at the fixed point and number of steps of the cascade
+    """
+    defaulted = defaulted.copy()
+    bank_losses = loss_given_default * exposures.dot(defaulted.astype(float))
+    new_defaults = ~defaulted & (bank_losses > capital)
+    nb_steps = 0
+    while new_defaults.any():
+        nb_steps += 1
+        defaulted |= new_defaults
+        # only the exposures to the banks that just defaulted add losses
+        bank_losses += loss_given_default * exposures.dot(new_defaults.astype(float))
+        new_defaults = ~defaulted & (bank_losses > capital)
+    return defaulted, nb_steps
+
+
+def play_cascade(rules: Rules, graph: Graph, accepting: np.ndarray, random_state: np.random.RandomState) -> None:
+    """Play a round: capital raised by the banks accepting the policy, external shocks, then the cascade
+
+    Args:
+        rules: Rules of the game (policy_capital, shock_probability, loss_given_default)
+        graph: Graph, its state is replaced
+        accepting: Boolean array of the banks accepting the policy
+        random_state: Random generator of the round
+
+    Returns:
+        None
+    """
+    keep_edge_structure(graph)
+    capital, exposures, defaulted = cascade_state(graph)
+    if accepting.any():
+        capital = capital + rules.policy_capital * accepting
+        graph.graph['capital'] = capital
+    shocked = random_state.random_sample(len(defaulted)) < rules.shock_probability
+    defaulted, _ = default_cascade(exposures, capital, defaulted | shocked, rules.loss_given_default)
+    graph.graph['defaulted'] = defaulted
@@ -0,0 +1,63 @@
+"""
+Methods computing metrics of a graph, macro (one value per graph) or micro (one value per node)
+"""
+from enum import Enum
+
+import networkx as nx
+import numpy as np
+from networkx import Graph
+
+from ngt.graph import as_networkx
+from ngt.functions.betweenness import betweenness
+
+
+"""
+Macro metrics: graph -> float
+"""
+
+
+def average_clustering(graph: Graph) -> float:
+    return nx.average_clustering(as_networkx(graph)) if len(graph) else 0.
+
+
+def density(graph: Graph) -> float:
+    nb_nodes = graph.number_of_nodes()
+    return 2 * graph.number_of_edges() / (nb_nodes * (nb_nodes - 1)) if nb_nodes > 1 else 0.
+
+
+def nb_components(graph: Graph) -> float:
+    return nx.number_connected_components(as_networkx(graph))
+
+
+"""
+Micro metrics: graph -> array of the values of the nodes, in sorted node order
+"""
+
+
+def betweenness_centrality(graph: Graph) -> np.ndarray:
+    scores = betweenness(graph)
+    return np.array([scores[node] for node in sorted(graph.nodes())], dtype=float)
+
+
+def degree(graph: Graph) -> np.ndarray:
+    return np.array([graph.degree(node) for node in sorted(graph.nodes())], dtype=float)
+
+
+class MacroMetric(Enum):
+    average_clustering = "macro_average_clustering"
+    density = "macro_density"
+    nb_components = "macro_nb_components"
+
+
+class MicroMetric(Enum):
+    betweenness_centrality = "micro_betweenness_centrality"
+    degree = "micro_degree"
+
+
+metrics_functions = {
+    MacroMetric.average_clustering: average_clustering,
+    MacroMetric.density: density,
+    MacroMetric.nb_components: nb_components,
+    MicroMetric.betweenness_centrality: betweenness_centrality,
+    MicroMetric.degree: degree,
+}
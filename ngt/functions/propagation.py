@@ -0,0 +1,184 @@
+"""
+Virus propagation on the graph of a game (action space: nodes)
+
+The state of the epidemic is kept with the graph, as boolean arrays indexed by node: graph.graph['infected'] and
+graph.graph['immune']. Like every graph attribute they are replaced, never modified in place, so the history
+records the state of every round.
+
+A round immunizes the nodes chosen by the players (an infected node is cured), then every infected node infects
+each of its susceptible neighbours with probability rules.infection_probability and recovers, becoming immune,
+with probability rules.recovery_probability. The number of infected neighbours of every node is one sparse
+matrix-vector product with the adjacency matrix. The matrix is built once per game: it is cached for the
+EdgeStructure token kept in graph.graph['edge_structure'], which the copies of the graph share (eg: the graphs
+rebuilt by the history).
+
+Example::
+
+    infect(graph, [0, 17])
+    game = Game(graph=graph, action_space=ActionSpace.node, infection_probability=0.2)
+"""
+import weakref
+from typing import List, Tuple, Any
+
+import numpy as np
+from networkx import Graph
+from ngt.rules import Rules
+
+# adjacency matrix of the edge structures (or graphs without one) used recently, with the number of nodes (and the
+# edges, for graphs) when it was built
+_adjacency_matrices = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+class EdgeStructure:
+    """Token standing for the edges of a graph, kept in graph.graph['edge_structure']
+
+    Graph attributes are shared by the copies of a graph, so the adjacency matrix cached for the token serves them
+    all. Functions changing the edges of a graph must drop its token, as update_environment_edge does.
+    """
+
+
+def keep_edge_structure(graph: Graph) -> None:
+    """Give a graph an EdgeStructure token, if it has none
+
+    Args:
+        graph: Graph whose edges won't change (eg: graph of a game on nodes)
+
+    Returns:
+        None
+    """
+    if 'edge_structure' not in graph.graph:
+        graph.graph['edge_structure'] = EdgeStructure()
+
+
+def adjacency_matrix(graph: Graph) -> Any:
+    """Sparse adjacency matrix of a graph whose nodes are numbered from 0
+
+    The matrix is kept for the EdgeStructure token of the graph (rebuilt if the number of nodes changes), or for the
+    graph itself without token (rebuilt unless the nodes and the edges, listed in the same order, are the same).
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        scipy.sparse CSR matrix
+    """
+    nb_nodes = graph.number_of_nodes()
+    token = graph.graph.get('edge_structure')
+    if token is not None:
+        cached = _adjacency_matrices.get(token)
+        if cached is None or cached[0] != nb_nodes:
+            cached = nb_nodes, None, _build_adjacency_matrix(_edge_array(graph), nb_nodes)
+            _adjacency_matrices[token] = cached
+        return cached[2]
+
+    # without token, the edges are compared with the ones of the matrix, the number of edges could be the same
+    edges = _edge_array(graph)
+    cached = _adjacency_matrices.get(graph)
+    if cached is None or cached[0] != nb_nodes or not np.array_equal(cached[1], edges):
+        cached = nb_nodes, edges, _build_adjacency_matrix(edges, nb_nodes)
+        _adjacency_matrices[graph] = cached
+    return cached[2]
+
+
+def _edge_array(graph: Graph) -> np.ndarray:
+    """Edges of a graph as an array
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        Array of shape (number of edges, 2), in the order of graph.edges()
+    """
+    return np.array(list(graph.edges()), dtype=np.int64).reshape(-1, 2)
+
+
+def _build_adjacency_matrix(edges: np.ndarray, nb_nodes: int) -> Any:
+    """Sparse adjacency matrix of edges between nodes numbered from 0
+
+    Args:
+        edges: Array of shape (number of edges, 2)
+        nb_nodes: Number of nodes
+
+    Returns:
+        scipy.sparse CSR matrix
+    """
+    # scipy is only needed by the games played on nodes and booleans
+    import scipy.sparse
+
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    columns = np.concatenate([edges[:, 1], edges[:, 0]])
+    return scipy.sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(nb_nodes, nb_nodes))
+
+
+def propagation_state(graph: Graph) -> Tuple[np.ndarray, np.ndarray]:
+    """Infected and immune nodes
+
+    Args:
+        graph: Graph of a round
+
+    Returns:
+        Boolean arrays indexed by node: infected nodes and immune nodes (no node before the first infection)
+    """
+    nb_nodes = graph.number_of_nodes()
+    infected = graph.graph.get('infected', np.zeros(nb_nodes, dtype=bool))
+    immune = graph.graph.get('immune', np.zeros(nb_nodes, dtype=bool))
+    return infected, immune
+
+
+def infect(graph: Graph, nodes: List[int]) -> None:
+    """Infect nodes (eg: patients zero, before the game starts)
+
+    Args:
+        graph: Graph
+        nodes: Nodes infected
+
+    Returns:
+        None
+    """
+    keep_edge_structure(graph)
+    infected, immune = propagation_state(graph)
+    infected = infected.copy()
+    infected[list(nodes)] = True
+    graph.graph['infected'] = infected
+    graph.graph['immune'] = immune & ~infected
+
+
+def infection_pressure(graph: Graph) -> np.ndarray:
+    """Number of infected neighbours of every node
+
+    Args:
+        graph: Graph of a round
+
+    Returns:
+        Array indexed by node
+    """
+    infected, _ = propagation_state(graph)
+    return adjacency_matrix(graph).dot(infected.astype(float))
+
+
+def spread(rules: Rules, graph: Graph, immunized: List[int], random_state: np.random.RandomState) -> None:
+    """Play the propagation of a round: immunization of the nodes chosen, infections, then recoveries
+
+    Args:
+        rules: Rules of the game (infection_probability, recovery_probability)
+        graph: Graph, its state is replaced
+        immunized: Nodes chosen by the players
+        random_state: Random generator of the round
+
+    Returns:
+        None
+    """
+    keep_edge_structure(graph)
+    infected, immune = propagation_state(graph)
+    immune = immune.copy()
+    immune[list(immunized)] = True
+    infected = infected & ~immune
+
+    # a susceptible node with k infected neighbours escapes each of them with probability 1 - p
+    pressure = adjacency_matrix(graph).dot(infected.astype(float))
+    probability = 1 - (1 - rules.infection_probability) ** pressure
+    draws = random_state.random_sample(len(infected))
+    newly_infected = ~infected & ~immune & (draws < probability)
+
+    recovered = infected & (random_state.random_sample(len(infected)) < rules.recovery_probability)
+    graph.graph['infected'] = (infected & ~recovered) | newly_infected
+    graph.graph['immune'] = immune | recovered
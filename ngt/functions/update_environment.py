@@ -1,4 +1,9 @@
+import random
+
+import numpy as np
 from ngt.rules import ActionSpace, Rules
+from ngt.functions.propagation import spread
+from ngt.functions.cascade import play_cascade
 
 from typing import Dict, Tuple, Any
 from networkx import Graph
@@ -11,6 +16,10 @@ update_environment_functions = {}
 
 def update_environment_edge(rules: Rules, graph: Graph, final_actions: Actions) -> None:
 
+    # the adjacency matrix cached for the edges of the graph no longer applies
+    if final_actions:
+        graph.graph.pop('edge_structure', None)
+
     for edge in final_actions.values():
         u, v = edge
         if not graph.has_edge(*edge):
@@ -20,3 +29,31 @@ def update_environment_edge(rules: Rules, graph: Graph, final_actions: Actions)
     return None
 
 update_environment_functions[ActionSpace.edge] = update_environment_edge
+
+
+def update_environment_node(rules: Rules, graph: Graph, final_actions: Actions) -> None:
+    """Immunize the nodes chosen by the players and let the virus spread (see ngt.functions.propagation)
+
+    The random generator of the round is seeded from the random module, so seeding random reproduces the game.
+    """
+    random_state = np.random.RandomState(random.getrandbits(32))
+    spread(rules, graph, list(final_actions.values()), random_state)
+    return None
+
+update_environment_functions[ActionSpace.node] = update_environment_node
+
+
+def update_environment_boolean(rules: Rules, graph: Graph, final_actions: Actions) -> None:
+    """Raise the capital of the banks accepting the policy, then shock the banks and propagate the defaults (see
+    ngt.functions.cascade)
+
+    The players are the banks of their node id. The random generator of the round is seeded from the random module,
+    so seeding random reproduces the game.
+    """
+    accepting = np.zeros(graph.number_of_nodes(), dtype=bool)
+    accepting[[node for node, accepted in final_actions.items() if accepted]] = True
+    random_state = np.random.RandomState(random.getrandbits(32))
+    play_cascade(rules, graph, accepting, random_state)
+    return None
+
+update_environment_functions[ActionSpace.boolean] = update_environment_boolean
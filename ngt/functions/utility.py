@@ -3,8 +3,11 @@ Methods related to the concept of player's utility
 """
 from enum import Enum
 import networkx as nx
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Callable, Any
 from networkx import Graph
+from ngt.functions.betweenness import node_betweenness, approximate_node_betweenness, approximate_betweenness
+from ngt.functions.betweenness import sample_size, betweenness
+from ngt.graph import as_networkx
 
 """
 Utility based on micro measures
@@ -12,7 +15,38 @@ Utility based on micro measures
 
 
 def betweenness_centrality(graph: Graph, node_id: int) -> float:
-    return nx.betweenness_centrality(graph)[node_id]
+    return node_betweenness(graph, node_id)
+
+
+def approximate_betweenness_centrality(graph: Graph, node_id: int, epsilon: float = 0.1, delta: float = 0.1,
+                                       nb_samples: int = None, seed: int = 0) -> float:
+    """Betweenness centrality estimated from sampled source pivots
+
+    With the default arguments, the error is below epsilon with probability 1 - delta. The pivots only depend on
+    the seed (and the nodes of the graph), so two candidate graphs of a round are compared on the same pivots and
+    strategies are reproducible. Use functools.partial to change the arguments.
+
+    Args:
+        graph: Graph
+        node_id: Node whose betweenness is estimated
+        epsilon: Maximum additive error
+        delta: Probability that the error exceeds epsilon
+        nb_samples: Number of pivots, overrides epsilon and delta
+        seed: Seed of the random generator drawing the pivots
+
+    Returns:
+        Estimated betweenness centrality
+    """
+    if nb_samples is None:
+        nb_samples = sample_size(len(graph), epsilon, delta)
+    return approximate_node_betweenness(graph, node_id, nb_samples, seed)
+
+
+def _approximate_betweenness_centralities(graph: Graph, epsilon: float = 0.1, delta: float = 0.1,
+                                          nb_samples: int = None, seed: int = 0) -> Dict[int, float]:
+    if nb_samples is None:
+        nb_samples = sample_size(len(graph), epsilon, delta)
+    return approximate_betweenness(graph, nb_samples, seed)
 
 
 """
@@ -21,9 +55,78 @@ Utility based on macro measures
 
 
 def average_clustering(graph: Graph) -> float:
-    return nx.average_clustering(graph)
+    return nx.average_clustering(as_networkx(graph))
 
 
 class Utility(Enum):
     betweenness_centrality = betweenness_centrality
+    approximate_betweenness_centrality = approximate_betweenness_centrality
     average_clustering = average_clustering
+
+
+"""
+Exact counterpart of the approximate utilities, used by strategies to double check their best candidates
+"""
+
+exact_utilities = {
+    approximate_betweenness_centrality: betweenness_centrality,
+}
+
+"""
+Utility of every node at once, for the micro utilities that have a faster way than scoring each node separately
+"""
+
+centralities_functions = {
+    betweenness_centrality: betweenness,
+    approximate_betweenness_centrality: _approximate_betweenness_centralities,
+}
+
+
+def unwrap_utility(utility: Callable[..., float]) -> Callable[..., float]:
+    """Strip the wrappers leaving the values of a utility unchanged (eg: ngt.functions.utility_cache.CachedUtility)
+
+    Args:
+        utility: Utility function
+
+    Returns:
+        Underlying utility function (possibly wrapped by functools.partial)
+    """
+    while hasattr(utility, '__wrapped__'):
+        utility = utility.__wrapped__
+    return utility
+
+
+def exact_utility(utility: Callable[..., float]) -> Any:
+    """Fetch the exact counterpart of an approximate utility (possibly wrapped by functools.partial)
+
+    Args:
+        utility: Utility function
+
+    Returns:
+        Exact utility function or None if the utility is not an approximation
+    """
+    unwrapped = unwrap_utility(utility)
+    exact = exact_utilities.get(getattr(unwrapped, 'func', unwrapped))
+    if exact is not None and hasattr(utility, 'memoize'):
+        # memoized utility, the exact one shares its cache
+        return utility.memoize(exact)
+    return exact
+
+
+def centralities(utility: Callable[..., float], graph: Graph) -> Dict[int, float]:
+    """Utility of every node of the graph
+
+    Args:
+        utility: Micro utility function (possibly wrapped by functools.partial)
+        graph: Graph
+
+    Returns:
+        Map from node to its utility
+    """
+    if hasattr(utility, 'centralities'):
+        # memoized utility
+        return utility.centralities(graph)
+    function = centralities_functions.get(getattr(utility, 'func', utility))
+    if function is None:
+        return {node: utility(graph, node) for node in graph}
+    return function(graph, **getattr(utility, 'keywords', {}))
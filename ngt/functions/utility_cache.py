@@ -0,0 +1,262 @@
+"""
+Memoization of utility functions, keyed by the content of the graph
+
+The same graphs come up again and again (an edge toggled back, identical starting graphs across the games of an
+experiment, centralities scored by several players), so utilities are cached under a canonical fingerprint of the
+graph (its nodes, edges and graph attributes, whatever the representation and the insertion order) plus the
+arguments of the call. The cache has an in-memory LRU tier and an optional on-disk tier (SQLite file) shared by
+every process using the same path.
+
+Strategies call the cached utility like any other, except myopic_greedy with the exact betweenness: it scores the
+toggles with a DynamicBetweenness engine, faster than fingerprinting every toggled graph, and bypasses the cache.
+
+Example::
+
+    cache = UtilityCache(path='utilities.sqlite')
+    player = Player(utility_function=Utility.betweenness_centrality, utility_cache=cache)
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Tuple
+
+import numpy as np
+from networkx import Graph
+from ngt.history import edge_set
+from ngt.functions.utility import centralities
+
+
+def attribute_bytes(value: Any) -> bytes:
+    """Bytes identifying the content of a graph attribute
+
+    Args:
+        value: Graph attribute (NumPy array, scipy.sparse matrix or any picklable object)
+
+    Returns:
+        Bytes, equal for attributes with the same content
+    """
+    if isinstance(value, np.ndarray):
+        return repr((value.dtype.str, value.shape)).encode() + np.ascontiguousarray(value).tobytes()
+    if hasattr(value, 'tocsr'):
+        # sparse matrices in canonical form: sorted indices, no duplicates
+        matrix = value.tocsr(copy=True)
+        matrix.sum_duplicates()
+        return b''.join(attribute_bytes(array) for array in (np.array(matrix.shape), matrix.indptr, matrix.indices,
+                                                             matrix.data))
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def graph_fingerprint(graph: Graph) -> bytes:
+    """Canonical digest of a graph: its nodes, its edges and its graph attributes (eg: the state of a propagation)
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        Digest, equal for graphs with the same nodes, edges and graph attributes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(sorted(graph.nodes())).encode())
+    digest.update(repr(sorted(edge_set(graph))).encode())
+    for key, value in sorted(graph.graph.items(), key=lambda item: repr(item[0])):
+        digest.update(repr(key).encode())
+        digest.update(attribute_bytes(value))
+    return digest.digest()
+
+
+def utility_name(utility: Callable[..., Any]) -> str:
+    """Name identifying a utility function, including the arguments bound with functools.partial
+
+    Args:
+        utility: Utility function
+
+    Returns:
+        Name of the utility
+    """
+    arguments = ''
+    if isinstance(utility, functools.partial):
+        arguments = repr((utility.args, sorted(utility.keywords.items())))
+        utility = utility.func
+    return f'{utility.__module__}.{utility.__qualname__}{arguments}'
+
+
+class UtilityCache:
+    """Two tier cache of utility values: in-memory LRU, then optional SQLite file shared across processes
+
+    The on-disk tier holds at most max_disk_size entries, the oldest ones being evicted first.
+    """
+    def __init__(self, max_size: int = 4096, path: str = None, max_disk_size: int = 1000000):
+        """Standard init method
+
+        Args:
+            max_size: Maximum number of values kept in memory
+            path: Path of the SQLite file of the on-disk tier (no on-disk tier if None)
+            max_disk_size: Maximum number of values kept on disk
+        """
+        self.max_size = max_size
+        self.path = path
+        self.max_disk_size = max_disk_size
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # type: Dict[Tuple[str, bytes, Any], Any]
+        self._connection = None
+        self._connection_pid = None
+        self._nb_puts = 0
+
+    def _database(self) -> sqlite3.Connection:
+        # connections can't be shared with forked processes, each process opens its own
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS utilities '
+                                     '(key BLOB PRIMARY KEY, value BLOB, created REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS utilities_created ON utilities (created)')
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def _disk_key(key: Tuple[str, bytes, Any]) -> bytes:
+        name, fingerprint, arguments = key
+        return hashlib.blake2b(repr((name, fingerprint, arguments)).encode(), digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes, Any]) -> Tuple[bool, Any]:
+        """Look a value up, in memory then on disk
+
+        Args:
+            key: Utility name, graph fingerprint and arguments of the call
+
+        Returns:
+            Boolean indicating the value was found and the value
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return True, self._memory[key]
+
+        if self.path is not None:
+            row = self._database().execute('SELECT value FROM utilities WHERE key = ?',
+                                           (self._disk_key(key),)).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._remember(key, value)
+                self.disk_hits += 1
+                return True, value
+
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Tuple[str, bytes, Any], value: Any) -> None:
+        """Store a value in both tiers
+
+        Args:
+            key: Utility name, graph fingerprint and arguments of the call
+            value: Value of the utility
+
+        Returns:
+            None
+        """
+        self._remember(key, value)
+        if self.path is not None:
+            database = self._database()
+            database.execute('INSERT OR REPLACE INTO utilities VALUES (?, ?, ?)',
+                             (self._disk_key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time()))
+            self._nb_puts += 1
+            # the size is checked every few writes, evicting a tenth of the entries at once
+            if self._nb_puts % 256 == 0:
+                nb_entries = database.execute('SELECT COUNT(*) FROM utilities').fetchone()[0]
+                if nb_entries > self.max_disk_size:
+                    nb_evicted = nb_entries - int(0.9 * self.max_disk_size)
+                    database.execute('DELETE FROM utilities WHERE key IN '
+                                     '(SELECT key FROM utilities ORDER BY created LIMIT ?)', (nb_evicted,))
+
+    def _remember(self, key: Tuple[str, bytes, Any], value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Empty both tiers and reset the counters
+
+        Returns:
+            None
+        """
+        self._memory.clear()
+        if self.path is not None:
+            self._database().execute('DELETE FROM utilities')
+        self.hits = self.disk_hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups answered by one of the tiers"""
+        nb_lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / nb_lookups if nb_lookups else 0.
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # sent to worker processes without its memory tier and counters, the on-disk tier is reopened there
+        state = self.__dict__.copy()
+        state['hits'] = state['disk_hits'] = state['misses'] = 0
+        state['_memory'] = OrderedDict()
+        state['_connection'] = None
+        state['_connection_pid'] = None
+        return state
+
+
+class CachedUtility:
+    """Utility function memoized by a UtilityCache, called exactly like the wrapped utility
+
+    The wrapped utility is available as __wrapped__, strategies use it to recognize the utility.
+    """
+    def __init__(self, utility: Callable[..., Any], cache: UtilityCache):
+        """Standard init method
+
+        Args:
+            utility: Utility function to memoize
+            cache: Cache holding the values
+        """
+        self.__wrapped__ = utility
+        self.cache = cache
+        self.name = utility_name(utility)
+
+    def __call__(self, graph: Graph, *args) -> Any:
+        key = self.name, graph_fingerprint(graph), args
+        found, value = self.cache.get(key)
+        if not found:
+            value = self.__wrapped__(graph, *args)
+            self.cache.put(key, value)
+        return value
+
+    def centralities(self, graph: Graph) -> Dict[int, float]:
+        """Utility of every node of the graph (see ngt.functions.utility.centralities)
+
+        Args:
+            graph: Graph
+
+        Returns:
+            Map from node to its utility
+        """
+        key = self.name, graph_fingerprint(graph), 'centralities'
+        found, value = self.cache.get(key)
+        if not found:
+            value = centralities(self.__wrapped__, graph)
+            self.cache.put(key, value)
+        return value
+
+    def memoize(self, utility: Callable[..., Any]) -> 'CachedUtility':
+        """Memoize another utility with the same cache (eg: the exact counterpart of an approximate utility)
+
+        Args:
+            utility: Utility function
+
+        Returns:
+            Memoized utility
+        """
+        return CachedUtility(utility, self.cache)
+
+    def __repr__(self) -> str:
+        return f'CachedUtility({self.name})'
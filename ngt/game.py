@@ -8,18 +8,97 @@ Todo:
    http://google.github.io/styleguide/pyguide.html
 """
 
+import pickle
+import random
+import uuid
+from collections import OrderedDict, namedtuple
+
 import networkx as nx
 
 from ngt.rules import ActionSpace, Rules
 from ngt.increment import Increment
-from ngt.utils import fetch_adequate_function, check_action_type, save_object, load_object, make_sure_path_exists
+from ngt.history import History
+from ngt.archive import ArchiveReader, ArchiveWriter, ArchiveRounds, BackgroundArchiveWriter, is_archive
+from ngt.graph import GraphBackend, CSRGraph, convert_graph
+from ngt.parallel import get_pool
+from ngt.instrumentation import null_instrumentation
+from ngt.metrics import Metrics
+from ngt.utils import fetch_adequate_function, check_action_type, load_object
 from ngt.utils import get_players_id, get_increments_id
 from ngt.functions.update_environment import update_environment_functions
+from ngt.functions.action_strategy import ActionStrategy, batched_myopic_greedy
+from ngt.functions.state_representation import StateRepresentation
+from ngt.functions.utility import Utility, unwrap_utility
 
-from typing import Dict, Any
-from ngt.player import Player
+from typing import Dict, List, Tuple, Any, Callable
+from ngt.player import Player, EntityType
 Actions = Dict[int, Any]
 Reactions = Dict[int, bool]
+Edge = Tuple[int, int]
+
+
+# histories of the games followed by the worker processes, by game token, so that each round only the rounds a
+# worker misses are sent to it
+_worker_histories = OrderedDict()  # type: Dict[str, History]
+max_worker_histories = 4
+
+MissingRounds = namedtuple('MissingRounds', ['nb_rounds'])
+MissingRounds.__doc__ = """Answer of a worker missing rounds older than the ones sent (nb_rounds: rounds it has)"""
+
+
+def _call_seeded(seed: int, function: Callable, *args) -> Any:
+    """Call a function with the random generator seeded, restoring the state of the generator afterwards
+
+    Args:
+        seed: Seed of the random generator during the call
+        function: Function to call
+        *args: Arguments of the function
+
+    Returns:
+        Result of the function
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        return function(*args)
+    finally:
+        random.setstate(state)
+
+
+def _compute_in_worker(method: str, player: Player, token: str, start: int, snapshot: bytes, seed: int, args: Tuple,
+                       player_id: int) -> Any:
+    """Compute the action (or reaction) of a player in a worker process
+
+    Args:
+        method: Name of the player method to call (compute_action or compute_reaction)
+        player: Player
+        token: Token of the game
+        start: Time step of the first round sent
+        snapshot: Pickled rules of the game and encoded rounds from start on
+        seed: Seed of the random generator for this player and round
+        args: Arguments of the method between the rules and the history
+        player_id: Id of the player
+
+    Returns:
+        Action (or reaction) of the player, or MissingRounds when the worker misses rounds before start
+    """
+    history = _worker_histories.get(token)
+    nb_rounds = 0 if history is None else len(history)
+    if nb_rounds < start:
+        return MissingRounds(nb_rounds)
+
+    rules, records = pickle.loads(snapshot)
+    if history is None:
+        history = History()
+        _worker_histories[token] = history
+        if len(_worker_histories) > max_worker_histories:
+            _worker_histories.popitem(last=False)
+    _worker_histories.move_to_end(token)
+    for time_step, record in enumerate(records, start):
+        if time_step >= nb_rounds:
+            history.add_record(time_step, record)
+
+    return _call_seeded(seed, getattr(player, method), rules, *args, history, player_id)
 
 
 class Game:
@@ -27,15 +106,50 @@ class Game:
     def __init__(self, **kwargs):
         """Standard init method
 
+        The graph representation is chosen with the 'backend' argument (GraphBackend.csr for large graphs, by
+        default the representation of the given graph), a user supplied networkx graph is converted accordingly.
+
+        Rounds are streamed to an archive as they are played when a path is given as 'stream' (written from a
+        separate thread when 'background_writer' is True), the game can then be resumed after a crash with resume.
+
+        Rounds are timed phase by phase when an ngt.instrumentation.Instrumentation is given as 'instrumentation'.
+
+        The metrics listed as 'metrics' (ngt.functions.metrics.MacroMetric, MicroMetric) are computed at the end of
+        every round and stored in game.metrics (see ngt.metrics.Metrics).
+
         Args:
             **kwargs: not enforcing input for now
         """
         self.rules = kwargs.get('rules', Rules(**kwargs))
-        self.graph = kwargs.get('graph', nx.Graph())
-        self.history = kwargs.get('history', {0: Increment(**{'graph': self.graph.copy()})})
+        graph = kwargs.get('graph', nx.Graph())
+        self.backend = kwargs.get('backend', GraphBackend.csr if isinstance(graph, CSRGraph) else GraphBackend.networkx)
+        self.graph = convert_graph(graph, self.backend)
+        self.history = kwargs.get('history', {0: Increment(**{'graph': self.graph})})
+        if not isinstance(self.history, History):
+            self.history = History.from_increments(self.history,
+                                                   checkpoint_interval=kwargs.get('checkpoint_interval', 50),
+                                                   cache_size=kwargs.get('history_cache_size', 16))
         self.players = kwargs.get('players', {})
         self.nodes_players_map = kwargs.get('nodes_players_map', None)
         self.current_time_step = max(self.history.keys(), default=0)
+        self.stream = kwargs.get('stream', None)
+        self.background_writer = kwargs.get('background_writer', False)
+        self._stream_writer = None
+        self.instrumentation = kwargs.get('instrumentation', None) or null_instrumentation
+        self.metrics = Metrics(kwargs.get('metrics', []))
+        self.layout = None  # positions of the nodes for displays, see ngt.layout.game_layout
+        # token of the game in the worker processes computing the players' moves, and first round they miss
+        self._worker_token = None
+        self._workers_start = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # games sent to worker processes (eg: to render frames) leave the stream and the instrumentation behind
+        state = self.__dict__.copy()
+        state['_stream_writer'] = None
+        state['instrumentation'] = null_instrumentation
+        state['_worker_token'] = None
+        state['_workers_start'] = 0
+        return state
 
     def add_player(self, player: Player) -> None:
         """Add player to the game
@@ -61,28 +175,49 @@ class Game:
             None
         """
 
-        if self.rules.action_space is ActionSpace.edge and len(self.graph.nodes()) < 2:
-            raise Exception("Not enough nodes to play a game where the action space is the set of edges")
-        elif self.rules.action_space is ActionSpace.node and len(self.graph.nodes()) < 1:
-            raise Exception("Not enough nodes to play a game where the action space is the set of nodes")
-        elif self.rules.action_space is ActionSpace.boolean and len(self.graph.nodes()) < 1:
-            raise Exception("Not enough nodes to play a game where the action space is the acceptance of a policy")
-
-        # Fetch players' actions
-        actions = self.fetch_actions()
-
-        # Fetch players' reactions
-        reactions = self.fetch_reactions(actions)
-
-        # Compute final actions
-        final_actions = self.compute_final_actions(actions, reactions)
-
-        # Update environment
-        self.update_environment(final_actions)
-
-        # Update history
-        self.current_time_step += 1
-        self.history[self.current_time_step] = Increment(actions, reactions, self.graph.copy())
+        instrumentation = self.instrumentation
+        instrumentation.start_round(self.current_time_step + 1)
+        try:
+            with instrumentation.phase('validation'):
+                if self.rules.action_space is ActionSpace.edge and len(self.graph.nodes()) < 2:
+                    raise Exception("Not enough nodes to play a game where the action space is the set of edges")
+                elif self.rules.action_space is ActionSpace.node and len(self.graph.nodes()) < 1:
+                    raise Exception("Not enough nodes to play a game where the action space is the set of nodes")
+                elif self.rules.action_space is ActionSpace.boolean and len(self.graph.nodes()) < 1:
+                    raise Exception("Not enough nodes to play a game where the action space is the acceptance of a "
+                                    "policy")
+
+            # Fetch players' actions
+            with instrumentation.phase('fetch_actions'):
+                actions = self.fetch_actions()
+
+            # Fetch players' reactions
+            with instrumentation.phase('fetch_reactions'):
+                reactions = self.fetch_reactions(actions)
+
+            # Compute final actions
+            with instrumentation.phase('compute_final_actions'):
+                final_actions = self.compute_final_actions(actions, reactions)
+
+            # Update environment
+            with instrumentation.phase('update_environment'):
+                added_edges, removed_edges = self.update_environment(final_actions)
+
+            # Update history (stores the difference with the previous round)
+            with instrumentation.phase('update_history'):
+                self.current_time_step += 1
+                self.history.add_round(self.current_time_step, Increment(actions, reactions, self.graph),
+                                       added_edges, removed_edges)
+
+            if self.metrics.metrics:
+                with instrumentation.phase('metrics'):
+                    self.metrics.collect(self.history)
+
+            if self.stream is not None:
+                with instrumentation.phase('stream'):
+                    self._stream_round(self.current_time_step)
+        finally:
+            instrumentation.end_round()
 
     def play_game(self) -> None:
         """Play an entire game
@@ -92,6 +227,52 @@ class Game:
         """
         while self.current_time_step < self.rules.nb_time_steps:
             self.play_round()
+        self.close_stream()
+
+    def _stream_round(self, time_step: int) -> None:
+        """Append a round to the stream archive, along with the state of the random generator needed to resume
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            None
+        """
+        if self._stream_writer is None:
+            # opened on the first round rather than on init since players are added after the game is created
+            writer = ArchiveWriter(self.stream, self._manifest(), atomic=False)
+            if self.background_writer:
+                writer = BackgroundArchiveWriter(writer)
+            self._stream_writer = writer
+            for previous_time_step in self.history:
+                if previous_time_step < time_step:
+                    writer.write_round(previous_time_step, *self.history.record(previous_time_step))
+
+        self._stream_writer.write_round(time_step, *self.history.record(time_step),
+                                        extra={'random_state': random.getstate()})
+        if not self.background_writer:
+            self._stream_writer.flush()
+
+    def close_stream(self) -> None:
+        """Write the index of the stream archive and close it (rounds played afterwards open a new stream)
+
+        Returns:
+            None
+        """
+        if self._stream_writer is not None:
+            self._stream_writer.close(self.history.graph(len(self.history) - 1))
+            self._stream_writer = None
+
+    def _player_seeds(self) -> Dict[int, int]:
+        """Seeds of the random generator of each player, drawn from the generator of the game in player order
+
+        Players draw their random numbers from a generator seeded this way, so that the players computed one
+        after the other and the ones computed concurrently draw the same numbers.
+
+        Returns:
+            Map from player id to seed
+        """
+        return {player_id: random.getrandbits(64) for player_id in self.players}
 
     def fetch_actions(self) -> Actions:
         """Fetch actions chosen by the players given the rules and the history
@@ -100,9 +281,22 @@ class Game:
             Actions chosen by the players
         """
         actions = {}
+        seeds = self._player_seeds()
+
+        with self.instrumentation.phase('batched_actions'):
+            computed = self._batched_actions()
+        players = {player_id: player for player_id, player in self.players.items() if player_id not in computed}
+
+        if self.rules.nb_player_workers > 1:
+            computed.update(self._compute_concurrently('compute_action', players, seeds))
+        else:
+            for player_id, player in players.items():
+                with self.instrumentation.phase('compute_action', player_id):
+                    computed[player_id] = _call_seeded(seeds[player_id], player.compute_action, self.rules,
+                                                       self.history, player_id)
 
         for player_id, player in self.players.items():
-            action = player.compute_action(self.rules, self.history, player_id)
+            action = computed[player_id]
             action_is_valid = check_action_type(self.rules, action)
             if action_is_valid:
                 actions[player_id] = action
@@ -119,13 +313,95 @@ class Game:
         Returns:
             None
         """
+        seeds = self._player_seeds()
+        if self.rules.nb_player_workers > 1:
+            return self._compute_concurrently('compute_reaction', self.players, seeds, actions)
+
         reactions = {}
 
         for player_id, player in self.players.items():
-            reactions[player_id] = player.compute_reaction(self.rules, actions, self.history, player_id)
+            with self.instrumentation.phase('compute_reaction', player_id):
+                reactions[player_id] = _call_seeded(seeds[player_id], player.compute_reaction, self.rules, actions,
+                                                    self.history, player_id)
 
         return reactions
 
+    def _batched_actions(self) -> Actions:
+        """Actions of the myopic greedy players maximizing their betweenness, evaluated together
+
+        Those players score the same candidate toggles on the same graph, so each candidate is scored once for
+        all of them (see ngt.functions.action_strategy.batched_myopic_greedy), giving the same actions as
+        asking them one by one.
+
+        Returns:
+            Map from player id to action, for the players whose action has been computed
+        """
+        if not self.rules.batch_evaluation or self.rules.action_space is not ActionSpace.edge:
+            return {}
+        # empty graphs make greedy players draw random moves, from their own generator (see _player_seeds)
+        if self.history.graph(len(self.history) - 1).number_of_edges() == 0:
+            return {}
+
+        node_ids = [player_id for player_id, player in self.players.items()
+                    if player.type != EntityType.human
+                    and player.action_strategy is ActionStrategy.myopic_greedy
+                    and unwrap_utility(player.utility_function) is Utility.betweenness_centrality
+                    and player.state_representation_function is StateRepresentation.full_history]
+        if len(node_ids) < 2:
+            return {}
+
+        return batched_myopic_greedy(self.rules, self.history, node_ids)
+
+    def _compute_concurrently(self, method: str, players: Dict[int, Player], seeds: Dict[int, int],
+                              *args) -> Dict[int, Any]:
+        """Compute the actions (or reactions) of the bots in a process pool, and the ones of humans meanwhile
+
+        Every worker keeps the history of the game: bots get the rules and the rounds played since the previous
+        call (all the rounds the worker misses when it did not compute then), so the results only depend on the
+        round and are merged in player id order. Players draw their random numbers from a generator seeded per
+        player (see _player_seeds), so the results are the ones of the serial mode.
+
+        Args:
+            method: Name of the player method to call (compute_action or compute_reaction)
+            players: Players whose action (or reaction) is computed
+            seeds: Seed of the random generator of each player
+            *args: Arguments of the method between the rules and the history
+
+        Returns:
+            Map from player id to action (or reaction)
+        """
+        if self._worker_token is None:
+            self._worker_token = uuid.uuid4().hex
+        pool = get_pool(self.rules.nb_player_workers)
+        nb_rounds = len(self.history)
+        snapshots = {}
+
+        def submit(player_id: int, start: int) -> Any:
+            if start not in snapshots:
+                records = [self.history.record(time_step) for time_step in range(start, nb_rounds)]
+                snapshots[start] = pickle.dumps((self.rules, records), pickle.HIGHEST_PROTOCOL)
+            return pool.submit(_compute_in_worker, method, players[player_id], self._worker_token, start,
+                               snapshots[start], seeds[player_id], args, player_id)
+
+        futures = {player_id: submit(player_id, self._workers_start)
+                   for player_id, player in players.items() if player.type != EntityType.human}
+
+        # humans answer on the main thread while the bots compute
+        results = {player_id: _call_seeded(seeds[player_id], getattr(player, method), self.rules, *args, self.history,
+                                           player_id)
+                   for player_id, player in players.items() if player.type == EntityType.human}
+        while futures:
+            for player_id, future in list(futures.items()):
+                result = future.result()
+                if isinstance(result, MissingRounds):
+                    futures[player_id] = submit(player_id, result.nb_rounds)
+                else:
+                    results[player_id] = result
+                    del futures[player_id]
+        self._workers_start = nb_rounds
+
+        return {player_id: results[player_id] for player_id in players}
+
     def compute_final_actions(self, actions: Actions, reactions: Reactions) -> Actions:
         """Compute the actions that will update the environment given the reactions of the players
 
@@ -139,52 +415,143 @@ class Game:
         actions = {i: action
                    for i, action
                    in actions.items()
-                   if action not in self.rules.impossible_actions and action is not None}
+                   if action is not None and self.rules.is_possible(action)}
         return actions
 
-    def update_environment(self, final_actions: Actions) -> None:
+    def update_environment(self, final_actions: Actions) -> Tuple[List[Edge], List[Edge]]:
         """Update the environment given the players' final actions
 
         Args:
             final_actions: Players' final actions
 
         Returns:
-            None
+            Edges added and removed, each written (smallest node, largest node)
         """
 
-        update_function = fetch_adequate_function(self.rules, update_environment_functions)\
+        update_function = fetch_adequate_function(self.rules, update_environment_functions)
+        if self.rules.action_space is not ActionSpace.edge:
+            # games on nodes and booleans only replace graph attributes
+            update_function(self.rules, self.graph, final_actions)
+            return [], []
 
+        # only the edges of the final actions are toggled, looking them up gives the changes of the round
+        toggled = {(u, v) if u <= v else (v, u) for u, v in final_actions.values()}
+        present = {edge: self.graph.has_edge(*edge) for edge in toggled}
         update_function(self.rules, self.graph, final_actions)
+        added = [edge for edge in toggled if not present[edge] and self.graph.has_edge(*edge)]
+        removed = [edge for edge in toggled if present[edge] and not self.graph.has_edge(*edge)]
+        return added, removed
+
+    def _manifest(self) -> Dict[str, Any]:
+        """Everything but the history needed to rebuild the game from an archive
+
+        Returns:
+            Manifest of the archive
+        """
+        return {
+            'rules': self.rules,
+            'nodes_players_map': self.nodes_players_map,
+            'players': self.players,
+            'backend': self.backend,
+            'checkpoint_interval': self.history.checkpoint_interval,
+        }
 
-    def save(self, folder_name: str) -> None:
-        """Save the game object to pickle objects (save Rules, Game, Players, History, current_time_step) for persistence
+    def save(self, file_name: str) -> None:
+        """Save the game to a single archive file (Rules, Players, History...) for persistence
 
         Args:
-            folder_name: Name of the directory holding game pickle objects
+            file_name: Path of the archive
 
         Returns:
             None
         """
 
-        make_sure_path_exists(folder_name)
+        writer = ArchiveWriter(file_name, self._manifest())
+        for time_step in self.history:
+            writer.write_round(time_step, *self.history.record(time_step))
+        writer.close(self.history.graph(len(self.history) - 1))
+
+    @staticmethod
+    def load(file_name: str, lazy: bool = True) -> Any:
+        """Load a game saved by save, or saved as a folder of pickle objects by previous versions
+
+        By default only the manifest and the index of the archive are read: the rounds are decoded from a memory
+        mapping of the file when the history is accessed, and the archive stays open as long as the game.
+
+        Args:
+           file_name: Path of the archive (or of the directory holding game pickle objects)
+           lazy: Decode the rounds on access rather than reading them all now
+
+        Returns:
+            Game
+        """
+
+        if not is_archive(file_name):
+            return Game._load_folder(file_name)
 
-        save_object(self.rules, folder_name, "rules")
-        save_object(self.nodes_players_map, folder_name, "nodes_players_map")
-        save_object(self.current_time_step, folder_name, "current_time_step")
-        for id_player, player in self.players.items():
-            player.save(folder_name, id_player)
-        for time_step, history in self.history.items():
-            history.save(folder_name, time_step)
+        if lazy:
+            reader = ArchiveReader(file_name, memory_map=True)
+            records = ArchiveRounds(reader)
+        else:
+            with ArchiveReader(file_name) as reader:
+                records = {time_step: (actions, reactions, graph_data, checkpoint)
+                           for time_step, checkpoint, (actions, reactions, graph_data, _) in reader.rounds()}
+
+        manifest = reader.manifest
+        history = History(checkpoint_interval=manifest['checkpoint_interval'], records=records,
+                          checkpoint_times=reader.checkpoint_times, last_graph=reader.last_graph)
+
+        game_info = {
+            'rules': manifest['rules'],
+            'nodes_players_map': manifest['nodes_players_map'],
+            'backend': manifest['backend'],
+            'graph': history.graph(len(history) - 1).copy(),
+            'players': manifest['players'],
+            'history': history,
+        }
+
+        return Game(**game_info)
+
+    @staticmethod
+    def resume(file_name: str, background_writer: bool = False) -> Any:
+        """Resume a game streamed to an archive, eg: after the process was killed
+
+        Rounds written completely are kept, the random generator is restored to its state at the end of the last
+        one and the next rounds are appended to the same archive.
+
+        Args:
+           file_name: Path of the archive the game was streamed to
+           background_writer: Write the next rounds from a separate thread
+
+        Returns:
+            Game
+        """
+
+        game = Game.load(file_name, lazy=False)
+        with ArchiveReader(file_name) as reader:
+            if reader.offsets:
+                extra = reader.read_round(max(reader.offsets))[3]
+                if 'random_state' in extra:
+                    random.setstate(extra['random_state'])
+
+        writer = ArchiveWriter(file_name)
+        if background_writer:
+            writer = BackgroundArchiveWriter(writer)
+
+        game.stream = file_name
+        game.background_writer = background_writer
+        game._stream_writer = writer
+        return game
 
     @staticmethod
-    def load(folder_name: str) -> Any:
-        """Save the game object to pickle objects (save Rules, Game, Players, History, current_time_step) for persistence
+    def _load_folder(folder_name: str) -> Any:
+        """Load a game saved as a folder of pickle objects (Rules, Game, Players, History, current_time_step)
 
         Args:
            folder_name: Name of the directory holding game pickle objects
 
         Returns:
-            None
+            Game
         """
 
         rules = load_object(folder_name, "rules")
@@ -204,8 +571,8 @@ class Game:
             player_info = {
                 'type': type_pl,
                 'profile': profile,
-                'utility': utility,
-                'state_representation': state_representation,
+                'utility_function': utility,
+                'state_representation_function': state_representation,
                 'reaction_strategy': reaction_strategy,
                 'action_strategy': action_strategy,
             }
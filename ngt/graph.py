@@ -0,0 +1,334 @@
+"""Module hosting the graph representations the simulation can run on
+
+The default representation is networkx.Graph. CSRGraph stores an undirected graph on the nodes 0..n-1 as
+compressed sparse row arrays (NumPy) plus a small mutable delta holding the edges toggled since the last
+compaction. It implements the subset of the networkx.Graph API used by the game, the strategies and the
+utilities, so they can use it directly. Functions relying on networkx algorithms (plotting, clustering) convert
+it with as_networkx.
+
+"""
+from enum import Enum
+from typing import Dict, List, Set, Tuple, Any, Iterator
+
+import networkx as nx
+import numpy as np
+from networkx import Graph
+
+
+class GraphBackend(Enum):
+    networkx = 1
+    csr = 2
+
+
+class CSRGraph:
+    """Undirected graph backed by CSR arrays and a delta of added/removed edges
+
+    The arrays are never modified in place: copies share them and only duplicate the delta, which makes the copy
+    of the graph stored in the history of every round cheap. The delta is merged into new arrays once it grows
+    beyond a fraction of the number of edges.
+
+    Traversals get the neighbours of every node as Python lists (see adjacency_lists), sliced once from the arrays
+    and shared by the copies until the next compaction, so a breadth first search costs one list lookup per
+    visited node.
+    """
+
+    # delta size (number of toggled edges) triggering a compaction, relative to the number of edges
+    compaction_ratio = 0.125
+    # minimal delta size triggering a compaction
+    compaction_minimum = 64
+
+    def __init__(self, nb_nodes: int = 0, indptr: np.ndarray = None, indices: np.ndarray = None):
+        """Standard init method
+
+        Args:
+            nb_nodes: Number of nodes (ignored when indptr is given)
+            indptr: Offsets of the rows of each node in indices (length: number of nodes + 1)
+            indices: Sorted neighbours of each node, rows concatenated
+        """
+        if indptr is None:
+            indptr = np.zeros(nb_nodes + 1, dtype=np.int64)
+            indices = np.zeros(0, dtype=np.int32)
+        self.graph = {}
+        self._indptr = indptr
+        self._indices = indices
+        self._nb_base_edges = len(indices) // 2
+        # neighbour lists of the arrays, built on first use (see _rows), in a holder shared by the copies
+        self._base_rows = [None]  # type: List[Any]
+        # neighbour lists of every node, delta included, built on first use (see adjacency_lists)
+        self._adjacency = None  # type: List[List[int]]
+        self._added = {}  # type: Dict[int, Set[int]]
+        self._removed = {}  # type: Dict[int, Set[int]]
+        self._nb_toggled = 0
+
+    @classmethod
+    def from_edges(cls, nb_nodes: int, edges: List[Tuple[int, int]]) -> 'CSRGraph':
+        """Build a graph from its list of edges
+
+        Args:
+            nb_nodes: Number of nodes
+            edges: Undirected edges, each one listed once
+
+        Returns:
+            CSR graph
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        columns = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((columns, rows))
+        indptr = np.zeros(nb_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=nb_nodes), out=indptr[1:])
+        return cls(nb_nodes, indptr, columns[order].astype(np.int32))
+
+    @classmethod
+    def from_networkx(cls, graph: Graph) -> 'CSRGraph':
+        """Convert a networkx graph whose nodes are 0..n-1
+
+        Args:
+            graph: networkx graph
+
+        Returns:
+            CSR graph with the same edges and graph attributes
+        """
+        nb_nodes = len(graph)
+        if set(graph.nodes()) != set(range(nb_nodes)):
+            raise ValueError("CSRGraph only handles graphs whose nodes are 0..n-1")
+        csr_graph = cls.from_edges(nb_nodes, [(u, v) for u, v in graph.edges() if u != v])
+        csr_graph.graph.update(graph.graph)
+        return csr_graph
+
+    def to_networkx(self) -> Graph:
+        """Convert to a networkx graph
+
+        Returns:
+            networkx graph with the same nodes, edges and graph attributes
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(range(len(self)))
+        graph.add_edges_from(self.edges())
+        graph.graph.update(self.graph)
+        return graph
+
+    def compact(self) -> None:
+        """Merge the delta into new CSR arrays
+
+        Returns:
+            None
+        """
+        if self._added or self._removed:
+            graph = CSRGraph.from_edges(len(self), self.edges())
+            self._indptr, self._indices, self._nb_base_edges = graph._indptr, graph._indices, graph._nb_base_edges
+            self._base_rows, self._adjacency = [None], None
+            self._added, self._removed, self._nb_toggled = {}, {}, 0
+
+    def copy(self) -> 'CSRGraph':
+        """Copy sharing the CSR arrays with the original graph
+
+        Returns:
+            Copy of the graph
+        """
+        graph = CSRGraph(indptr=self._indptr, indices=self._indices)
+        graph._base_rows, graph._adjacency = self._base_rows, self._adjacency
+        graph.graph.update(self.graph)
+        graph._added = {node: set(neighbours) for node, neighbours in self._added.items()}
+        graph._removed = {node: set(neighbours) for node, neighbours in self._removed.items()}
+        graph._nb_toggled = self._nb_toggled
+        return graph
+
+    def _in_base(self, u: int, v: int) -> bool:
+        start, end = self._indptr[u], self._indptr[u + 1]
+        position = start + np.searchsorted(self._indices[start:end], v)
+        return position < end and self._indices[position] == v
+
+    def has_edge(self, u: int, v: int) -> bool:
+        if u not in self or v not in self:
+            return False
+        if v in self._added.get(u, ()):
+            return True
+        if v in self._removed.get(u, ()):
+            return False
+        return self._in_base(u, v)
+
+    def add_node(self, node: int) -> None:
+        nb_nodes = len(self)
+        if node < nb_nodes:
+            return
+        if node != nb_nodes:
+            raise ValueError("CSRGraph only handles graphs whose nodes are 0..n-1")
+        self._indptr = np.append(self._indptr, self._indptr[-1])
+        self._base_rows, self._adjacency = [None], None
+
+    def add_nodes_from(self, nodes: List[int]) -> None:
+        for node in sorted(nodes):
+            self.add_node(node)
+
+    def add_edge(self, u: int, v: int) -> None:
+        self.add_node(max(u, v))
+        if u == v or self.has_edge(u, v):
+            return
+        self._adjacency = None
+        if v in self._removed.get(u, ()):
+            self._removed[u].discard(v)
+            self._removed[v].discard(u)
+            self._nb_toggled -= 1
+        else:
+            self._added.setdefault(u, set()).add(v)
+            self._added.setdefault(v, set()).add(u)
+            self._nb_toggled += 1
+            self._compact_if_needed()
+
+    def remove_edge(self, u: int, v: int) -> None:
+        if not self.has_edge(u, v):
+            raise nx.NetworkXError(f"The edge {u}-{v} is not in the graph.")
+        self._adjacency = None
+        if v in self._added.get(u, ()):
+            self._added[u].discard(v)
+            self._added[v].discard(u)
+            self._nb_toggled -= 1
+        else:
+            self._removed.setdefault(u, set()).add(v)
+            self._removed.setdefault(v, set()).add(u)
+            self._nb_toggled += 1
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        if self._nb_toggled > max(self.compaction_minimum, self.compaction_ratio * self._nb_base_edges):
+            self.compact()
+
+    def _rows(self) -> List[List[int]]:
+        """Neighbours of every node in the CSR arrays, as lists (built once for the arrays)
+
+        Returns:
+            List of sorted neighbour lists, indexed by node
+        """
+        rows = self._base_rows[0]
+        if rows is None:
+            indices, bounds = self._indices.tolist(), self._indptr.tolist()
+            rows = [indices[start:end] for start, end in zip(bounds, bounds[1:])]
+            self._base_rows[0] = rows
+        return rows
+
+    def neighbors(self, node: int) -> List[int]:
+        """Neighbours of a node, the ones from the CSR arrays first (sorted), then the added ones (sorted)
+
+        Args:
+            node: Node
+
+        Returns:
+            List of neighbours (may be shared with the graph, don't modify it)
+        """
+        neighbours = self._rows()[node]
+        removed = self._removed.get(node)
+        if removed:
+            neighbours = [w for w in neighbours if w not in removed]
+        added = self._added.get(node)
+        if added:
+            neighbours = neighbours + sorted(added)
+        return neighbours
+
+    def adjacency_lists(self) -> List[List[int]]:
+        """Neighbours of every node, in the order of neighbors (built once until the edges change)
+
+        Returns:
+            List of neighbour lists, indexed by node (shared with the graph, don't modify them)
+        """
+        if self._adjacency is None:
+            rows = self._rows()
+            if self._added or self._removed:
+                rows = list(rows)
+                for node in set(self._added) | set(self._removed):
+                    rows[node] = self.neighbors(node)
+            self._adjacency = rows
+        return self._adjacency
+
+    def degree(self, node: int) -> int:
+        return (int(self._indptr[node + 1] - self._indptr[node]) - len(self._removed.get(node, ()))
+                + len(self._added.get(node, ())))
+
+    def nodes(self) -> List[int]:
+        return list(range(len(self)))
+
+    def edges(self) -> List[Tuple[int, int]]:
+        return [(u, v) for u in range(len(self)) for v in self.neighbors(u) if u < v]
+
+    def number_of_nodes(self) -> int:
+        return len(self)
+
+    def number_of_edges(self) -> int:
+        nb_added = sum(len(neighbours) for neighbours in self._added.values())
+        nb_removed = sum(len(neighbours) for neighbours in self._removed.values())
+        return self._nb_base_edges + (nb_added - nb_removed) // 2
+
+    def __getitem__(self, node: int) -> List[int]:
+        if node not in self:
+            raise KeyError(node)
+        return self.neighbors(node)
+
+    def __contains__(self, node: Any) -> bool:
+        return isinstance(node, (int, np.integer)) and 0 <= node < len(self)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._indptr) - 1
+
+
+def adjacency_lists(graph: Any) -> Any:
+    """Neighbours of every node, for traversals (eg: adjacency[node] iterates over the neighbours of node)
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        Lists indexed by node for a CSR graph (see CSRGraph.adjacency_lists), the adjacency view of a networkx graph
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.adjacency_lists()
+    return graph.adj
+
+
+def as_networkx(graph: Any) -> Graph:
+    """Graph usable by networkx algorithms and drawing functions
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        The graph itself if it is a networkx graph, its conversion otherwise
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.to_networkx()
+    return graph
+
+
+def as_csr(graph: Any) -> CSRGraph:
+    """Graph represented with CSR arrays
+
+    Args:
+        graph: networkx or CSR graph
+
+    Returns:
+        The graph itself if it is a CSR graph, its conversion otherwise
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    return CSRGraph.from_networkx(graph)
+
+
+graph_converters = {
+    GraphBackend.networkx: as_networkx,
+    GraphBackend.csr: as_csr,
+}
+
+
+def convert_graph(graph: Any, backend: GraphBackend) -> Any:
+    """Convert a graph to the given backend
+
+    Args:
+        graph: networkx or CSR graph
+        backend: Backend of the returned graph
+
+    Returns:
+        Graph represented with the backend
+    """
+    return graph_converters[backend](graph)
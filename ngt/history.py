@@ -0,0 +1,343 @@
+"""Module hosting the history of a game
+
+Each round changes at most a handful of edges, so instead of a full copy of the graph per round the history stores
+the difference with the previous round's graph, plus a full copy (checkpoint) every few rounds. When the game gives
+the edges its final actions toggled, recording a round costs the number of changes rather than the number of
+edges. The history keeps its own graph of the last round, updated with the difference of every round recorded,
+and rebuilds the graphs of the other rounds on access from the closest checkpoint (or the closest round rebuilt
+recently), keeping them in a small LRU cache.
+
+"""
+import bisect
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from typing import Dict, List, Set, Tuple, Any, Iterator
+
+from networkx import Graph
+from ngt.increment import Increment
+
+GraphDiff = namedtuple('GraphDiff', ['added_nodes', 'added_edges', 'removed_edges', 'attributes',
+                                     'removed_attributes'], defaults=((),))
+GraphDiff.__doc__ = """Difference between the graphs of two consecutive rounds
+
+attributes holds the graph attributes replaced or added (None when there are none), removed_attributes the keys of
+the graph attributes removed.
+"""
+
+
+def edge_set(graph: Graph) -> Set[Tuple[int, int]]:
+    """Set of the edges of an undirected graph, each edge written (smallest node, largest node)
+
+    Args:
+        graph: Graph
+
+    Returns:
+        Set of edges
+    """
+    return {(u, v) if u <= v else (v, u) for u, v in graph.edges()}
+
+
+def attribute_changes(attributes: Dict[str, Any], previous: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Graph attributes replaced since the previous round (attributes are replaced, never modified in place)
+
+    Args:
+        attributes: Graph attributes
+        previous: Graph attributes of the previous round
+
+    Returns:
+        Attributes whose object changed or that were added (None when there are none) and keys of the attributes
+        removed
+    """
+    changed = {key: value for key, value in attributes.items() if key not in previous or previous[key] is not value}
+    removed = [key for key in previous if key not in attributes]
+    return changed or None, removed
+
+
+def apply_diff(graph: Graph, diff: GraphDiff) -> None:
+    """Update a graph in place with the difference to the next round
+
+    Args:
+        graph: Graph of a round
+        diff: Difference between this round and the next one
+
+    Returns:
+        None
+    """
+    graph.add_nodes_from(diff.added_nodes)
+    for u, v in diff.removed_edges:
+        graph.remove_edge(u, v)
+    for u, v in diff.added_edges:
+        graph.add_edge(u, v)
+    if diff.attributes is not None:
+        graph.graph.update(diff.attributes)
+    for key in diff.removed_attributes:
+        del graph.graph[key]
+
+
+class History(Mapping):
+    """Delta-encoded history of a game, behaving like the dict {time step: Increment}
+
+    Rounds are appended in order with history[t] = Increment(actions, reactions, graph), or with add_round along
+    with the edges toggled during the round. The graph given is never kept, so the caller can keep modifying it
+    to play the next round. Reading history[t] returns an Increment whose graph is the history's own graph of the
+    last round, or a graph rebuilt from the closest checkpoint; rebuilt graphs are cached, modifying them
+    corrupts the cache.
+
+    Each round is stored as the record (actions, reactions, graph data, checkpoint) where graph data is the full
+    graph for checkpoints and the GraphDiff with the previous round otherwise. The records are held in any mutable
+    mapping, eg: ngt.archive.ArchiveRounds decoding them lazily from a saved game.
+    """
+    def __init__(self, checkpoint_interval: int = 50, cache_size: int = 16, records: Any = None,
+                 checkpoint_times: List[int] = None, last_graph: Graph = None):
+        """Standard init method
+
+        Args:
+            checkpoint_interval: Number of rounds between two full copies of the graph (skipped when no node or
+                edge changed since the previous one)
+            cache_size: Maximum number of rebuilt graphs kept in memory
+            records: Mapping from time step to record of the round, for histories built from encoded rounds
+            checkpoint_times: Sorted time steps of the checkpoints among the records
+            last_graph: Graph of the last round (rebuilt from the records if not given)
+        """
+        self.checkpoint_interval = checkpoint_interval
+        self.cache_size = cache_size
+        self._records = {} if records is None else records  # type: Dict[int, Tuple[Any, Any, Any, bool]]
+        self._checkpoint_times = [] if checkpoint_times is None else list(checkpoint_times)  # type: List[int]
+        self._cache = OrderedDict()  # type: Dict[int, Graph]
+        self._last_edges = None
+        # graph of the last round, owned by the history and updated with the difference of every round recorded
+        self._last_graph = last_graph
+        if self._last_graph is None and self._records:
+            self._last_graph = self._replay(len(self._records) - 1).copy()
+        # nodes or edges changed since the last checkpoint
+        self._structure_changed = True
+
+    @classmethod
+    def from_increments(cls, increments: Dict[int, Increment], **kwargs) -> 'History':
+        """Build a history from a dict of increments holding full graphs (eg: history of a game saved as folder)
+
+        Args:
+            increments: Map from time step to increment
+            **kwargs: Arguments of the init method
+
+        Returns:
+            Delta-encoded history
+        """
+        history = cls(**kwargs)
+        for time_step in sorted(increments):
+            history[time_step] = increments[time_step]
+        return history
+
+    def __setitem__(self, time_step: int, increment: Increment) -> None:
+        self.add_round(time_step, increment)
+
+    def add_round(self, time_step: int, increment: Increment, added_edges: List[Tuple[int, int]] = None,
+                  removed_edges: List[Tuple[int, int]] = None) -> None:
+        """Append a round
+
+        Without the edges added and removed during the round, they are found by comparing the edge sets of the
+        graph and of the previous round's graph, which costs the number of edges. Given (eg: by the game, from its
+        final actions), recording the round only costs the number of changes: the graph is only copied for
+        checkpoints, the caller must then record every round. Nodes are assumed to be only added, the nodes added
+        last.
+
+        Args:
+            time_step: Time step of the round, the number of rounds recorded so far
+            increment: Actions, reactions and graph at the end of the round
+            added_edges: Edges added during the round, each written (smallest node, largest node)
+            removed_edges: Edges removed during the round, each written (smallest node, largest node)
+
+        Returns:
+            None
+        """
+        if time_step != len(self._records):
+            raise Exception(f"History only grows one round at a time (expected time step {len(self._records)})")
+
+        graph = increment.graph
+        previous = self._last_graph
+        nb_nodes = graph.number_of_nodes()
+        nb_previous_nodes = 0 if previous is None else previous.number_of_nodes()
+        known_changes = added_edges is not None and removed_edges is not None
+        if known_changes:
+            edges = None
+            added_nodes = list(graph)[nb_previous_nodes:] if nb_nodes > nb_previous_nodes else []
+            nodes_removed = nb_nodes < nb_previous_nodes
+        elif previous is not None:
+            edges = edge_set(graph)
+            if self._last_edges is None:
+                self._last_edges = edge_set(previous)
+            added_nodes = [node for node in graph if node not in previous]
+            nodes_removed = any(node not in graph for node in previous)
+            added_edges, removed_edges = sorted(edges - self._last_edges), sorted(self._last_edges - edges)
+        else:
+            edges = added_nodes = None
+            nodes_removed = False
+
+        if added_nodes or added_edges or removed_edges:
+            self._structure_changed = True
+        # no copy while only graph attributes change (eg: games on nodes), rebuilding a round then only replaces them
+        if (previous is None or nodes_removed
+                or (time_step % self.checkpoint_interval == 0 and self._structure_changed)):
+            self._records[time_step] = increment.actions, increment.reactions, graph.copy(), True
+            self._checkpoint_times.append(time_step)
+            self._structure_changed = False
+        else:
+            # only the attributes replaced are stored (eg: not the static exposures of a cascade game)
+            attributes, removed_attributes = attribute_changes(graph.graph, previous.graph)
+            diff = GraphDiff(added_nodes, sorted(added_edges), sorted(removed_edges), attributes, removed_attributes)
+            self._records[time_step] = increment.actions, increment.reactions, diff, False
+
+        self._advance(time_step)
+        self._last_edges = edges
+
+    def add_record(self, time_step: int, record: Tuple[Any, Any, Any, bool]) -> None:
+        """Append a round encoded by another history (see record), eg: in a worker process following a game
+
+        The graph of the last round is updated in place with the differences appended, as with add_round (rounds
+        appended with add_round must not follow, add_round comparing the edges with the ones of its own rounds).
+
+        Args:
+            time_step: Time step of the round, the number of rounds recorded so far
+            record: Encoded round
+
+        Returns:
+            None
+        """
+        if time_step != len(self._records):
+            raise Exception(f"History only grows one round at a time (expected time step {len(self._records)})")
+
+        self._records[time_step] = record
+        if record[3]:
+            self._checkpoint_times.append(time_step)
+        self._advance(time_step)
+        self._last_edges = None
+
+    def _advance(self, time_step: int) -> None:
+        """Bring the graph of the last round to the round just recorded
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            None
+        """
+        _, _, graph_data, checkpoint = self._records[time_step]
+        if checkpoint:
+            # the checkpoint itself is never modified
+            self._last_graph = graph_data.copy()
+        else:
+            apply_diff(self._last_graph, graph_data)
+
+    def record(self, time_step: int) -> Tuple[Any, Any, Any, bool]:
+        """Encoded round, as stored by the history
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            Actions, reactions, difference with the previous round's graph (or full graph for checkpoints) and
+            boolean indicating whether the round is a checkpoint
+        """
+        return self._records[time_step]
+
+    def __getitem__(self, time_step: int) -> Increment:
+        actions, reactions, _, _ = self._records[time_step]
+        return Increment(actions, reactions, self.graph(time_step))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, time_step: Any) -> bool:
+        return time_step in self._records
+
+    def edge_changes(self, start: int, end: int, max_steps: int = 64) -> Tuple[Set[Tuple[int, int]],
+                                                                                 Set[Tuple[int, int]]]:
+        """Edges added and removed between the graphs of two rounds (in either order)
+
+        Close rounds are compared by combining the stored differences, so the cost only depends on the number of
+        toggled edges; distant rounds (or rounds with checkpoints in between) by comparing their edge sets.
+
+        Args:
+            start: Time step of the first round
+            end: Time step of the second round
+            max_steps: Maximum number of differences combined
+
+        Returns:
+            Edges of the second graph not in the first one and edges of the first graph not in the second one,
+            each written (smallest node, largest node)
+        """
+        first, last = min(start, end), max(start, end)
+        records = [self._records[t] for t in range(first + 1, last + 1)] if last - first <= max_steps else None
+
+        if records is None or any(checkpoint for _, _, _, checkpoint in records):
+            old_edges, new_edges = edge_set(self.graph(start)), edge_set(self.graph(end))
+            return new_edges - old_edges, old_edges - new_edges
+
+        added, removed = set(), set()
+        for _, _, diff, _ in records:
+            for edge in diff.removed_edges:
+                if edge in added:
+                    added.discard(edge)
+                else:
+                    removed.add(edge)
+            for edge in diff.added_edges:
+                if edge in removed:
+                    removed.discard(edge)
+                else:
+                    added.add(edge)
+
+        if end < start:
+            return removed, added
+        return added, removed
+
+    def graph(self, time_step: int) -> Graph:
+        """Graph at the end of a round
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            Graph (shared with the history, do not modify). The graph of the last round is updated in place when
+            the next round is recorded, copy it to keep it.
+        """
+        if time_step == len(self._records) - 1:
+            return self._last_graph
+        if time_step not in self._records:
+            raise KeyError(time_step)
+        return self._replay(time_step)
+
+    def _replay(self, time_step: int) -> Graph:
+        if time_step in self._cache:
+            self._cache.move_to_end(time_step)
+            return self._cache[time_step]
+
+        start = self._checkpoint_times[bisect.bisect_right(self._checkpoint_times, time_step) - 1]
+        if start == time_step:
+            return self._records[time_step][2]
+
+        # replay the differences from the closest checkpoint, or from a more recent cached round
+        cached = [t for t in self._cache if start < t < time_step]
+        if cached:
+            start = max(cached)
+            graph = self._cache[start].copy()
+        else:
+            graph = self._records[start][2].copy()
+
+        for t in range(start + 1, time_step + 1):
+            apply_diff(graph, self._records[t][2])
+
+        self._cache[time_step] = graph
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return graph
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the cache and the edge set are rebuilt when needed
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_last_edges'] = None
+        return state
@@ -0,0 +1,225 @@
+"""Module hosting the instrumentation of the rounds of a game
+
+An Instrumentation given to a game (Game(instrumentation=Instrumentation())) records, for every round, the wall
+and CPU time of each phase of play_round, per player for the phases computing the players' actions, plus
+counters incremented by the strategies (utility evaluations, candidate moves evaluated). Counters are attributed
+to the player being timed, if any. Phases can be nested (eg: batched_actions is part of fetch_actions), each one
+being recorded when it ends.
+
+Games without instrumentation use null_instrumentation, whose phases do nothing, and strategies only check
+whether an instrumentation is active, so the cost is nil when disabled. Work done in worker processes is counted
+in the wall time of the phase waiting for it, not in its CPU time.
+
+Example::
+
+    instrumentation = Instrumentation()
+    game = Game(graph=graph, instrumentation=instrumentation)
+    ...
+    game.play_game()
+    print(instrumentation.table())
+    instrumentation.to_json_lines('rounds.jsonl')
+
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Iterator
+
+# instrumentation of the round being played, None when disabled
+active = None
+
+
+def count(counter: str, value: int = 1) -> None:
+    """Increment a counter of the active instrumentation, if any
+
+    Args:
+        counter: Name of the counter
+        value: Increment
+
+    Returns:
+        None
+    """
+    if active is not None:
+        active.count(counter, value)
+
+
+class Phase:
+    """Context timing a phase of a round"""
+    __slots__ = ['instrumentation', 'name', 'player_id', 'previous_player_id', 'wall', 'cpu']
+
+    def __init__(self, instrumentation: 'Instrumentation', name: str, player_id: int = None):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.player_id = player_id
+
+    def __enter__(self) -> 'Phase':
+        self.previous_player_id = self.instrumentation.player_id
+        if self.player_id is not None:
+            self.instrumentation.player_id = self.player_id
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *args) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        self.instrumentation.player_id = self.previous_player_id
+        self.instrumentation.record(self.name, self.player_id, wall, cpu)
+
+
+class NullPhase:
+    """Context doing nothing, used when the instrumentation is disabled"""
+    __slots__ = []
+
+    def __enter__(self) -> 'NullPhase':
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+class Instrumentation:
+    """Wall/CPU time per phase and per player, and counters, for every round played"""
+    def __init__(self):
+        """Standard init method"""
+        self.rounds = OrderedDict()  # type: Dict[int, Dict[str, Any]]
+        self.time_step = None
+        self.player_id = None
+        self._previous = None
+
+    def start_round(self, time_step: int) -> None:
+        """Start recording a round, making this instrumentation the active one
+
+        Args:
+            time_step: Time step of the round
+
+        Returns:
+            None
+        """
+        global active
+        self.time_step = time_step
+        self.rounds.setdefault(time_step, {'phases': OrderedDict(), 'players': {}, 'counters': {},
+                                           'player_counters': {}})
+        self._previous, active = active, self
+
+    def end_round(self) -> None:
+        """Stop recording the current round
+
+        Returns:
+            None
+        """
+        global active
+        active, self._previous = self._previous, None
+        self.time_step = None
+
+    def phase(self, name: str, player_id: int = None) -> Phase:
+        """Context timing a phase of the current round
+
+        Args:
+            name: Name of the phase
+            player_id: Id of the player the phase is about (None for phases about every player)
+
+        Returns:
+            Context manager
+        """
+        return Phase(self, name, player_id)
+
+    def record(self, name: str, player_id: Any, wall: float, cpu: float) -> None:
+        """Add the time of a phase to the current round (times of a phase run several times are summed)
+
+        Args:
+            name: Name of the phase
+            player_id: Id of the player the phase is about, or None
+            wall: Wall time, in seconds
+            cpu: CPU time of this process, in seconds
+
+        Returns:
+            None
+        """
+        current = self.rounds[self.time_step]
+        phases = current['phases'] if player_id is None else current['players'].setdefault(player_id, OrderedDict())
+        timing = phases.setdefault(name, {'wall': 0., 'cpu': 0.})
+        timing['wall'] += wall
+        timing['cpu'] += cpu
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Increment a counter of the current round (and of the player being timed, if any)
+
+        Args:
+            counter: Name of the counter
+            value: Increment
+
+        Returns:
+            None
+        """
+        current = self.rounds[self.time_step]
+        current['counters'][counter] = current['counters'].get(counter, 0) + value
+        if self.player_id is not None:
+            counters = current['player_counters'].setdefault(self.player_id, {})
+            counters[counter] = counters.get(counter, 0) + value
+
+    def lines(self) -> Iterator[Dict[str, Any]]:
+        """One record per round
+
+        Returns:
+            Iterator over dicts with keys round, phases ({phase: {wall, cpu}}), players ({player id: {phase:
+            {wall, cpu}}}), counters and player_counters ({player id: counters})
+        """
+        for time_step, current in self.rounds.items():
+            line = {'round': time_step}
+            line.update(current)
+            yield line
+
+    def to_json_lines(self, file_name: str) -> None:
+        """Write the records of the rounds as JSON lines
+
+        Args:
+            file_name: Path of the file
+
+        Returns:
+            None
+        """
+        with open(file_name, 'w') as output:
+            for line in self.lines():
+                output.write(json.dumps(line) + '\n')
+
+    def table(self) -> str:
+        """Table with one row per round: wall time of each phase (ms) and counters
+
+        Returns:
+            Table as text
+        """
+        phases = []  # type: List[str]
+        counters = []  # type: List[str]
+        for current in self.rounds.values():
+            phases += [name for name in current['phases'] if name not in phases]
+            counters += [name for name in current['counters'] if name not in counters]
+
+        columns = ['round'] + [f'{name} (ms)' for name in phases] + counters
+        rows = [columns]
+        for time_step, current in self.rounds.items():
+            row = [str(time_step)]
+            row += [f"{1000 * current['phases'][name]['wall']:.2f}" if name in current['phases'] else ''
+                    for name in phases]
+            row += [str(current['counters'].get(name, '')) for name in counters]
+            rows.append(row)
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+        return '\n'.join('  '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+class NullInstrumentation:
+    """Instrumentation recording nothing"""
+    _phase = NullPhase()
+
+    def start_round(self, time_step: int) -> None:
+        pass
+
+    def end_round(self) -> None:
+        pass
+
+    def phase(self, name: str, player_id: int = None) -> NullPhase:
+        return self._phase
+
+
+null_instrumentation = NullInstrumentation()
@@ -0,0 +1,224 @@
+"""Module hosting the force directed layout of the graphs of a game, for displays and exports
+
+force_layout is a Fruchterman-Reingold layout written with NumPy: edges attract their ends, nodes repel each
+other. Above exact_repulsion_limit nodes, the repulsion is approximated on a grid of cells holding about n^0.5
+nodes each: exact between the nodes of a same cell, from the centroid (weighted by the number of nodes) of the
+other cells. An iteration is then O(n^1.5) rather than O(n^2), so graphs of thousands of nodes are laid out in
+seconds.
+
+Layout gives the positions of the nodes at every round of a game. Each round starts from the positions of the
+previous one and only runs a few iterations at a low temperature, so nodes move little from frame to frame (and not
+at all when no edge was toggled). Positions are cached, and game_layout keeps the layout of a game on the game, so
+replays and exports of a game reuse it.
+
+Example::
+
+    layout = game_layout(game)
+    layout[12]          # map from node to position at round 12
+
+"""
+import math
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+from ngt.history import edge_set
+
+# number of nodes up to which the repulsion is computed between every pair of nodes
+exact_repulsion_limit = 500
+
+
+def _repulsion_exact(positions: np.ndarray, k: float) -> np.ndarray:
+    delta = positions[:, None, :] - positions[None, :, :]
+    distance2 = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), (0.01 * k) ** 2)
+    return k ** 2 * np.einsum('ijk,ij->ik', delta, 1 / distance2)
+
+
+def _repulsion_grid(positions: np.ndarray, k: float) -> np.ndarray:
+    nb_nodes = len(positions)
+    # cells holding the same number of nodes: strips of equal count along x, each one cut along y
+    nb_cells_side = max(1, int(round(nb_nodes ** 0.25)))
+    nb_cells = nb_cells_side ** 2
+    strips = np.empty(nb_nodes, dtype=int)
+    strips[np.argsort(positions[:, 0], kind='stable')] = np.arange(nb_nodes) * nb_cells_side // nb_nodes
+    order = np.lexsort((positions[:, 1], strips))
+    strip_sizes = np.bincount(strips, minlength=nb_cells_side)
+    strip_starts = np.cumsum(strip_sizes) - strip_sizes
+    ranks = np.arange(nb_nodes) - strip_starts[strips[order]]
+    cells = np.empty(nb_nodes, dtype=int)
+    cells[order] = strips[order] * nb_cells_side + ranks * nb_cells_side // strip_sizes[strips[order]]
+
+    # far field: every cell seen from its centroid, except the cell of the node
+    counts = np.bincount(cells, minlength=nb_cells)
+    centroids = np.zeros((nb_cells, 2))
+    np.add.at(centroids, cells, positions)
+    centroids /= np.maximum(counts, 1)[:, None]
+    delta = positions[:, None, :] - centroids[None, :, :]
+    distance2 = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), (0.01 * k) ** 2)
+    weights = counts[None, :] / distance2
+    weights[np.arange(nb_nodes), cells] = 0
+    forces = k ** 2 * np.einsum('ijk,ij->ik', delta, weights)
+
+    # near field: every pair of nodes of a same cell
+    order = np.argsort(cells, kind='stable')
+    starts = np.cumsum(counts) - counts
+    nb_partners = counts[cells[order]]
+    sources = np.repeat(order, nb_partners)
+    first_pair = np.repeat(np.cumsum(nb_partners) - nb_partners, nb_partners)
+    targets = order[np.repeat(starts[cells[order]], nb_partners) + np.arange(len(sources)) - first_pair]
+    delta = positions[sources] - positions[targets]
+    distance2 = np.maximum(np.einsum('ij,ij->i', delta, delta), (0.01 * k) ** 2)
+    np.add.at(forces, sources, k ** 2 * delta / distance2[:, None])
+    return forces
+
+
+def force_layout(nb_nodes: int, edges: np.ndarray, initial: np.ndarray = None, iterations: int = 50,
+                 temperature: float = 0.1, seed: int = 0) -> np.ndarray:
+    """Fruchterman-Reingold layout, with grid approximated repulsion for large graphs
+
+    Args:
+        nb_nodes: Number of nodes, numbered from 0
+        edges: Array of shape (nb_edges, 2) of the node numbers of the edges
+        initial: Array of shape (nb_nodes, 2) of starting positions (random positions if None)
+        iterations: Number of iterations
+        temperature: Maximal move of a node at the first iteration, decreasing linearly to 0
+        seed: Seed of the random starting positions
+
+    Returns:
+        Array of shape (nb_nodes, 2) of positions, in a square of side about 1
+    """
+    if initial is None:
+        positions = np.random.RandomState(seed).uniform(-0.5, 0.5, (nb_nodes, 2))
+    else:
+        positions = np.array(initial, dtype=float)
+    if nb_nodes < 2:
+        return positions
+
+    edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+    k = 1 / math.sqrt(nb_nodes)
+    repulsion = _repulsion_exact if nb_nodes <= exact_repulsion_limit else _repulsion_grid
+    for iteration in range(iterations):
+        forces = repulsion(positions, k)
+        delta = positions[edges[:, 0]] - positions[edges[:, 1]]
+        attraction = delta * np.sqrt(np.einsum('ij,ij->i', delta, delta))[:, None] / k
+        np.add.at(forces, edges[:, 0], -attraction)
+        np.add.at(forces, edges[:, 1], attraction)
+
+        step = temperature * (1 - iteration / iterations)
+        lengths = np.maximum(np.sqrt(np.einsum('ij,ij->i', forces, forces)), 1e-12)
+        positions += forces * (np.minimum(lengths, step) / lengths)[:, None]
+    return positions
+
+
+class Layout:
+    """Positions of the nodes at every round of a game, each round warm started from the previous one"""
+    def __init__(self, history: Any, iterations: int = 100, warm_iterations: int = 15, warm_temperature: float = 0.02,
+                 seed: int = 0):
+        """Standard init method
+
+        Args:
+            history: History of the game
+            iterations: Number of iterations of the layout of the first round
+            warm_iterations: Number of iterations of the layout of a round from the positions of the previous one
+            warm_temperature: Maximal move of a node at the first of those iterations
+            seed: Seed of the random positions of the first round
+        """
+        self.history = history
+        self.iterations = iterations
+        self.warm_iterations = warm_iterations
+        self.warm_temperature = warm_temperature
+        self.seed = seed
+        self._nodes = {}  # type: Dict[int, List[int]]
+        self._raw = {}  # type: Dict[int, np.ndarray]
+        self._positions = {}  # type: Dict[int, Dict[int, Tuple[float, float]]]
+
+    def __getitem__(self, round_number: int) -> Dict[int, Tuple[float, float]]:
+        """Positions of the nodes at a round, scaled to the square [-1, 1] x [-1, 1]
+
+        Args:
+            round_number: Time step of the round
+
+        Returns:
+            Map from node to position
+        """
+        if round_number not in self._positions:
+            positions = self._layout(round_number)
+            low = positions.min(axis=0)
+            high = positions.max(axis=0)
+            scale = 2 / max(np.max(high - low), 1e-9)
+            positions = (positions - (low + high) / 2) * scale
+            self._positions[round_number] = {node: (float(x), float(y))
+                                             for node, (x, y) in zip(self._nodes[round_number], positions)}
+        return self._positions[round_number]
+
+    def precompute(self, rounds: List[int]) -> None:
+        """Compute the positions of rounds now (eg: before sending the layout to worker processes)
+
+        Args:
+            rounds: Time steps of the rounds
+
+        Returns:
+            None
+        """
+        for round_number in sorted(rounds):
+            self[round_number]
+
+    def _layout(self, round_number: int) -> np.ndarray:
+        # rounds are laid out in order from the last one laid out, so that positions don't depend on the order in
+        # which rounds are displayed
+        start = max((t for t in self._raw if t <= round_number), default=None)
+        if start is None:
+            start = min(self.history)
+            graph = self.history.graph(start)
+            nodes, edges = self._numbered(graph)
+            self._nodes[start] = nodes
+            self._raw[start] = force_layout(len(nodes), edges, iterations=self.iterations, seed=self.seed)
+
+        for time_step in sorted(t for t in self.history if start < t <= round_number):
+            self._raw[time_step] = self._warm_layout(start, time_step)
+            start = time_step
+        return self._raw[start]
+
+    def _warm_layout(self, previous: int, time_step: int) -> np.ndarray:
+        graph = self.history.graph(time_step)
+        nodes, edges = self._numbered(graph)
+        self._nodes[time_step] = nodes
+        previous_positions = dict(zip(self._nodes[previous], self._raw[previous]))
+        added, removed = self.history.edge_changes(previous, time_step)
+        if nodes == self._nodes[previous] and not added and not removed:
+            return self._raw[previous]
+
+        # new nodes start next to their neighbours already placed
+        random_state = np.random.RandomState(self.seed + time_step)
+        initial = np.empty((len(nodes), 2))
+        for row, node in enumerate(nodes):
+            if node in previous_positions:
+                initial[row] = previous_positions[node]
+            else:
+                placed = [previous_positions[neighbor] for neighbor in graph.neighbors(node)
+                          if neighbor in previous_positions]
+                center = np.mean(placed, axis=0) if placed else np.zeros(2)
+                initial[row] = center + random_state.uniform(-0.05, 0.05, 2)
+        return force_layout(len(nodes), edges, initial, self.warm_iterations, self.warm_temperature)
+
+    @staticmethod
+    def _numbered(graph: Any) -> Tuple[List[int], np.ndarray]:
+        nodes = sorted(graph.nodes())
+        rows = {node: row for row, node in enumerate(nodes)}
+        edges = np.array([(rows[u], rows[v]) for u, v in edge_set(graph)], dtype=int).reshape(-1, 2)
+        return nodes, edges
+
+
+def game_layout(game: Any, **kwargs) -> Layout:
+    """Layout of a game, created on first use and kept on the game (game.layout)
+
+    Args:
+        game: Game
+        **kwargs: Parameters of the Layout, when it is created
+
+    Returns:
+        Layout
+    """
+    if game.layout is None:
+        game.layout = Layout(game.history, **kwargs)
+    return game.layout
@@ -0,0 +1,100 @@
+"""Module hosting the metrics collected on a game while it is played
+
+Metrics (ngt.functions.metrics.MacroMetric, MicroMetric) registered on a game are computed once per round, at the
+end of play_round, and stored column by column: one array per metric, one row per round (time step). Macro
+metrics give 1-D arrays, micro metrics give 2-D arrays (round x node, nodes in sorted order, NaN for nodes not in
+the graph yet).
+
+Example::
+
+    game = Game(graph=graph, metrics=[MacroMetric.density, MicroMetric.betweenness_centrality])
+    game.play_game()
+    game.metrics[MacroMetric.density]                   # density of every round
+    game.metrics[MicroMetric.betweenness_centrality][:, 3]  # betweenness of node 3 over time
+
+"""
+from typing import Dict, List, Any, Iterable
+
+import numpy as np
+
+from ngt.functions.metrics import MacroMetric, MicroMetric, metrics_functions
+
+
+class Metrics:
+    """Columnar values of the metrics registered on a game"""
+    def __init__(self, metrics: Iterable[Any] = ()):
+        """Standard init method
+
+        Args:
+            metrics: Metrics to collect (MacroMetric or MicroMetric)
+        """
+        self._columns = {}  # type: Dict[Any, List[Any]]
+        self._arrays = {}  # type: Dict[Any, np.ndarray]
+        for metric in metrics:
+            self.register(metric)
+
+    def register(self, metric: Any) -> None:
+        """Collect a metric from now on (rounds already played are computed on the next collect)
+
+        Args:
+            metric: MacroMetric or MicroMetric
+
+        Returns:
+            None
+        """
+        if metric not in metrics_functions:
+            raise Exception(f"Unknown metric {metric}")
+        self._columns.setdefault(metric, [])
+
+    @property
+    def metrics(self) -> List[Any]:
+        """Registered metrics"""
+        return list(self._columns)
+
+    def collect(self, history: Any) -> None:
+        """Compute the metrics of the rounds of the history not collected yet
+
+        Args:
+            history: History of the game
+
+        Returns:
+            None
+        """
+        for metric, column in self._columns.items():
+            if len(column) < len(history):
+                function = metrics_functions[metric]
+                column.extend(function(history.graph(time_step)) for time_step in range(len(column), len(history)))
+                self._arrays.pop(metric, None)
+
+    @property
+    def time_steps(self) -> np.ndarray:
+        """Time steps of the rows"""
+        return np.arange(max((len(column) for column in self._columns.values()), default=0))
+
+    def __getitem__(self, metric: Any) -> np.ndarray:
+        """Values of a metric for every round collected
+
+        Args:
+            metric: MacroMetric, MicroMetric or the value of one of them (eg: "macro_density")
+
+        Returns:
+            1-D array (macro metric) or 2-D array round x node (micro metric)
+        """
+        if isinstance(metric, str):
+            metric = MacroMetric(metric) if metric.startswith('macro') else MicroMetric(metric)
+        if metric not in self._arrays:
+            column = self._columns[metric]
+            if isinstance(metric, MacroMetric):
+                array = np.array(column, dtype=float)
+            else:
+                array = np.full((len(column), max((len(row) for row in column), default=0)), np.nan)
+                for time_step, row in enumerate(column):
+                    array[time_step, :len(row)] = row
+            self._arrays[metric] = array
+        return self._arrays[metric]
+
+    def __contains__(self, metric: Any) -> bool:
+        return metric in self._columns
+
+    def __len__(self) -> int:
+        return len(self.time_steps)
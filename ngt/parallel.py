@@ -0,0 +1,69 @@
+"""Module hosting the process pools shared by the simulation
+
+Pools are created on first use and kept alive until the interpreter exits (or shutdown_pools is called) so that
+the start up cost of the workers is paid once per process rather than once per move.
+
+"""
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable
+
+_pools = {}  # type: Dict[int, ProcessPoolExecutor]
+
+
+def get_pool(nb_workers: int) -> ProcessPoolExecutor:
+    """Fetch the process pool with the given number of workers, creating it if needed
+
+    Args:
+        nb_workers: Number of worker processes
+
+    Returns:
+        Process pool
+    """
+    pool = _pools.get(nb_workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=nb_workers)
+        _pools[nb_workers] = pool
+    return pool
+
+
+def discard_pool(nb_workers: int) -> None:
+    """Forget a pool (eg: broken by the death of a worker) so that the next get_pool creates a new one
+
+    Args:
+        nb_workers: Number of worker processes of the pool
+
+    Returns:
+        None
+    """
+    pool = _pools.pop(nb_workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def shutdown_pools() -> None:
+    """Shutdown every pool created by get_pool
+
+    Returns:
+        None
+    """
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown(wait=True)
+
+
+def chunks(items: List[Any], chunk_size: int) -> Iterable[List[Any]]:
+    """Split a list in consecutive chunks
+
+    Args:
+        items: List to split
+        chunk_size: Maximum number of items per chunk
+
+    Returns:
+        Iterator over the chunks, in order
+    """
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+atexit.register(shutdown_pools)
@@ -21,6 +21,7 @@ from ngt.functions.action_strategy import ActionStrategy
 from ngt.functions.reaction_strategy import ReactionStrategy
 from ngt.functions.state_representation import StateRepresentation
 from ngt.functions.utility import Utility
+from ngt.functions.utility_cache import CachedUtility
 
 from typing import Dict, Tuple, Any
 
@@ -58,6 +59,9 @@ class Player:
         self.state_representation_function = kwargs.get('state_representation_function',
                                                         StateRepresentation.full_history)
         self.utility_function = kwargs.get('utility_function', Utility.betweenness_centrality)
+        # memoize the utility when a ngt.functions.utility_cache.UtilityCache is given
+        if kwargs.get('utility_cache') is not None:
+            self.utility_function = CachedUtility(self.utility_function, kwargs['utility_cache'])
         self.action_strategy = kwargs.get('action_strategy', ActionStrategy.myopic_greedy)
         self.reaction_strategy = kwargs.get('reaction_strategy', ReactionStrategy.inactive)
 
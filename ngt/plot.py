@@ -13,7 +13,12 @@ Todo:
 
 import networkx as nx
 import math
+from collections import OrderedDict
+from collections.abc import Mapping
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.path import Path
 
 from ngt.player import EntityType
 from ngt.rules import ActionSpace, Rules
@@ -21,6 +26,12 @@ from ngt.increment import Increment
 from ngt.utils import fetch_adequate_function, check_action_type, save_object, load_object, make_sure_path_exists
 from ngt.utils import get_players_id, get_increments_id
 from ngt.functions.update_environment import update_environment_functions
+from ngt.graph import as_networkx
+from ngt.history import edge_set
+from ngt.parallel import get_pool
+from ngt.functions.betweenness import betweenness
+from ngt.functions.metrics import MicroMetric
+from ngt.layout import Layout, game_layout
 
 from typing import Dict, Tuple, Any
 from networkx import Graph
@@ -30,7 +41,20 @@ Actions = Dict[int, Any]
 Reactions = Dict[int, bool]
 
 
-def get_positions(game):
+def get_positions(game, layout='circle'):
+    """Positions of the nodes
+
+    Args:
+        game: Game
+        layout: 'circle' (nodes on a circle) or 'force' (force directed layout of every round, see ngt.layout)
+
+    Returns:
+        Map from node to position, or Layout giving the positions at every round
+    """
+    if layout == 'force':
+        return game_layout(game)
+    if layout != 'circle':
+        raise Exception(f"Unknown layout {layout}")
     nb_nodes = len(game.graph.nodes())
     positions = {}
     for i in range(nb_nodes):
@@ -52,10 +76,28 @@ def get_colors(game):
     return colors
 
 
+def round_centralities(game, round_number):
+    """Betweenness centrality of the nodes at the end of a round, reusing the values collected in game.metrics
+
+    Args:
+        game: Game
+        round_number: Time step of the round
+
+    Returns:
+        Map from node to its betweenness centrality
+    """
+    graph = game.history.graph(round_number)
+    metrics = getattr(game, 'metrics', None)
+    if metrics is not None and MicroMetric.betweenness_centrality in metrics:
+        recorded = metrics[MicroMetric.betweenness_centrality]
+        if round_number < len(recorded):
+            return {node: recorded[round_number][k] for k, node in enumerate(sorted(graph.nodes()))}
+    return betweenness(graph)
+
+
 def get_leader_board(game, round_number):
 
-    current_graph = game.history[round_number].graph
-    betweenness = nx.betweenness_centrality(current_graph)
+    betweenness = round_centralities(game, round_number)
 
     inverse_table = [(value, key) for key, value in betweenness.items()]
     inverse_table = sorted(inverse_table, reverse=True)
@@ -63,19 +105,90 @@ def get_leader_board(game, round_number):
     return inverse_table
 
 
-def get_labels_sizes_lboards(game, significant_digits=4, leader_board_size=3, node_list=None):
+class FrameData:
+    """Labels, sizes and leader board of the rounds of a game, computed on demand and cached
 
-    labels = {}
-    sizes = {}
-    leader_boards = {}
+    Centralities recorded in game.metrics are reused. When nb_workers is given, prefetch(round_number) computes
+    the centralities of the next rounds in a process pool while the current one is displayed.
+    """
+    def __init__(self, game, significant_digits=4, leader_board_size=3, node_list=None, cache_size=256,
+                 nb_workers=0, prefetch_size=8):
+        """Standard init method
+
+        Args:
+            game: Game
+            significant_digits: Digits of the centralities displayed
+            leader_board_size: Number of nodes in the leader board
+            node_list: Nodes to label (every node if None)
+            cache_size: Maximum number of frames kept in memory
+            nb_workers: Number of processes prefetching the frames (0 disables prefetching)
+            prefetch_size: Number of rounds prefetched ahead of the one displayed
+        """
+        self.game = game
+        self.significant_digits = significant_digits
+        self.leader_board_size = leader_board_size
+        self.node_list = node_list
+        self.cache_size = cache_size
+        self.nb_workers = nb_workers
+        self.prefetch_size = prefetch_size
+        self._cache = OrderedDict()
+        self._pending = {}
+        self.labels = _FrameView(self, 0)
+        self.sizes = _FrameView(self, 1)
+        self.leader_boards = _FrameView(self, 2)
+
+    def __getitem__(self, round_number):
+        """Frame data of a round
+
+        Args:
+            round_number: Time step of the round
+
+        Returns:
+            Labels (node -> text), sizes (list in node order) and leader board (text) of the round
+        """
+        if round_number in self._cache:
+            self._cache.move_to_end(round_number)
+            return self._cache[round_number]
+        if round_number not in self.game.history:
+            raise KeyError(round_number)
+
+        pending = self._pending.pop(round_number, None)
+        centralities = pending.result() if pending is not None else round_centralities(self.game, round_number)
 
-    for round_number in range(len(game.history)):
+        frame = self._build(round_number, centralities)
+        self._cache[round_number] = frame
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return frame
 
-        current_graph = game.history[round_number].graph
+    def __len__(self):
+        return len(self.game.history)
 
-        betweenness = nx.betweenness_centrality(current_graph)
+    def prefetch(self, round_number):
+        """Start computing the centralities of the rounds following a round, in the background
+
+        Args:
+            round_number: Time step of the round being displayed
+
+        Returns:
+            None
+        """
+        if not self.nb_workers:
+            return
+        pool = get_pool(self.nb_workers)
+        for next_round in range(round_number + 1, min(len(self.game.history), round_number + 1 + self.prefetch_size)):
+            if next_round not in self._cache and next_round not in self._pending:
+                metrics = getattr(self.game, 'metrics', None)
+                if metrics is not None and MicroMetric.betweenness_centrality in metrics \
+                        and next_round < len(metrics[MicroMetric.betweenness_centrality]):
+                    continue
+                self._pending[next_round] = pool.submit(betweenness, self.game.history.graph(next_round))
 
-        sizes_round = [(10 * c + 1) * 300 for c in list(betweenness.values())]
+    def _build(self, round_number, betweenness):
+
+        current_graph = self.game.history.graph(round_number)
+
+        sizes_round = [(10 * betweenness[node] + 1) * 300 for node in current_graph.nodes()]
 
         inverse_table = sorted([(value, key) for key, value in betweenness.items()], reverse=True)
 
@@ -83,46 +196,234 @@ def get_labels_sizes_lboards(game, significant_digits=4, leader_board_size=3, no
             map(
                 lambda x: str(x[0] + 1) + ". " +
                           # str(game.players[x[1][1]].name) + ": " +
-                          str(round(x[1][0], significant_digits)),
-                enumerate(inverse_table[:leader_board_size])
+                          str(round(x[1][0], self.significant_digits)),
+                enumerate(inverse_table[:self.leader_board_size])
             )
         )
 
-
         labels_round = {}
         for i in range(len(current_graph.nodes())):
-            label = "node #" + str(i) + "\n" + str(round(betweenness[i], significant_digits)) + "\n"
-            if i in game.players.keys():
-                label += game.players[i].profile.name + "\n"
+            label = "node #" + str(i) + "\n" + str(round(betweenness[i], self.significant_digits)) + "\n"
+            if i in self.game.players.keys():
+                label += self.game.players[i].profile.name + "\n"
             labels_round[i] = label
 
-        if node_list is not None:
-            labels_round = {key: value for (key, value) in labels_round.items() if key in node_list}
+        if self.node_list is not None:
+            labels_round = {key: value for (key, value) in labels_round.items() if key in self.node_list}
 
-        # What about sizes?
+        return labels_round, sizes_round, leader_board
 
-        labels[round_number] = labels_round
-        sizes[round_number] = sizes_round
-        leader_boards[round_number] = leader_board
 
-    return labels, sizes, leader_boards
+class _FrameView(Mapping):
+    """Round -> one of the items of the frame data (labels, sizes or leader board)"""
+    def __init__(self, frames, index):
+        self.frames = frames
+        self.index = index
 
+    def __getitem__(self, round_number):
+        return self.frames[round_number][self.index]
 
-def _display_graph(graph, positions, labels, colors, sizes, alpha, leader_board=None, display_labels=False, **kwargs):
+    def __iter__(self):
+        return iter(self.frames.game.history)
 
-    if leader_board:
-        plt.axis([-1.5, 2, -2, 2])
-        plt.axis('off')
-        plt.text(1.5, 2, leader_board)
-    else:
-        plt.axis([-2, 2, -2, 2])
-        plt.axis('off')
+    def __len__(self):
+        return len(self.frames)
+
+
+def get_labels_sizes_lboards(game, significant_digits=4, leader_board_size=3, node_list=None, nb_workers=0):
+    """Labels, sizes and leader boards of every round, computed when first accessed (see FrameData)
+
+    Returns:
+        Mappings from round to labels, to sizes and to leader board
+    """
+    frames = FrameData(game, significant_digits, leader_board_size, node_list, nb_workers=nb_workers)
+    return frames.labels, frames.sizes, frames.leader_boards
+
+
+class GraphRenderer:
+    """Draw the rounds of a game on an axes, updating the artists of the previous frame rather than redrawing
+
+    Nodes are one PathCollection and edges one LineCollection, created once. Moving to another round only
+    replaces the paths of the edges toggled in between (taken from the history differences) and the sizes, labels
+    and leader board; with blitting, only those artists are drawn again over a cached background. With a Layout
+    as positions, the nodes and edges are moved to the positions of each round displayed.
+    """
+    def __init__(self, ax, game, positions, colors, labels, sizes, leader_boards=None, node_transparency=0.3,
+                 display_labels=False, blit=True):
+        """Standard init method
+
+        Args:
+            ax: Matplotlib axes
+            game: Game
+            positions: Map from node to position, or Layout giving the positions at every round
+            colors: Color of each node, in node order
+            labels: Map from round to the labels of the nodes (eg: FrameData.labels)
+            sizes: Map from round to the sizes of the nodes, in node order
+            leader_boards: Map from round to leader board (no leader board if None)
+            node_transparency: Alpha of nodes and edges
+            display_labels: Display the labels of the nodes
+            blit: Use blitting when the canvas supports it
+        """
+        self.ax = ax
+        self.game = game
+        self.layout = positions if isinstance(positions, Layout) else None
+        self.positions = None if self.layout is not None else positions
+        self.colors = colors
+        self.labels_of = labels
+        self.sizes_of = sizes
+        self.leader_boards = leader_boards
+        self.node_transparency = node_transparency
+        self.leader_board = leader_boards is not None
+        self.canvas = ax.figure.canvas
+        self.blit = blit and getattr(self.canvas, 'supports_blit', False)
+        self.background = None
+        self.round_number = None
+        self.nodes = None
+        self.edges = None
+        self.labels = []
+        self.leader_board_text = None
+        self.nodes_order = []
+        self._edge_slots = {}
+        self._slot_edges = []
+        self._display_labels = display_labels
+        if self.blit:
+            self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _setup(self, round_number):
+        """Create the artists for the graph of a round"""
+        ax = self.ax
+        ax.cla()
+        if self.leader_board:
+            ax.axis([-1.5, 2, -2, 2])
+        else:
+            ax.axis([-2, 2, -2, 2])
+        ax.axis('off')
+
+        graph = self.game.history.graph(round_number)
+        if self.layout is not None:
+            self.positions = self.layout[round_number]
+        self.nodes_order = list(graph.nodes())
+        offsets = np.array([self.positions[node] for node in self.nodes_order], dtype=float).reshape(-1, 2)
+        self.nodes = ax.scatter(offsets[:, 0], offsets[:, 1], s=self.sizes_of[round_number],
+                                c=[self.colors[node] for node in self.nodes_order], alpha=self.node_transparency,
+                                zorder=2, animated=self.blit)
+
+        self._slot_edges = sorted(edge_set(graph))
+        self._edge_slots = {edge: slot for slot, edge in enumerate(self._slot_edges)}
+        self.edges = LineCollection([self._segment(edge).vertices for edge in self._slot_edges], colors='k',
+                                    alpha=self.node_transparency, zorder=1, animated=self.blit)
+        ax.add_collection(self.edges)
+
+        self.labels = [ax.text(*self.positions[node], '', ha='center', va='center', zorder=3,
+                               visible=self._display_labels, animated=self.blit) for node in self.nodes_order]
+        self.leader_board_text = ax.text(1.5, 2, '', va='top', animated=self.blit)
+        self.round_number = round_number
+        self.background = None
+
+    def _segment(self, edge):
+        u, v = edge
+        return Path([self.positions[u], self.positions[v]])
+
+    def _add_edge(self, edge):
+        self._edge_slots[edge] = len(self._slot_edges)
+        self._slot_edges.append(edge)
+        self.edges.get_paths().append(self._segment(edge))
+
+    def _remove_edge(self, edge):
+        # the last edge takes the slot of the removed one
+        paths = self.edges.get_paths()
+        slot = self._edge_slots.pop(edge)
+        last_edge = self._slot_edges.pop()
+        last_path = paths.pop()
+        if last_edge != edge:
+            self._slot_edges[slot] = last_edge
+            self._edge_slots[last_edge] = slot
+            paths[slot] = last_path
+
+    def _move(self):
+        """Move nodes, edges and labels to the current positions"""
+        offsets = np.array([self.positions[node] for node in self.nodes_order], dtype=float).reshape(-1, 2)
+        self.nodes.set_offsets(offsets)
+        self.edges.set_segments([(self.positions[u], self.positions[v]) for u, v in self._slot_edges])
+        for node, label in zip(self.nodes_order, self.labels):
+            label.set_position(self.positions[node])
+
+    def edges_drawn(self):
+        """Edges currently drawn
+
+        Returns:
+            Set of edges, each written (smallest node, largest node)
+        """
+        return set(self._edge_slots)
+
+    def set_labels_visible(self, visible):
+        """Show or hide the labels of the nodes
+
+        Args:
+            visible: Boolean indicating the labels are shown
+
+        Returns:
+            None
+        """
+        self._display_labels = visible
+        for label in self.labels:
+            label.set_visible(visible)
+        self._refresh()
+
+    def render(self, round_number):
+        """Display a round
+
+        Args:
+            round_number: Time step of the round
+
+        Returns:
+            None
+        """
+        graph = self.game.history.graph(round_number)
+        if self.round_number is None or len(graph) != len(self.nodes_order):
+            self._setup(round_number)
+        else:
+            positions = self.positions
+            if self.layout is not None:
+                self.positions = self.layout[round_number]
+            added, removed = self.game.history.edge_changes(self.round_number, round_number)
+            for edge in removed:
+                self._remove_edge(edge)
+            for edge in added:
+                self._add_edge(edge)
+            if self.positions is not positions:
+                self._move()
+            self.edges.stale = True
+            self.round_number = round_number
+
+        self.nodes.set_sizes(self.sizes_of[round_number])
+        labels = self.labels_of[round_number]
+        for node, label in zip(self.nodes_order, self.labels):
+            label.set_text(labels.get(node, ''))
+        self.leader_board_text.set_text(self.leader_boards[round_number] if self.leader_board else '')
+        self._refresh()
+
+    def artists(self):
+        return [self.edges, self.nodes] + self.labels + [self.leader_board_text]
+
+    def _on_draw(self, event):
+        # full redraw (first display, resize): keep the background and draw the artists over it
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists():
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def _refresh(self):
+        if self.blit and self.background is not None:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw_idle()
 
-    if display_labels:
-        nx.draw_networkx(graph, positions, labels=labels, node_color=colors,
-                         node_size=sizes, alpha=alpha, **kwargs)
-    else:
-        nx.draw_networkx(graph, positions, node_color=colors, alpha=alpha, **kwargs)
 
 current_interactive_graph = 0
 labels_interactive_graph = False
@@ -140,24 +441,30 @@ def plot(game,
          time_step=0.05,
          node_list=None,
          leader_board=False,
-         leader_board_size=3):
+         leader_board_size=3,
+         nb_workers=0,
+         layout='circle'):
 
     global current_interactive_graph
     global labels_interactive_graph
 
     if not positions:
-        positions = get_positions(game)
+        positions = get_positions(game, layout)
     if not colors:
         colors = get_colors(game)
 
-    graphs = {i: increment.graph for i, increment in game.history.items()}
+    # frames (graph, labels, sizes, leader board) are computed when displayed, the next ones being prefetched by
+    # nb_workers processes
+    frames = FrameData(game, significant_digits, leader_board_size, node_list, nb_workers=nb_workers)
 
+    leader_boards = frames.leader_boards
     if not labels or not sizes or leader_board:
-        labels, sizes, leader_boards = get_labels_sizes_lboards(game)
-    # if not sizes:
-    #     sizes = get_sizes(game)
-    # if leader_board:
-    #     leader_board_strings = get_leader_boards(game)
+        labels, sizes = frames.labels, frames.sizes
+
+    def renderer_of(ax, display):
+        # artists are created once and updated with the edges toggled between the rounds displayed
+        return GraphRenderer(ax, game, positions, colors, labels, sizes, leader_boards if leader_board else None,
+                             node_transparency, display_labels=display)
 
     if interactive:
 
@@ -173,42 +480,29 @@ def plot(game,
                 current_interactive_graph -= 1
             elif e.key == "up":
                 labels_interactive_graph = True
+                renderer.set_labels_visible(True)
+                return
             elif e.key == "down":
                 labels_interactive_graph = False
+                renderer.set_labels_visible(False)
+                return
             else:
                 return
 
-            current_interactive_graph %= len(graphs)
+            current_interactive_graph %= len(game.history)
             curr_pos = current_interactive_graph
 
-            ax.cla()
-
-            graph = graphs[curr_pos][0]
-            labels = graphs[curr_pos][1]
-            sizes = graphs[curr_pos][2]
-            leader_board_str = ''
-            if leader_board:
-                leader_board_str = _get_leader_board(game, curr_pos, leader_board_size, significant_digits)
-
-            _display_graph(graph, positions, labels, colors, sizes, alpha, leader_board=leader_board_str,
-                           display_labels=labels_interactive_graph, game=game)
-
-            fig.canvas.draw()
+            frames.prefetch(curr_pos)
+            renderer.render(curr_pos)
 
         fig = plt.figure()
 
         fig.canvas.mpl_connect('key_press_event', key_event)
         ax = fig.add_subplot(111)
 
-        graph = graphs[0][0]
-        labels = graphs[0][1]
-        sizes = graphs[0][2]
-        leader_board_str = ''
-        if leader_board:
-            leader_board_str = _get_leader_board(game, 0, leader_board_size, significant_digits)
-
-        _display_graph(graph, positions, labels, colors, sizes, alpha, leader_board=leader_board_str,
-                       display_labels=labels_interactive_graph, game=game)
+        renderer = renderer_of(ax, labels_interactive_graph)
+        frames.prefetch(0)
+        renderer.render(0)
 
         plt.show()
 
@@ -216,20 +510,13 @@ def plot(game,
 
         plt.ion()
 
-        for round_number in range(len(game.history)):
-
-            plt.clf()
-
-            graph = graphs[round_number]
-            labels2 = labels[round_number]
-            sizes2 = sizes[round_number]
+        fig = plt.figure()
+        renderer = renderer_of(fig.add_subplot(111), display_labels)
 
-            leader_board_str = ''
-            if leader_board:
-                leader_board_str = leader_boards[round_number]
+        for round_number in range(len(game.history)):
 
-            _display_graph(graph, positions, labels2, colors, sizes2, node_transparency, leader_board=leader_board_str,
-                           display_labels=display_labels, game=game)
+            frames.prefetch(round_number)
+            renderer.render(round_number)
 
             # Pause to record video for presentations
             # if round_number == 0:
@@ -237,8 +524,9 @@ def plot(game,
 
             plt.pause(time_step)
 
-        while True:
-            plt.pause(0.05)
+        # keep the last frame on screen until the window is closed (returns at once on non-interactive backends)
+        plt.ioff()
+        plt.show()
 
 
 
@@ -250,33 +538,24 @@ class Plotter:
     Helper functions to build artists to plot metrics given axes ref
     """
     def build_plot_macro(self, game, round_number, metric, ax):
-        df = game.metrics.iloc[:round_number+1, :]
-        pl = ax.plot(df.index.values, df[metric.value])
+        values = game.metrics[metric][:round_number+1]
+        pl = ax.plot(game.metrics.time_steps[:round_number+1], values)
         plt.title(" ".join(metric.value.split("_")[1:]))
-        plt.axis([-1, len(game.history)+1, df[metric.value].min()-1, df[metric.value].max()+1])
+        plt.axis([-1, len(game.history)+1, np.nanmin(values)-1, np.nanmax(values)+1])
         return pl
 
     def build_plot_micro(self, game, round_number, node_ids, metric, ax):
-        df = game.metrics.iloc[:round_number+1, :]
+        values = game.metrics[metric][:round_number+1]
+        time_steps = game.metrics.time_steps[:round_number+1]
         for i in node_ids:
-            val = df[metric.value].apply(lambda x: x[i])
-            pl = ax.plot(df.index.values, val)
+            pl = ax.plot(time_steps, values[:, i])
             plt.title(" ".join(metric.value.split("_")[1:]))
-            # plt.axis([-1, len(game.history)+1, min(df[metric.value].apply(min)) -1, max(df[metric.value].apply(max)) +1])
         return pl
-    # ill coded, return pl? / could also apply and create new col instead of slicing every time
 
     def build_plot_micro_distrib(self, game, round_number, metric, ax):
         # Superpose hist only if you can find colors shade that make the intent obvious
-
-        # df = game.metrics.iloc[:round_number+1, :]
-        # val = df[metric.value].apply(lambda x: list(x.values()))
-        # for i in range(round_number+1):
-        #     hi = ax.hist(val[i], alpha=(i*0.05+0.2), color='b')
-        # return hi
-        df = game.metrics.iloc[:round_number+1, :]
-        val = df[metric.value].apply(lambda x: list(x.values()))
-        hi = ax.hist(val[round_number], alpha=0.5, color='b')
+        values = game.metrics[metric][round_number]
+        hi = ax.hist(values[~np.isnan(values)], alpha=0.5, color='b')
         plt.title((" ".join(metric.value.split("_")[1:]) + " distribution"))
         return hi
 
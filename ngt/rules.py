@@ -4,6 +4,9 @@ Instances of those classes define the action space, the number of players and nu
 
 """
 from enum import Enum
+from typing import Dict, List, Tuple, Any, FrozenSet
+
+import numpy as np
 
 
 class ActionSpace(Enum):
@@ -16,5 +19,139 @@ class Rules:
     def __init__(self, **kwargs):
         self.nb_players = kwargs.get('nb_players', 10)
         self.nb_time_steps = kwargs.get('nb_time_steps', 10)
+        # impossible edges compiled once, see action_mask (rebuilt when impossible_actions is replaced, call
+        # recompile after modifying it in place)
+        self._compiled = {}  # type: Dict[Any, Any]
         self.impossible_actions = kwargs.get('impossible_actions', set())
         self.action_space = kwargs.get('action_space', ActionSpace.edge)
+        # number of processes used by strategies evaluating candidate actions (1 means serial evaluation)
+        self.nb_workers = kwargs.get('nb_workers', 1)
+        # number of processes computing the actions/reactions of the bots of a round (1 means one bot after the other)
+        self.nb_player_workers = kwargs.get('nb_player_workers', 1)
+        # score the candidate actions of the myopic greedy players once for all of them rather than once per player
+        # (same actions, opt-in)
+        self.batch_evaluation = kwargs.get('batch_evaluation', False)
+        # number of candidate actions per task sent to a worker (None lets the strategy choose)
+        self.chunk_size = kwargs.get('chunk_size', None)
+        # skip the candidate actions of the myopic greedy players whose utility can't beat the best one found
+        self.branch_and_bound = kwargs.get('branch_and_bound', True)
+        # number of best candidates scored again with the exact utility when a strategy uses an approximate one
+        self.nb_exact_checks = kwargs.get('nb_exact_checks', 3)
+        # virus propagation (node action space): probability for an infected node to infect each of its neighbours
+        # and to recover during a round
+        self.infection_probability = kwargs.get('infection_probability', 0.1)
+        self.recovery_probability = kwargs.get('recovery_probability', 0.)
+        # default cascades (boolean action space): capital added to the banks accepting the policy, probability for
+        # a bank to default after an external shock during a round and share of an exposure lost on a default
+        self.policy_capital = kwargs.get('policy_capital', 0.5)
+        self.shock_probability = kwargs.get('shock_probability', 0.01)
+        self.loss_given_default = kwargs.get('loss_given_default', 1.)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # compiled constraints are rebuilt where needed rather than sent to worker processes and archives
+        state = self.__dict__.copy()
+        state['_compiled'] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = dict(state)
+        # rules pickled by previous versions
+        if 'impossible_actions' in state:
+            state['_impossible_actions'] = state.pop('impossible_actions')
+        state.pop('_compiled_signature', None)
+        self.__dict__.update(state)
+        self._compiled = {}
+
+    @property
+    def impossible_actions(self) -> Any:
+        """Actions no player can make (replacing them recompiles the constraints, see recompile)"""
+        return self._impossible_actions
+
+    @impossible_actions.setter
+    def impossible_actions(self, impossible_actions: Any) -> None:
+        self._impossible_actions = impossible_actions
+        self.recompile()
+
+    def recompile(self) -> None:
+        """Drop the compiled constraints, to be called after modifying impossible_actions in place
+
+        Returns:
+            None
+        """
+        self._compiled = {}
+
+    def impossible_edges(self) -> FrozenSet[Tuple[int, int]]:
+        """Impossible edges, each written (smallest node, largest node)
+
+        Returns:
+            Set of edges
+        """
+        compiled = self._compiled
+        if 'edges' not in compiled:
+            compiled['edges'] = frozenset((min(action), max(action)) for action in self.impossible_actions
+                                          if isinstance(action, tuple) and len(action) == 2)
+        return compiled['edges']
+
+    def action_mask(self, nb_nodes: int) -> np.ndarray:
+        """Possible edges of a graph whose nodes are numbered from 0, as a packed upper triangular mask
+
+        Edge (i, j), i < j, is at index edge_index(i, j, nb_nodes), that is in the order of
+        itertools.combinations(range(nb_nodes), 2).
+
+        Args:
+            nb_nodes: Number of nodes
+
+        Returns:
+            Boolean array of length nb_nodes * (nb_nodes - 1) / 2, True for the possible edges
+        """
+        compiled = self._compiled
+        if ('mask', nb_nodes) not in compiled:
+            mask = np.ones(nb_nodes * (nb_nodes - 1) // 2, dtype=bool)
+            edges = np.array(sorted(self.impossible_edges()), dtype=int).reshape(-1, 2)
+            edges = edges[(edges[:, 0] >= 0) & (edges[:, 0] < edges[:, 1]) & (edges[:, 1] < nb_nodes)]
+            mask[edge_index(edges[:, 0], edges[:, 1], nb_nodes)] = False
+            compiled['mask', nb_nodes] = mask
+        return compiled['mask', nb_nodes]
+
+    def candidate_edges(self, nb_nodes: int) -> List[Tuple[int, int]]:
+        """Possible edges of a graph whose nodes are numbered from 0 (the list is shared, don't modify it)
+
+        Args:
+            nb_nodes: Number of nodes
+
+        Returns:
+            List of edges (i, j), i < j, in the order of itertools.combinations(range(nb_nodes), 2)
+        """
+        compiled = self._compiled
+        if ('candidates', nb_nodes) not in compiled:
+            rows, columns = np.triu_indices(nb_nodes, 1)
+            mask = self.action_mask(nb_nodes)
+            compiled['candidates', nb_nodes] = list(zip(rows[mask].tolist(), columns[mask].tolist()))
+        return compiled['candidates', nb_nodes]
+
+    def is_possible(self, action: Any) -> bool:
+        """Check an action is not one of the impossible actions (edges in either orientation)
+
+        Args:
+            action: Action of a player
+
+        Returns:
+            Boolean indicating the action is possible
+        """
+        if self.action_space is ActionSpace.edge and isinstance(action, tuple) and len(action) == 2:
+            return (min(action), max(action)) not in self.impossible_edges()
+        return action not in self.impossible_actions
+
+
+def edge_index(i: Any, j: Any, nb_nodes: int) -> Any:
+    """Index of the edge (i, j), i < j, in the packed upper triangular mask of Rules.action_mask
+
+    Args:
+        i: Smallest node (int or array)
+        j: Largest node (int or array)
+        nb_nodes: Number of nodes
+
+    Returns:
+        Index (int or array)
+    """
+    return i * nb_nodes - i * (i + 1) // 2 + j - i - 1
@@ -0,0 +1,65 @@
+import unittest
+import functools
+import networkx as nx
+from ngt.rules import Rules
+from ngt.increment import Increment
+from ngt.functions.action_strategy import myopic_greedy, batched_myopic_greedy
+from ngt.functions.utility import Utility
+
+
+class TestMyopicGreedy(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = Rules(impossible_actions={(0, 1), (3, 2)})
+        self.history = {0: Increment(graph=nx.gnm_random_graph(15, 25, seed=4))}
+
+    def test_parallel_matches_serial(self):
+        for node_id in range(0, 15, 3):
+            serial = myopic_greedy(self.rules, self.history, Utility.betweenness_centrality, node_id)
+            parallel = myopic_greedy(self.rules, self.history, Utility.betweenness_centrality, node_id,
+                                     nb_workers=2, chunk_size=7)
+            self.assertEqual(serial, parallel)
+
+    def test_branch_and_bound(self):
+        unpruned = Rules(impossible_actions={(0, 1), (3, 2)}, branch_and_bound=False)
+        for graph in [self.history[0].graph, nx.gnm_random_graph(15, 12, seed=5), nx.gnm_random_graph(15, 40, seed=6)]:
+            history = {0: Increment(graph=graph)}
+            for node_id in range(0, 15, 2):
+                self.assertEqual(myopic_greedy(self.rules, history, Utility.betweenness_centrality, node_id),
+                                 myopic_greedy(unpruned, history, Utility.betweenness_centrality, node_id))
+
+    def test_exact_checks_on_approximate_utility(self):
+        utility = functools.partial(Utility.approximate_betweenness_centrality, nb_samples=5, seed=1)
+        for node_id in range(0, 15, 3):
+            serial = myopic_greedy(self.rules, self.history, utility, node_id)
+            parallel = myopic_greedy(self.rules, self.history, utility, node_id, nb_workers=2, chunk_size=7)
+            self.assertEqual(serial, parallel)
+            if serial is not None:
+                toggled = self.history[0].graph.copy()
+                if toggled.has_edge(*serial):
+                    toggled.remove_edge(*serial)
+                else:
+                    toggled.add_edge(*serial)
+                self.assertGreater(Utility.betweenness_centrality(toggled, node_id),
+                                   Utility.betweenness_centrality(self.history[0].graph, node_id))
+
+
+class TestBatchedMyopicGreedy(unittest.TestCase):
+
+    def test_matches_myopic_greedy(self):
+        rules = Rules(impossible_actions={(0, 1), (3, 2)})
+        history = {0: Increment(graph=nx.gnm_random_graph(15, 25, seed=4))}
+        node_ids = list(range(0, 15, 2))
+        expected = {node_id: myopic_greedy(rules, history, Utility.betweenness_centrality, node_id)
+                    for node_id in node_ids}
+        self.assertEqual(batched_myopic_greedy(rules, history, node_ids), expected)
+        self.assertEqual(batched_myopic_greedy(rules, history, node_ids, nb_workers=2, chunk_size=9), expected)
+
+    def test_branch_and_bound(self):
+        unpruned = Rules(impossible_actions={(0, 1), (3, 2)}, branch_and_bound=False)
+        pruned = Rules(impossible_actions={(0, 1), (3, 2)})
+        for graph in [nx.gnm_random_graph(15, 25, seed=4), nx.gnm_random_graph(15, 12, seed=5)]:
+            history = {0: Increment(graph=graph)}
+            node_ids = list(range(0, 15, 2))
+            self.assertEqual(batched_myopic_greedy(pruned, history, node_ids),
+                             batched_myopic_greedy(unpruned, history, node_ids))
@@ -0,0 +1,121 @@
+import unittest
+import os
+import random
+import shutil
+import tempfile
+import networkx as nx
+from ngt.game import Game
+from ngt.player import Player
+from ngt.archive import ArchiveReader, ArchiveWriter
+from ngt.utils import save_object, make_sure_path_exists
+
+
+def random_toggle(rules, agent_state, utility, node_id=None):
+    nodes = list(agent_state[len(agent_state) - 1].graph.nodes())
+    return tuple(sorted(random.sample(nodes, 2)))
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'game.ngt')
+        self.game = Game(graph=nx.gnm_random_graph(10, 12, seed=2), nb_time_steps=6, nb_players=2,
+                         checkpoint_interval=4)
+        self.game.add_player(Player(name='Leo'))
+        self.game.add_player(Player(name='Marc'))
+        self.game.play_game()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def assertSameGame(self, game):
+        self.assertEqual(len(game.history), len(self.game.history))
+        self.assertEqual(game.current_time_step, self.game.current_time_step)
+        self.assertEqual(set(game.graph.edges()), set(self.game.graph.edges()))
+        self.assertEqual([str(player) for player in game.players.values()], ['Leo', 'Marc'])
+        for time_step, increment in self.game.history.items():
+            self.assertEqual(game.history[time_step].actions, increment.actions)
+            self.assertEqual(set(game.history[time_step].graph.edges()), set(increment.graph.edges()))
+
+    def test_save_load(self):
+        self.game.save(self.path)
+        self.assertSameGame(Game.load(self.path, lazy=False))
+
+    def test_lazy_load(self):
+        self.game.save(self.path)
+        game = Game.load(self.path)
+        records = game.history._records
+        self.assertEqual(len(game.history), 7)
+        self.assertEqual(list(game.history.keys()), list(range(7)))
+        self.assertEqual(set(game.graph.edges()), set(self.game.graph.edges()))
+        self.assertEqual(len(records._cache), 0)
+        self.assertSameGame(game)
+
+        # play on and save over the archive being read
+        game.rules.nb_time_steps = 8
+        game.play_game()
+        game.save(self.path)
+        self.assertEqual(len(Game.load(self.path).history), 9)
+
+    def test_load_without_index(self):
+        self.game.save(self.path)
+        # simulate a crash while writing: index and half of the trailer lost, plus an incomplete block
+        with ArchiveReader(self.path) as reader:
+            end = reader.end
+        with open(self.path, 'r+b') as archive:
+            archive.truncate(end)
+            archive.seek(end)
+            archive.write(b'R\x10')
+        self.assertSameGame(Game.load(self.path))
+
+    def test_append(self):
+        self.game.save(self.path)
+        writer = ArchiveWriter(self.path)
+        writer.write_round(7, {}, {}, self.game.graph, True)
+        writer.close(self.game.graph)
+        with ArchiveReader(self.path) as reader:
+            self.assertTrue(reader.indexed)
+            self.assertEqual([time_step for time_step, _, _ in reader.rounds()], list(range(8)))
+
+    def test_load_folder(self):
+        folder = os.path.join(self.folder, 'legacy')
+        make_sure_path_exists(folder)
+        save_object(self.game.rules, folder, "rules")
+        save_object(None, folder, "nodes_players_map")
+        save_object(self.game.current_time_step, folder, "current_time_step")
+        for id_player, player in self.game.players.items():
+            player.save(folder, id_player)
+        for time_step, increment in self.game.history.items():
+            increment.save(folder, time_step)
+        self.assertSameGame(Game.load(folder))
+
+    def test_resume_stream(self):
+        def streamed_game(stream):
+            game = Game(graph=nx.gnm_random_graph(10, 12, seed=2), nb_time_steps=8, nb_players=2, stream=stream,
+                        checkpoint_interval=3)
+            game.add_player(Player(name='Leo', action_strategy=random_toggle))
+            game.add_player(Player(name='Marc', action_strategy=random_toggle))
+            return game
+
+        random.seed(4)
+        expected = streamed_game(None)
+        expected.play_game()
+
+        # the process is killed after 5 rounds: no index was written
+        random.seed(4)
+        game = streamed_game(self.path)
+        for _ in range(5):
+            game.play_round()
+        with ArchiveReader(self.path) as reader:
+            self.assertFalse(reader.indexed)
+        random.seed(0)
+
+        game = Game.resume(self.path, background_writer=True)
+        self.assertEqual(game.current_time_step, 5)
+        game.play_game()
+        game = Game.load(self.path)
+        self.assertEqual(game.current_time_step, 8)
+        for time_step, increment in expected.history.items():
+            self.assertEqual(game.history[time_step].actions, increment.actions)
+            self.assertEqual(set(game.history[time_step].graph.edges()), set(increment.graph.edges()))
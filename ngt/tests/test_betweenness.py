@@ -0,0 +1,75 @@
+import unittest
+import itertools
+import networkx as nx
+from ngt.functions.betweenness import DynamicBetweenness, node_betweenness
+from ngt.functions.betweenness import approximate_node_betweenness, approximate_betweenness
+
+
+class TestDynamicBetweenness(unittest.TestCase):
+
+    def setUp(self):
+        self.graphs = [
+            nx.gnm_random_graph(12, 15, seed=1),
+            nx.gnm_random_graph(12, 30, seed=2),
+            nx.path_graph(6),
+        ]
+
+    def test_score_matches_networkx(self):
+        for graph in self.graphs:
+            engine = DynamicBetweenness(graph)
+            expected = nx.betweenness_centrality(graph)
+            for node in graph.nodes():
+                self.assertAlmostEqual(engine.score(node), expected[node])
+
+    def test_toggle_score_matches_networkx(self):
+        for graph in self.graphs:
+            engine = DynamicBetweenness(graph)
+            edges = set(graph.edges())
+            for u, v in itertools.combinations(range(len(graph)), 2):
+                toggled = graph.copy()
+                if toggled.has_edge(u, v):
+                    toggled.remove_edge(u, v)
+                else:
+                    toggled.add_edge(u, v)
+                expected = nx.betweenness_centrality(toggled)
+                for node in (0, u, v):
+                    self.assertAlmostEqual(engine.toggle_score(u, v, node), expected[node])
+            self.assertEqual(set(graph.edges()), edges)
+
+    def test_toggle_bound(self):
+        for graph in self.graphs + [nx.gnm_random_graph(14, 10, seed=3)]:
+            engine = DynamicBetweenness(graph)
+            for node in graph.nodes():
+                for u, v in itertools.combinations(range(len(graph)), 2):
+                    bound, exact = engine.toggle_bound(u, v, node)
+                    score = engine.toggle_score(u, v, node)
+                    if exact:
+                        self.assertEqual(score, bound)
+                    else:
+                        self.assertLessEqual(score, bound + 1e-12)
+
+
+class TestNodeBetweenness(unittest.TestCase):
+
+    def test_matches_networkx(self):
+        graph = nx.gnm_random_graph(20, 18, seed=3)
+        graph.add_edge(18, 19)
+        expected = nx.betweenness_centrality(graph)
+        for node in graph.nodes():
+            self.assertAlmostEqual(node_betweenness(graph, node), expected[node])
+
+
+class TestApproximateBetweenness(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.gnm_random_graph(40, 80, seed=5)
+
+    def test_exact_when_enough_samples(self):
+        expected = nx.betweenness_centrality(self.graph)
+        self.assertAlmostEqual(approximate_node_betweenness(self.graph, 3, 40), expected[3])
+        self.assertAlmostEqual(approximate_betweenness(self.graph, 40)[3], expected[3])
+
+    def test_reproducible_and_consistent(self):
+        estimate = approximate_node_betweenness(self.graph, 3, 10, seed=7)
+        self.assertEqual(estimate, approximate_node_betweenness(self.graph, 3, 10, seed=7))
+        self.assertAlmostEqual(estimate, approximate_betweenness(self.graph, 10, seed=7)[3])
@@ -0,0 +1,73 @@
+import unittest
+import random
+import numpy as np
+import networkx as nx
+import scipy.sparse
+from ngt.game import Game
+from ngt.player import Player
+from ngt.rules import Rules, ActionSpace
+from ngt.functions.action_strategy import ActionStrategy
+from ngt.functions.cascade import set_balance_sheets, cascade_state, default_cascade, play_cascade, losses
+
+
+class TestDefaultCascade(unittest.TestCase):
+
+    def test_chain(self):
+        # each bank is exposed to the next one, bank 3 has enough capital to absorb the loss
+        exposures = scipy.sparse.csr_matrix(np.diag([2., 2., 2., 2.], k=1))
+        capital = np.array([1., 1., 1., 3., 1.])
+        defaulted = np.array([False, False, False, False, True])
+        cascade, nb_steps = default_cascade(exposures, capital, defaulted, 1.)
+        self.assertEqual(list(cascade), [False, False, False, False, True])
+        capital[3] = 1.
+        cascade, nb_steps = default_cascade(exposures, capital, defaulted, 1.)
+        self.assertTrue(cascade.all())
+        self.assertEqual(nb_steps, 4)
+
+    def test_fixed_point(self):
+        rng = np.random.RandomState(0)
+        exposures = scipy.sparse.random(300, 300, density=0.3, random_state=rng, format='csr')
+        capital = rng.uniform(1, 8, 300)
+        defaulted = rng.random_sample(300) < 0.05
+        cascade, _ = default_cascade(exposures, capital, defaulted, 0.6)
+        # no solvent bank has losses exceeding its capital, every defaulted bank was shocked or had such losses
+        final_losses = 0.6 * exposures.dot(cascade.astype(float))
+        self.assertFalse((~cascade & (final_losses > capital)).any())
+        self.assertTrue((defaulted | (final_losses > capital))[cascade].all())
+
+    def test_policy_capital(self):
+        graph = nx.path_graph(3)
+        set_balance_sheets(graph, [1., 0.5, 1.])
+        rules = Rules(action_space=ActionSpace.boolean, shock_probability=0., policy_capital=1.)
+        play_cascade(rules, graph, np.array([False, True, False]), np.random.RandomState(0))
+        capital, _, defaulted = cascade_state(graph)
+        self.assertEqual(list(capital), [1., 1.5, 1.])
+        self.assertFalse(defaulted.any())
+        np.testing.assert_array_equal(losses(graph, 1.), [0., 0., 0.])
+
+
+class TestPolicyAcceptanceGame(unittest.TestCase):
+
+    def test_play_game(self):
+        random.seed(2)
+        graph = nx.gnm_random_graph(40, 120, seed=2)
+        set_balance_sheets(graph, np.full(40, 2.5))
+        game = Game(graph=graph, action_space=ActionSpace.boolean, nb_players=3, nb_time_steps=5,
+                    shock_probability=0.05)
+        for strategy in [ActionStrategy.prudent, ActionStrategy.random_random, ActionStrategy.random_egoist]:
+            game.add_player(Player(action_strategy=strategy))
+        game.play_game()
+
+        for time_step in range(1, 6):
+            capital, _, defaulted = cascade_state(game.history[time_step].graph)
+            _, _, previous_defaulted = cascade_state(game.history[time_step - 1].graph)
+            self.assertTrue(defaulted[previous_defaulted].all())
+            self.assertGreaterEqual(capital[2], 2.5 + 0.5 * time_step)
+
+        # the exposures never change: stored with the first round only
+        exposures = cascade_state(game.history[0].graph)[1]
+        for time_step in range(1, 6):
+            diff = game.history.record(time_step)[2]
+            self.assertNotIn('exposures', diff.attributes)
+            self.assertIn('defaulted', diff.attributes)
+            self.assertIs(cascade_state(game.history[time_step].graph)[1], exposures)
@@ -0,0 +1,70 @@
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import networkx as nx
+from ngt.parallel import _pools, discard_pool
+from ngt.game import Game
+from ngt.player import Player
+from ngt.experiment import Experiment
+from ngt.functions.action_strategy import ActionStrategy
+
+
+def make_game(seed):
+    game = Game(graph=nx.gnm_random_graph(8, 10, seed=seed), nb_time_steps=4, nb_players=3)
+    game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+    game.add_player(Player(action_strategy=ActionStrategy.random_random))
+    game.add_player(Player(action_strategy=ActionStrategy.myopic_greedy))
+    return game
+
+
+def make_failing_game(seed):
+    if seed == 2:
+        raise ValueError("unlucky seed")
+    return make_game(seed)
+
+
+class BrokenPool:
+    """Pool playing the games right away, except one whose worker dies (every future is done when wait returns)"""
+    def __init__(self, broken_seed):
+        self.broken_seed = broken_seed
+
+    def submit(self, function, game_factory, seed, summarize):
+        future = Future()
+        if seed == self.broken_seed:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            future.set_result(function(game_factory, seed, summarize))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class TestExperiment(unittest.TestCase):
+
+    def test_parallel_equals_serial(self):
+        serial = Experiment(make_game, range(6)).run_all()
+        parallel = Experiment(make_game, range(6), nb_workers=2).run_all()
+        self.assertEqual([summary.seed for summary in parallel], list(range(6)))
+        for expected, summary in zip(serial, parallel):
+            self.assertEqual(summary._replace(duration=0), expected._replace(duration=0))
+        self.assertEqual(len(serial[0].utilities[0]), 5)
+
+    def test_failures_are_retried(self):
+        for nb_workers in (1, 2):
+            experiment = Experiment(make_failing_game, range(4), nb_workers=nb_workers, max_retries=1)
+            experiment.run_all()
+            self.assertEqual(sorted(experiment.summaries), [0, 1, 3])
+            self.assertIn("unlucky seed", experiment.failures[2])
+            self.assertEqual(experiment.attempts[2], 2)
+            self.assertIn("3 games played, 1 failed", experiment.report())
+
+    def test_finished_games_survive_a_broken_pool(self):
+        discard_pool(3)
+        _pools[3] = BrokenPool(broken_seed=1)
+        experiment = Experiment(make_game, range(4), nb_workers=3, max_retries=1)
+        experiment.run_all()
+        # only the game of the dead worker is played again (on a new pool)
+        self.assertEqual(sorted(experiment.summaries), [0, 1, 2, 3])
+        self.assertEqual(experiment.attempts, {0: 1, 1: 2, 2: 1, 3: 1})
+        discard_pool(3)
@@ -1,5 +1,12 @@
 import unittest
-from ngt.game import Rules, Game
+import pickle
+import random
+import networkx as nx
+from ngt.game import Rules, Game, MissingRounds, _compute_in_worker, _worker_histories
+from ngt.player import Player
+from ngt.instrumentation import Instrumentation
+from ngt.history import edge_set
+from ngt.functions.action_strategy import ActionStrategy
 
 
 class TestGamePipeline(unittest.TestCase):
@@ -12,3 +19,74 @@ class TestGamePipeline(unittest.TestCase):
 
     def test_create_game(self):
         self.assertEqual(self.g1.rules, self.r1)
+
+
+class TestConcurrentPlayers(unittest.TestCase):
+
+    def play(self, nb_player_workers, graph):
+        random.seed(2)
+        game = Game(graph=graph, nb_time_steps=3, nb_players=4, nb_player_workers=nb_player_workers,
+                    batch_evaluation=False)
+        game.add_player(Player())
+        game.add_player(Player(action_strategy=ActionStrategy.random_random))
+        game.add_player(Player())
+        game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        game.play_game()
+        return game
+
+    def test_matches_serial(self):
+        # greedy players draw random moves on the empty graph
+        for graph in (nx.gnm_random_graph(12, 15, seed=3), nx.empty_graph(12)):
+            serial, concurrent = self.play(1, graph.copy()), self.play(2, graph.copy())
+            for time_step, increment in serial.history.items():
+                self.assertEqual(concurrent.history[time_step].actions, increment.actions)
+                self.assertEqual(concurrent.history[time_step].reactions, increment.reactions)
+            self.assertEqual(set(concurrent.graph.edges()), set(serial.graph.edges()))
+            self.assertEqual(concurrent._workers_start, 3)
+
+
+class TestWorkerHistory(unittest.TestCase):
+
+    def test_rounds_sent_once(self):
+        game = Game(graph=nx.gnm_random_graph(12, 15, seed=3), nb_time_steps=5, nb_players=2, checkpoint_interval=2)
+        for _ in range(2):
+            game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        game.play_game()
+        records = [game.history.record(time_step) for time_step in range(len(game.history))]
+
+        def compute(start, end):
+            snapshot = pickle.dumps((game.rules, records[start:end]))
+            return _compute_in_worker('compute_action', game.players[0], 'test', start, snapshot, 0, (), 0)
+
+        self.assertEqual(compute(3, 6), MissingRounds(0))
+        compute(0, 3)
+        self.assertEqual(compute(4, 6), MissingRounds(3))
+        compute(3, 6)
+        history = _worker_histories.pop('test')
+        for time_step in range(6):
+            self.assertEqual(edge_set(history[time_step].graph), edge_set(game.history[time_step].graph))
+
+
+class TestBatchEvaluation(unittest.TestCase):
+
+    def play(self, **kwargs):
+        game = Game(graph=nx.gnm_random_graph(12, 15, seed=5), nb_time_steps=3, nb_players=4,
+                    instrumentation=Instrumentation(), **kwargs)
+        for _ in range(4):
+            game.add_player(Player())
+        game.play_game()
+        return game
+
+    def test_matches_players_one_by_one(self):
+        batched, one_by_one = self.play(batch_evaluation=True), self.play()
+        unpruned = self.play(batch_evaluation=True, branch_and_bound=False)
+        self.assertFalse(one_by_one.rules.batch_evaluation)
+        for time_step, increment in one_by_one.history.items():
+            self.assertEqual(batched.history[time_step].actions, increment.actions)
+            self.assertEqual(unpruned.history[time_step].actions, increment.actions)
+
+    def test_pruned(self):
+        # by default and batched
+        for game in (self.play(), self.play(batch_evaluation=True)):
+            for current in game.instrumentation.rounds.values():
+                self.assertGreater(current['counters']['candidates_pruned'], 0)
@@ -0,0 +1,69 @@
+import unittest
+import random
+import networkx as nx
+from ngt.graph import CSRGraph, GraphBackend
+from ngt.game import Game
+from ngt.player import Player
+from ngt.functions.utility import Utility
+from ngt.functions.betweenness import DynamicBetweenness
+
+
+class TestCSRGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.nx_graph = nx.gnm_random_graph(30, 60, seed=6)
+        self.graph = CSRGraph.from_networkx(self.nx_graph)
+
+    def assertSameGraph(self, graph, nx_graph):
+        self.assertEqual(len(graph), len(nx_graph))
+        self.assertEqual(graph.number_of_edges(), nx_graph.number_of_edges())
+        self.assertEqual(set(graph.edges()), {tuple(sorted(edge)) for edge in nx_graph.edges()})
+        for node in nx_graph:
+            self.assertEqual(sorted(graph[node]), sorted(nx_graph[node]))
+
+    def test_toggles_match_networkx(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            u, v = rng.sample(range(30), 2)
+            self.assertEqual(self.graph.has_edge(u, v), self.nx_graph.has_edge(u, v))
+            if self.nx_graph.has_edge(u, v):
+                self.graph.remove_edge(u, v)
+                self.nx_graph.remove_edge(u, v)
+            else:
+                self.graph.add_edge(u, v)
+                self.nx_graph.add_edge(u, v)
+        self.assertSameGraph(self.graph, self.nx_graph)
+        self.assertSameGraph(self.graph.to_networkx(), self.nx_graph)
+
+    def test_copy_is_independent(self):
+        copy = self.graph.copy()
+        u, v = next(iter(self.nx_graph.edges()))
+        copy.remove_edge(u, v)
+        self.assertTrue(self.graph.has_edge(u, v))
+        self.assertFalse(copy.has_edge(u, v))
+
+    def test_adjacency_lists(self):
+        adjacency = self.graph.adjacency_lists()
+        copy = self.graph.copy()
+        self.assertIs(copy.adjacency_lists(), adjacency)
+        u, v = next(iter(self.nx_graph.edges()))
+        copy.remove_edge(u, v)
+        copy.add_edge(0, 29) if not copy.has_edge(0, 29) else copy.remove_edge(0, 29)
+        self.assertEqual(copy.adjacency_lists(), [copy.neighbors(node) for node in copy])
+        # the original graph and its lists are left as they were
+        self.assertIs(self.graph.adjacency_lists(), adjacency)
+        self.assertIn(v, adjacency[u])
+
+    def test_utilities_run_on_csr(self):
+        expected = nx.betweenness_centrality(self.nx_graph)
+        engine = DynamicBetweenness(self.graph)
+        for node in range(0, 30, 5):
+            self.assertAlmostEqual(Utility.betweenness_centrality(self.graph, node), expected[node])
+            self.assertAlmostEqual(engine.score(node), expected[node])
+
+    def test_game_with_csr_backend(self):
+        game = Game(graph=self.nx_graph, backend=GraphBackend.csr, nb_time_steps=2, nb_players=2)
+        game.add_player(Player(name='Leo'))
+        game.play_game()
+        self.assertIsInstance(game.history[2].graph, CSRGraph)
+        self.assertEqual(len(game.history), 3)
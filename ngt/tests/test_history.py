@@ -0,0 +1,86 @@
+import unittest
+import random
+import networkx as nx
+from ngt.history import History, edge_set
+from ngt.increment import Increment
+from ngt.graph import CSRGraph
+from ngt.game import Game
+from ngt.player import Player
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        graph = nx.gnm_random_graph(12, 15, seed=1)
+        self.graphs = {}
+        for time_step in range(23):
+            if time_step:
+                for _ in range(2):
+                    u, v = rng.sample(range(12), 2)
+                    if graph.has_edge(u, v):
+                        graph.remove_edge(u, v)
+                    else:
+                        graph.add_edge(u, v)
+            self.graphs[time_step] = graph.copy()
+
+    def check_history(self, graphs):
+        history = History(checkpoint_interval=5, cache_size=2)
+        for time_step, graph in graphs.items():
+            history[time_step] = Increment({0: time_step}, {}, graph)
+        self.assertEqual(len(history), len(graphs))
+        for time_step in (22, 3, 17, 4, 11, 12, 0, 21, 9):
+            self.assertEqual(history[time_step].actions, {0: time_step})
+            self.assertEqual(set(history[time_step].graph.edges()), set(graphs[time_step].edges()))
+        for time_step, increment in history.items():
+            self.assertEqual(set(increment.graph.edges()), set(graphs[time_step].edges()))
+
+    def test_networkx_graphs(self):
+        self.check_history(self.graphs)
+
+    def test_csr_graphs(self):
+        self.check_history({t: CSRGraph.from_networkx(graph) for t, graph in self.graphs.items()})
+
+    def test_known_edge_changes(self):
+        # a single graph modified in place, each round recorded with the edges it toggled
+        graph = self.graphs[0].copy()
+        history = History(checkpoint_interval=5, cache_size=2)
+        history[0] = Increment({0: 0}, {}, graph)
+        for time_step in range(1, 23):
+            old_edges, new_edges = edge_set(self.graphs[time_step - 1]), edge_set(self.graphs[time_step])
+            graph.remove_edges_from(old_edges - new_edges)
+            graph.add_edges_from(new_edges - old_edges)
+            history.add_round(time_step, Increment({0: time_step}, {}, graph), list(new_edges - old_edges),
+                              list(old_edges - new_edges))
+        self.assertFalse(history.record(21)[3])
+        # modifying the graph afterwards doesn't change the last round recorded
+        graph.add_edge(0, 11) if not graph.has_edge(0, 11) else graph.remove_edge(0, 11)
+        graph.graph['state'] = 1
+        self.assertIsNot(history.graph(22), graph)
+        self.assertEqual(history.graph(22).graph, {})
+        for time_step in (22, 3, 17, 4, 11, 12, 0, 21, 9):
+            self.assertEqual(edge_set(history[time_step].graph), edge_set(self.graphs[time_step]))
+
+    def test_attribute_changes(self):
+        graphs = {time_step: graph.copy() for time_step, graph in self.graphs.items()}
+        static, state = object(), object()
+        for time_step, graph in graphs.items():
+            graph.graph.update({'static': static, 'state': state if time_step < 8 else time_step})
+            if time_step >= 14:
+                del graph.graph['static']
+        history = History(checkpoint_interval=5, cache_size=2)
+        for time_step, graph in graphs.items():
+            history[time_step] = Increment({}, {}, graph)
+        self.assertEqual(history.record(9)[2].attributes, {'state': 9})
+        self.assertIsNone(history.record(7)[2].attributes)
+        self.assertEqual(history.record(14)[2].removed_attributes, ['static'])
+        for time_step in (22, 3, 17, 9, 12, 14, 13):
+            self.assertEqual(history[time_step].graph.graph, graphs[time_step].graph)
+
+    def test_game_history(self):
+        game = Game(graph=self.graphs[0].copy(), nb_time_steps=3, nb_players=1)
+        game.add_player(Player(name='Leo'))
+        game.play_game()
+        self.assertIsInstance(game.history, History)
+        self.assertEqual(set(game.history[3].graph.edges()), set(game.graph.edges()))
+        self.assertEqual(set(game.history[0].graph.edges()), set(self.graphs[0].edges()))
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# modules of the simulation, which batch workers import
+simulation_modules = ['ngt', 'ngt.game', 'ngt.player', 'ngt.rules', 'ngt.experiment', 'ngt.functions.action_strategy',
+                      'ngt.functions.reaction_strategy', 'ngt.functions.utility', 'ngt.functions.utility_cache',
+                      'ngt.functions.metrics', 'ngt.functions.update_environment']
+
+# modules the simulation must not load
+heavy_modules = ['matplotlib', 'pandas', 'PIL', 'ngt.plot', 'ngt.export']
+
+# seconds to import the simulation modules, may be raised on slow machines with NGT_IMPORT_BUDGET
+import_budget = float(os.environ.get('NGT_IMPORT_BUDGET', 2.))
+
+script = f"""
+import json, sys, time
+start = time.perf_counter()
+for module in {simulation_modules!r}:
+    __import__(module)
+duration = time.perf_counter() - start
+print(json.dumps({{'duration': duration, 'loaded': [m for m in {heavy_modules!r} if m in sys.modules]}}))
+"""
+
+
+class TestImports(unittest.TestCase):
+
+    def test_simulation_import(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.run([sys.executable, '-c', script], cwd=root, check=True, stdout=subprocess.PIPE).stdout
+        result = json.loads(output.decode())
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['duration'], import_budget)
+
+    def test_lazy_submodules(self):
+        import ngt
+
+        self.assertIs(ngt.history, sys.modules['ngt.history'])
+        with self.assertRaises(AttributeError):
+            ngt.unknown
@@ -0,0 +1,61 @@
+import unittest
+import os
+import json
+import tempfile
+import networkx as nx
+from ngt import instrumentation as ngt_instrumentation
+from ngt.game import Game
+from ngt.player import Player
+from ngt.instrumentation import Instrumentation
+from ngt.functions.action_strategy import ActionStrategy
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.game = Game(graph=nx.gnm_random_graph(8, 10, seed=1), nb_time_steps=3, nb_players=2,
+                         instrumentation=self.instrumentation, batch_evaluation=False)
+        self.game.add_player(Player())
+        self.game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        self.game.play_game()
+
+    def test_rounds_are_recorded(self):
+        self.assertEqual(list(self.instrumentation.rounds), [1, 2, 3])
+        self.assertIsNone(ngt_instrumentation.active)
+        current = self.instrumentation.rounds[2]
+        self.assertEqual(list(current['phases']), ['validation', 'batched_actions', 'fetch_actions',
+                                                   'fetch_reactions', 'compute_final_actions',
+                                                   'update_environment', 'update_history'])
+        self.assertEqual(set(current['players']), {0, 1})
+        self.assertIn('compute_action', current['players'][0])
+        # 28 candidate edges, scored by the greedy player unless pruned
+        counters = current['player_counters'][0]
+        self.assertEqual(counters['candidates_evaluated'] + counters['candidates_pruned'], 28)
+        self.assertEqual(counters['utility_calls'], counters['candidates_evaluated'] + 1)
+        self.assertEqual(current['counters'], counters)
+        self.assertNotIn(1, current['player_counters'])
+
+    def test_counters_without_pruning(self):
+        # every candidate is scored once for both players, by this process or by the workers
+        for nb_workers in (1, 2):
+            instrumentation = Instrumentation()
+            game = Game(graph=nx.gnm_random_graph(8, 10, seed=1), nb_time_steps=1, nb_players=2,
+                        instrumentation=instrumentation, branch_and_bound=False, nb_workers=nb_workers,
+                        batch_evaluation=True)
+            game.add_player(Player())
+            game.add_player(Player())
+            game.play_game()
+            counters = instrumentation.rounds[1]['counters']
+            self.assertEqual(counters['candidates_evaluated'], 28)
+            self.assertEqual(counters['utility_calls'], 2 * 29)
+            self.assertNotIn('candidates_pruned', counters)
+
+    def test_exports(self):
+        self.assertEqual(len(self.instrumentation.table().splitlines()), 4)
+        file_name = os.path.join(tempfile.mkdtemp(), 'rounds.jsonl')
+        self.instrumentation.to_json_lines(file_name)
+        with open(file_name) as lines:
+            rounds = [json.loads(line) for line in lines]
+        os.remove(file_name)
+        self.assertEqual([line['round'] for line in rounds], [1, 2, 3])
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import networkx as nx
+from ngt.game import Game
+from ngt.player import Player
+from ngt.functions.action_strategy import ActionStrategy
+from ngt.layout import Layout, force_layout, game_layout, _repulsion_exact, _repulsion_grid
+
+
+class TestForceLayout(unittest.TestCase):
+
+    def test_neighbors_closer(self):
+        graph = nx.barbell_graph(8, 0)
+        positions = force_layout(len(graph), np.array(graph.edges()), iterations=100)
+        distances = np.linalg.norm(positions[:, None] - positions[None, :], axis=2)
+        # the two cliques of the barbell end up apart
+        self.assertLess(distances[:8, :8].mean(), distances[:8, 8:].mean())
+
+    def test_grid_repulsion(self):
+        positions = np.random.RandomState(0).uniform(-0.5, 0.5, (1500, 2))
+        k = 1 / np.sqrt(len(positions))
+        exact = _repulsion_exact(positions, k)
+        approximated = _repulsion_grid(positions, k)
+        errors = np.linalg.norm(exact - approximated, axis=1) / np.linalg.norm(exact, axis=1)
+        self.assertLess(np.median(errors), 0.1)
+
+
+class TestLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(graph=nx.gnm_random_graph(15, 20, seed=4), nb_time_steps=6, nb_players=3)
+        for _ in range(3):
+            self.game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        self.game.play_game()
+
+    def test_rounds(self):
+        layout = game_layout(self.game)
+        self.assertIs(game_layout(self.game), layout)
+        last = layout[6]
+        self.assertIs(layout[6], last)
+        for time_step in self.game.history:
+            positions = layout[time_step]
+            self.assertEqual(sorted(positions), list(range(15)))
+            self.assertLessEqual(np.abs(np.array(list(positions.values()))).max(), 1 + 1e-9)
+
+        # rounds are laid out in order whatever the order they are asked in
+        other = Game(graph=self.game.graph, history=self.game.history)
+        self.assertEqual(game_layout(other)[6], last)
+        precomputed = Layout(self.game.history)
+        precomputed.precompute([6, 2, 4])
+        self.assertEqual(precomputed[6], last)
+        self.assertEqual(precomputed[2], layout[2])
+
+    def test_unchanged_round(self):
+        self.game.history[7] = self.game.history[6]
+        layout = game_layout(self.game)
+        self.assertEqual(layout[7], layout[6])
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+import networkx as nx
+from ngt.game import Game
+from ngt.player import Player
+from ngt.functions.metrics import MacroMetric, MicroMetric
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(graph=nx.gnm_random_graph(10, 12, seed=3), nb_time_steps=3, nb_players=2,
+                         metrics=[MacroMetric.density, MacroMetric.nb_components, MicroMetric.betweenness_centrality])
+        self.game.add_player(Player())
+        self.game.add_player(Player())
+        self.game.play_game()
+
+    def test_columns(self):
+        metrics = self.game.metrics
+        self.assertEqual(list(metrics.time_steps), [0, 1, 2, 3])
+        for time_step in metrics.time_steps:
+            graph = self.game.history[time_step].graph
+            self.assertAlmostEqual(metrics[MacroMetric.density][time_step], nx.density(graph))
+            self.assertEqual(metrics["macro_nb_components"][time_step], nx.number_connected_components(graph))
+            expected = nx.betweenness_centrality(graph)
+            np.testing.assert_allclose(metrics[MicroMetric.betweenness_centrality][time_step],
+                                       [expected[node] for node in range(10)], atol=1e-12)
+
+    def test_register_during_game(self):
+        self.game.metrics.register(MicroMetric.degree)
+        self.game.rules.nb_time_steps = 4
+        self.game.play_game()
+        self.assertEqual(self.game.metrics[MicroMetric.degree].shape, (5, 10))
+        self.assertEqual(self.game.metrics[MacroMetric.density].shape, (5,))
@@ -0,0 +1,131 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import networkx as nx
+from ngt.game import Game
+from ngt.player import Player
+from ngt.plot import FrameData, GraphRenderer, get_labels_sizes_lboards, get_positions, get_colors
+from ngt.history import edge_set
+from ngt.export import export_frames, export_animation, frame_file_name
+from PIL import Image
+from ngt.functions.action_strategy import ActionStrategy
+from ngt.functions.metrics import MicroMetric
+
+
+class TestFrameData(unittest.TestCase):
+
+    def play(self, **kwargs):
+        game = Game(graph=nx.gnm_random_graph(10, 12, seed=3), nb_time_steps=4, nb_players=2, **kwargs)
+        game.add_player(Player(name='Leo'))
+        game.add_player(Player(name='Marc'))
+        game.play_game()
+        return game
+
+    def test_frames(self):
+        game = self.play()
+        labels, sizes, leader_boards = get_labels_sizes_lboards(game, significant_digits=3)
+        for time_step in game.history:
+            betweenness = nx.betweenness_centrality(game.history[time_step].graph)
+            self.assertEqual(len(sizes[time_step]), 10)
+            for node in range(10):
+                self.assertAlmostEqual(sizes[time_step][node], (10 * betweenness[node] + 1) * 300)
+            self.assertIn(str(round(betweenness[0], 3)), labels[time_step][0])
+            self.assertIn("Leo", labels[time_step][0])
+            self.assertTrue(leader_boards[time_step].startswith("Leader board:\n1. "))
+
+    def test_prefetch_and_recorded_centralities(self):
+        game = self.play()
+        expected = [FrameData(game)[time_step] for time_step in game.history]
+
+        frames = FrameData(game, nb_workers=2, prefetch_size=3)
+        frames.prefetch(0)
+        self.assertEqual(sorted(frames._pending), [1, 2, 3])
+        for time_step in game.history:
+            frames.prefetch(time_step)
+            self.assertEqual(frames[time_step][0], expected[time_step][0])
+        self.assertEqual(frames._pending, {})
+
+        recorded = self.play(metrics=[MicroMetric.betweenness_centrality])
+        frames = FrameData(recorded, nb_workers=2)
+        frames.prefetch(0)
+        self.assertEqual(frames._pending, {})
+        for time_step in recorded.history:
+            for size, expected_size in zip(frames.sizes[time_step], expected[time_step][1]):
+                self.assertAlmostEqual(size, expected_size)
+
+
+class TestGraphRenderer(unittest.TestCase):
+
+    def test_edges_follow_history(self):
+        game = Game(graph=nx.gnm_random_graph(12, 15, seed=2), nb_time_steps=8, nb_players=3, checkpoint_interval=5)
+        for _ in range(3):
+            game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        game.play_game()
+
+        frames = FrameData(game)
+        figure = plt.figure()
+        renderer = GraphRenderer(figure.add_subplot(111), game, get_positions(game), get_colors(game),
+                                 frames.labels, frames.sizes, frames.leader_boards, display_labels=True)
+        for time_step in [0, 1, 2, 3, 8, 7, 2, 6, 0]:
+            renderer.render(time_step)
+            self.assertEqual(renderer.edges_drawn(), edge_set(game.history[time_step].graph))
+            self.assertEqual(len(renderer.edges.get_paths()), game.history[time_step].graph.number_of_edges())
+            self.assertEqual(list(renderer.nodes.get_sizes()), frames.sizes[time_step])
+        figure.canvas.draw()
+        plt.close(figure)
+
+    def test_force_layout(self):
+        game = Game(graph=nx.gnm_random_graph(12, 15, seed=2), nb_time_steps=4, nb_players=3)
+        for _ in range(3):
+            game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        game.play_game()
+
+        frames = FrameData(game)
+        layout = get_positions(game, 'force')
+        figure = plt.figure()
+        renderer = GraphRenderer(figure.add_subplot(111), game, layout, get_colors(game), frames.labels,
+                                 frames.sizes)
+        for time_step in [0, 3, 1]:
+            renderer.render(time_step)
+            np.testing.assert_allclose(renderer.nodes.get_offsets(), [layout[time_step][node] for node in range(12)])
+            self.assertEqual(renderer.edges_drawn(), edge_set(game.history[time_step].graph))
+            for (u, v), segment in zip(renderer._slot_edges, renderer.edges.get_segments()):
+                np.testing.assert_allclose(segment, [layout[time_step][u], layout[time_step][v]])
+        plt.close(figure)
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.game = Game(graph=nx.gnm_random_graph(10, 12, seed=2), nb_time_steps=5, nb_players=2)
+        self.game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        self.game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        self.game.play_game()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_export_frames(self):
+        for nb_workers in (1, 2):
+            folder = os.path.join(self.folder, str(nb_workers))
+            file_names = export_frames(self.game, folder, nb_workers=nb_workers, dpi=20, leader_board=True)
+            self.assertEqual(file_names, [frame_file_name(folder, t) for t in range(6)])
+            self.assertTrue(all(os.path.getsize(file_name) > 0 for file_name in file_names))
+
+    def test_export_gif(self):
+        file_name = os.path.join(self.folder, 'replay.gif')
+        export_animation(self.game, file_name, fps=5, nb_workers=2, dpi=20)
+        with Image.open(file_name) as animation:
+            self.assertEqual(animation.n_frames, 6)
+
+    def test_export_force_layout(self):
+        folder = os.path.join(self.folder, 'force')
+        file_names = export_frames(self.game, folder, nb_workers=2, layout='force', dpi=20)
+        self.assertEqual(len(file_names), 6)
+        self.assertEqual(len(self.game.layout._raw), 6)
@@ -0,0 +1,106 @@
+import unittest
+import random
+import numpy as np
+import networkx as nx
+from ngt.game import Game
+from ngt.player import Player
+from ngt.rules import Rules, ActionSpace
+from ngt.functions.action_strategy import ActionStrategy
+from ngt.functions.propagation import infect, infection_pressure, propagation_state, spread, adjacency_matrix
+from ngt.functions.update_environment import update_environment_edge
+
+
+class TestSpread(unittest.TestCase):
+
+    def test_certain_infection(self):
+        graph = nx.path_graph(6)
+        infect(graph, [0])
+        rules = Rules(action_space=ActionSpace.node, infection_probability=1.)
+        spread(rules, graph, [3], np.random.RandomState(0))
+        infected, immune = propagation_state(graph)
+        self.assertEqual(list(np.flatnonzero(infected)), [0, 1])
+        self.assertEqual(list(np.flatnonzero(immune)), [3])
+        spread(rules, graph, [], np.random.RandomState(0))
+        spread(rules, graph, [], np.random.RandomState(0))
+        # the immunized node stops the virus
+        self.assertEqual(list(np.flatnonzero(propagation_state(graph)[0])), [0, 1, 2])
+        np.testing.assert_array_equal(infection_pressure(graph), [1, 2, 1, 1, 0, 0])
+
+    def test_adjacency_shared_by_copies(self):
+        graph = nx.path_graph(6)
+        infect(graph, [0])
+        matrix = adjacency_matrix(graph)
+        self.assertIs(adjacency_matrix(graph.copy()), matrix)
+        # toggling an edge drops the token, the matrix is rebuilt
+        update_environment_edge(Rules(), graph, {0: (0, 5)})
+        self.assertEqual(adjacency_matrix(graph)[0, 5], 1)
+
+    def test_edge_swapped_without_token(self):
+        graph = nx.path_graph(6)
+        infect(graph, [0])
+        graph.graph.pop('edge_structure')
+        self.assertEqual(list(infection_pressure(graph)), [0, 1, 0, 0, 0, 0])
+        # same number of edges, the matrix is rebuilt all the same
+        graph.remove_edge(0, 1)
+        graph.add_edge(0, 5)
+        self.assertEqual(list(infection_pressure(graph)), [0, 0, 0, 0, 0, 1])
+        self.assertEqual(adjacency_matrix(graph)[0, 1], 0)
+
+    def test_recovery(self):
+        graph = nx.complete_graph(5)
+        infect(graph, [0, 1])
+        spread(Rules(infection_probability=0., recovery_probability=1.), graph, [], np.random.RandomState(0))
+        infected, immune = propagation_state(graph)
+        self.assertFalse(infected.any())
+        self.assertEqual(list(np.flatnonzero(immune)), [0, 1])
+
+
+class TestVirusGame(unittest.TestCase):
+
+    def play(self, seed):
+        random.seed(seed)
+        graph = nx.gnm_random_graph(50, 100, seed=1)
+        infect(graph, [0, 1])
+        game = Game(graph=graph, action_space=ActionSpace.node, nb_players=3, nb_time_steps=6,
+                    infection_probability=0.3, checkpoint_interval=2)
+        game.add_player(Player(action_strategy=ActionStrategy.firefighter))
+        game.add_player(Player(action_strategy=ActionStrategy.random_random))
+        game.add_player(Player(action_strategy=ActionStrategy.random_egoist))
+        game.play_game()
+        return game
+
+    def test_play_game(self):
+        game = self.play(3)
+        for time_step in range(1, 7):
+            infected, immune = propagation_state(game.history[time_step].graph)
+            previous_infected, previous_immune = propagation_state(game.history[time_step - 1].graph)
+            # immune nodes stay immune, the immunized nodes are not infected
+            self.assertTrue(immune[previous_immune].all())
+            for node in game.history[time_step].actions.values():
+                if node is not None:
+                    self.assertTrue(immune[node])
+                    self.assertFalse(infected[node])
+        replay = self.play(3)
+        np.testing.assert_array_equal(propagation_state(replay.graph)[0], propagation_state(game.graph)[0])
+
+    def test_history_without_copies(self):
+        game = self.play(4)
+        # the edges never change, the graph is only copied for the first round
+        self.assertEqual([game.history.record(t)[3] for t in game.history], [True] + [False] * 6)
+        self.assertTrue(all(diff.added_edges == diff.removed_edges == []
+                            for _, _, diff, _ in map(game.history.record, range(1, 7))))
+
+        # states of every round, as played, compared with the graphs rebuilt by the history
+        random.seed(4)
+        graph = nx.gnm_random_graph(50, 100, seed=1)
+        infect(graph, [0, 1])
+        replay = Game(graph=graph, action_space=ActionSpace.node, nb_players=3, nb_time_steps=6,
+                      infection_probability=0.3, checkpoint_interval=2, players=game.players)
+        states = [propagation_state(replay.graph)]
+        for _ in range(6):
+            replay.play_round()
+            states.append(propagation_state(replay.graph))
+        for time_step in (3, 6, 1, 0, 5):
+            infected, immune = propagation_state(game.history[time_step].graph)
+            np.testing.assert_array_equal(infected, states[time_step][0])
+            np.testing.assert_array_equal(immune, states[time_step][1])
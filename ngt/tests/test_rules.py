@@ -0,0 +1,62 @@
+import unittest
+import itertools
+import pickle
+import random
+from ngt.rules import Rules, edge_index
+from ngt.game import Game
+
+
+class TestActionMask(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.impossible_actions = {tuple(random.sample(range(30), 2)) for _ in range(200)}
+        self.rules = Rules(impossible_actions=self.impossible_actions)
+
+    def test_candidates(self):
+        expected = [(i, j) for i, j in itertools.combinations(range(30), 2)
+                    if (i, j) not in self.impossible_actions and (j, i) not in self.impossible_actions]
+        self.assertEqual(self.rules.candidate_edges(30), expected)
+        mask = self.rules.action_mask(30)
+        for i, j in itertools.combinations(range(30), 2):
+            self.assertEqual(mask[edge_index(i, j, 30)], (i, j) in expected)
+
+    def test_orientation(self):
+        i, j = next(iter(self.impossible_actions))
+        self.assertFalse(self.rules.is_possible((j, i)))
+        game = Game(rules=self.rules)
+        self.assertEqual(game.compute_final_actions({0: (j, i), 1: (i, j), 2: None}, {}), {})
+
+    def test_recompiled(self):
+        self.rules.candidate_edges(30)
+        self.rules.impossible_actions = {(0, 1)}
+        self.assertEqual(len(self.rules.candidate_edges(30)), 30 * 29 // 2 - 1)
+        self.assertTrue(self.rules.is_possible((2, 1)))
+        self.assertEqual(pickle.loads(pickle.dumps(self.rules))._compiled, {})
+
+    def test_previous_pickles(self):
+        # state of rules pickled before the constraints were compiled
+        state = {key: value for key, value in self.rules.__dict__.items() if key not in ('_compiled',
+                                                                                          '_impossible_actions')}
+        state['impossible_actions'] = {(0, 1)}
+        rules = Rules.__new__(Rules)
+        rules.__setstate__(state)
+        self.assertFalse(rules.is_possible((1, 0)))
+        self.assertEqual(len(rules.candidate_edges(5)), 9)
+
+    def test_modified_in_place(self):
+        for impossible_actions in ([(0, 1), (2, 3)], {(0, 1), (2, 3)}):
+            rules = Rules(impossible_actions=impossible_actions)
+            self.assertNotIn((0, 1), rules.candidate_edges(5))
+            # same number of impossible actions, another edge forbidden
+            if isinstance(impossible_actions, list):
+                impossible_actions[0] = (4, 0)
+            else:
+                impossible_actions.discard((0, 1))
+                impossible_actions.add((4, 0))
+            rules.recompile()
+            self.assertTrue(rules.is_possible((1, 0)))
+            self.assertFalse(rules.is_possible((0, 4)))
+            self.assertIn((0, 1), rules.candidate_edges(5))
+            self.assertNotIn((0, 4), rules.candidate_edges(5))
+            self.assertFalse(rules.action_mask(5)[edge_index(0, 4, 5)])
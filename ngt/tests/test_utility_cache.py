@@ -0,0 +1,84 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pickle
+import numpy as np
+import networkx as nx
+from ngt.graph import CSRGraph
+from ngt.rules import Rules
+from ngt.increment import Increment
+from ngt.player import Player
+from ngt.functions.utility import Utility, centralities
+from ngt.functions.utility_cache import UtilityCache, CachedUtility, graph_fingerprint
+from ngt.functions.action_strategy import myopic_greedy, follower
+
+
+class TestUtilityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.graph = nx.gnm_random_graph(12, 18, seed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_fingerprint_is_canonical(self):
+        shuffled = nx.Graph()
+        shuffled.add_edges_from(reversed([(v, u) for u, v in self.graph.edges()]))
+        shuffled.add_nodes_from(self.graph.nodes())
+        self.assertEqual(graph_fingerprint(shuffled), graph_fingerprint(self.graph))
+        self.assertEqual(graph_fingerprint(CSRGraph.from_networkx(self.graph)), graph_fingerprint(self.graph))
+        shuffled.add_edge(0, 11) if not shuffled.has_edge(0, 11) else shuffled.remove_edge(0, 11)
+        self.assertNotEqual(graph_fingerprint(shuffled), graph_fingerprint(self.graph))
+
+    def test_fingerprint_includes_attributes(self):
+        graph = self.graph.copy()
+        graph.graph['infected'] = np.zeros(12, dtype=bool)
+        fingerprint = graph_fingerprint(graph)
+        self.assertNotEqual(fingerprint, graph_fingerprint(self.graph))
+        graph.graph['infected'] = np.zeros(12, dtype=bool)
+        self.assertEqual(graph_fingerprint(graph), fingerprint)
+        graph.graph['infected'] = np.arange(12) == 3
+        self.assertNotEqual(graph_fingerprint(graph), fingerprint)
+
+    def test_memory_and_disk_tiers(self):
+        path = os.path.join(self.folder, 'cache.sqlite')
+        cache = UtilityCache(max_size=2, path=path)
+        utility = CachedUtility(Utility.betweenness_centrality, cache)
+        for node in range(3):
+            self.assertAlmostEqual(utility(self.graph, node), Utility.betweenness_centrality(self.graph, node))
+        self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (0, 0, 3))
+        utility(self.graph.copy(), 2)
+        utility(self.graph, 0)
+        self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (1, 1, 3))
+
+        # another process reading the same file
+        other = pickle.loads(pickle.dumps(utility))
+        other(self.graph, 1)
+        self.assertEqual((other.cache.hits, other.cache.disk_hits, other.cache.misses), (0, 1, 0))
+
+    def test_strategies_are_unchanged(self):
+        cache = UtilityCache()
+        player = Player(utility_cache=cache)
+        self.assertIsInstance(player.utility_function, CachedUtility)
+        rules, history = Rules(), {0: Increment(graph=self.graph)}
+        for node_id in (0, 5):
+            self.assertEqual(myopic_greedy(rules, history, player.utility_function, node_id),
+                             myopic_greedy(rules, history, Utility.betweenness_centrality, node_id))
+        self.assertEqual(follower(rules, history, player.utility_function, 0),
+                         follower(rules, history, Utility.betweenness_centrality, 0))
+        self.assertEqual(centralities(player.utility_function, self.graph), nx.betweenness_centrality(self.graph))
+        self.assertGreater(cache.hits, 0)
+
+    def test_greedy_search_uses_cache(self):
+        cache = UtilityCache()
+        utility = CachedUtility(Utility.approximate_betweenness_centrality, cache)
+        rules, history = Rules(nb_exact_checks=3), {0: Increment(graph=self.graph)}
+        move = myopic_greedy(rules, history, utility, 0)
+        self.assertEqual(move, myopic_greedy(rules, history, Utility.approximate_betweenness_centrality, 0))
+        nb_misses = cache.misses
+        self.assertGreater(nb_misses, len(rules.candidate_edges(12)))
+        # every toggled graph, exact checks included, is found in the cache the second time
+        self.assertEqual(myopic_greedy(rules, history, utility, 0), move)
+        self.assertEqual(cache.misses, nb_misses)